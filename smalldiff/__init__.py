@@ -1,2 +1,4 @@
 from .main import *
 from .encoder import *
+from .normalizer import *
+from .reporters import *
@@ -0,0 +1,163 @@
+"""
+Vectorized comparison of numpy arrays and pandas frames.
+numpy and pandas are optional, they are looked up among the imported modules only:
+an array cannot be compared unless its module was imported to build it
+"""
+import json
+import sys
+from operator import methodcaller
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+_tolist = methodcaller('tolist')
+_item = methodcaller('item')
+
+
+def is_array(obj: Any) -> bool:
+    """
+    Tells whether an object is compared vectorized: a numpy array of non-object values,
+    a pandas DataFrame or a pandas Series
+    """
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(obj, numpy.ndarray):
+        return obj.dtype.kind != 'O' and obj.ndim > 0
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(obj, (pandas.DataFrame, pandas.Series))
+
+
+def array_handler(obj_type: type) -> Optional[Callable[[Any], Any]]:
+    """
+    Returns the conversion of numpy and pandas types into json compatible values:
+    arrays into nested lists, numpy scalars into python ones,
+    a DataFrame into a dict of its columns, a Series into a dict, both keyed by their index
+    """
+    numpy = sys.modules.get('numpy')
+    if numpy is not None:
+        if issubclass(obj_type, numpy.ndarray):
+            return _tolist
+        if issubclass(obj_type, numpy.generic):
+            return _item
+    pandas = sys.modules.get('pandas')
+    if pandas is not None:
+        if issubclass(obj_type, pandas.DataFrame):
+            return _frame_dict
+        if issubclass(obj_type, pandas.Series):
+            return _series_dict
+    return None
+
+
+def array_differences(
+        expected: Any,
+        actual: Any,
+        rel_tol: float = 0.0,
+        abs_tol: float = 0.0
+) -> Optional[Iterator[Tuple[Tuple, Any, Any]]]:
+    """
+    Compares two arrays, or two frames, element-wise in one vectorized pass
+    and returns their differences as (segments, expected, actual) tuples
+    in the order a walk of their converted values would yield them.
+    Numbers are equal within rel_tol or abs_tol, the same way as math.isclose.
+    Returns None when the values cannot be compared vectorized, i.e. arrays of different shapes
+    or frames with different indexes, these are compared through their converted values
+    """
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(expected, numpy.ndarray):
+        if not isinstance(actual, numpy.ndarray) or expected.shape != actual.shape:
+            return None
+        mask = _mismatches(numpy, expected, actual, rel_tol, abs_tol)
+        return None if mask is None else _array_mismatches(numpy, expected, actual, mask)
+
+    pandas = sys.modules['pandas']
+    if isinstance(expected, pandas.Series) and isinstance(actual, pandas.Series):
+        if not _same_index(expected.index, actual.index):
+            return None
+        mask = _mismatches(numpy, expected.to_numpy(), actual.to_numpy(), rel_tol, abs_tol)
+        return None if mask is None else _series_mismatches(expected, actual, mask, ())
+    if isinstance(expected, pandas.DataFrame) and isinstance(actual, pandas.DataFrame):
+        if not _same_index(expected.index, actual.index) \
+                or not expected.columns.is_unique or not actual.columns.is_unique:
+            return None
+        masks = {}
+        for column in expected.columns:
+            if column in actual.columns:
+                masks[column] = _mismatches(
+                    numpy, expected[column].to_numpy(), actual[column].to_numpy(), rel_tol, abs_tol
+                )
+                if masks[column] is None:
+                    return None
+        return _frame_mismatches(expected, actual, masks)
+    return None
+
+
+def _mismatches(numpy: Any, expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> Any:
+    """
+    Returns the mask of the mismatching elements, or None if the elements cannot be compared
+    """
+    try:
+        with numpy.errstate(all='ignore'):
+            mask = numpy.asarray(expected != actual)
+            if (rel_tol or abs_tol) and expected.dtype.kind in 'iuf' and actual.dtype.kind in 'iuf':
+                expected = expected.astype(float)
+                actual = actual.astype(float)
+                mask &= beyond_tolerance(numpy, expected, actual, rel_tol, abs_tol)
+    except (TypeError, ValueError):
+        return None
+    if mask.dtype != bool or mask.shape != expected.shape:
+        return None
+    return mask
+
+
+def beyond_tolerance(numpy: Any, expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> Any:
+    """
+    Returns the mask of the elements of two float arrays that are not equal within rel_tol or abs_tol,
+    the same way as math.isclose, NaN included. The caller ignores the floating point errors
+    """
+    tolerance = numpy.maximum(rel_tol * numpy.maximum(abs(expected), abs(actual)), abs_tol)
+    return ~(abs(expected - actual) <= tolerance)
+
+
+def _array_mismatches(numpy: Any, expected: Any, actual: Any, mask: Any) -> Iterator[Tuple[Tuple, Any, Any]]:
+    indexes = zip(*(positions.tolist() for positions in numpy.nonzero(mask)))
+    return zip(indexes, expected[mask].tolist(), actual[mask].tolist())
+
+
+def _series_mismatches(expected: Any, actual: Any, mask: Any, path: Tuple) -> Iterator[Tuple[Tuple, Any, Any]]:
+    labels = expected.index[mask].tolist()
+    for label, expected_val, actual_val in zip(labels, expected[mask].tolist(), actual[mask].tolist()):
+        yield (*path, _label(label)), expected_val, actual_val
+
+
+def _frame_mismatches(expected: Any, actual: Any, masks: dict) -> Iterator[Tuple[Tuple, Any, Any]]:
+    for column in expected.columns:
+        if column in masks:
+            yield from _series_mismatches(expected[column], actual[column], masks[column], (_label(column),))
+        else:
+            yield (_label(column),), _series_dict(expected[column]), None
+    for column in actual.columns:
+        if column not in expected.columns:
+            yield (_label(column),), None, _series_dict(actual[column])
+
+
+def _same_index(expected: Any, actual: Any) -> bool:
+    return expected.is_unique and expected.equals(actual)
+
+
+def _frame_dict(frame: Any) -> dict:
+    return {_label(column): _series_dict(frame[column]) for column in frame.columns}
+
+
+def _series_dict(series: Any) -> dict:
+    return dict(zip(map(_label, series.index.tolist()), series.tolist()))
+
+
+def _label(label: Any) -> str:
+    """
+    Converts an index label into a key, the same way json converts the keys of a dict,
+    dates and other labels json does not support into their text
+    """
+    if isinstance(label, str):
+        return str.__str__(label)
+    if label is None or isinstance(label, (bool, int, float)):
+        return json.dumps(label)
+    if hasattr(label, 'isoformat'):
+        return label.isoformat()
+    return str(label)
@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from smalldiff.filters import PatternNode, advance, closure
+
+# takes the expected and the actual value and tells whether they are equal
+Comparator = Callable[[Any, Any], bool]
+# The most child keys cached per path, long lists and mappings keyed by ids would grow the cache without bound
+CACHED_KEYS = 4096
+# The types of normalized values, a type comparator applies to them when it is keyed by one of their classes
+JSON_TYPES = (dict, list, str, int, float, bool, type(None))
+
+
+class Resolution:
+    """
+    The comparator of a path, and the pattern nodes reached at it.
+    The resolutions of the child keys are cached on their parent, so each path is resolved once
+    """
+    __slots__ = ('nodes', 'comparator', 'children')
+
+    def __init__(self, nodes: tuple):
+        self.nodes = nodes
+        matches = [node.value for node in nodes if node.value is not None]
+        # the last registered of the patterns that match the path wins
+        self.comparator = max(matches, key=_order)[1] if matches else None
+        self.children = {}
+
+
+# the resolution of the fields no pattern can match
+UNMATCHED = Resolution(())
+
+
+class Comparators:
+    """
+    Custom comparators keyed by path pattern or by type.
+    The patterns match the paths the way include and exclude do, as compare reports them,
+    list positions included, so 'orders.*.items.*.sku' is the sku of every item of every order.
+    A * segment matches any one key, ** any number of keys, and segments like 'tmp_*' are matched as globs.
+    A type comparator applies to the values of that type and of its subclasses, on both sides.
+    A path comparator takes precedence over a type comparator,
+    and of two path patterns that match a path, the one registered last wins.
+
+    The patterns are compiled once into a trie, and resolved once per path and per type,
+    the resolutions are cached for the next comparisons
+    """
+
+    def __init__(self, comparators: Dict[Union[str, type], Comparator] = None):
+        self._paths = {}
+        self._types = {}
+        self._reset()
+        for key, comparator in (comparators or {}).items():
+            self.register(key, comparator)
+
+    def register(self, key: Union[str, type], comparator: Comparator) -> None:
+        if not callable(comparator):
+            raise TypeError(f"The comparator of {key!r} must be callable")
+        if isinstance(key, type):
+            self._types[key] = comparator
+        elif isinstance(key, str) and key:
+            self._paths.pop(key, None)
+            self._paths[key] = comparator
+        else:
+            raise ValueError(f"Comparators are keyed by a path pattern or a type, not {key!r}")
+        self._reset()
+
+    def merged(self, comparators: Optional[Dict[Union[str, type], Comparator]]) -> Optional['Comparators']:
+        """
+        Returns these comparators overridden by the given ones, or None if there are none at all
+        """
+        if not comparators:
+            return self if self._paths or self._types else None
+        merged = Comparators({**self._paths, **self._types})
+        for key, comparator in comparators.items():
+            merged.register(key, comparator)
+        return merged
+
+    @property
+    def root(self) -> Resolution:
+        if self._root is None:
+            trie = PatternNode()
+            for order, (pattern, comparator) in enumerate(self._paths.items()):
+                trie.add(pattern, (order, comparator))
+            self._root = Resolution(closure((trie,))) if self._paths else UNMATCHED
+        return self._root
+
+    @property
+    def has_paths(self) -> bool:
+        return bool(self._paths)
+
+    @property
+    def source_types(self) -> List[type]:
+        """
+        The types of the type comparators that apply to no normalized value,
+        only to the values as they are found in the compared objects, i.e. datetime
+        """
+        return [key for key in self._types if not any(key in json_type.__mro__ for json_type in JSON_TYPES)]
+
+    def resolve(self, segments: Tuple) -> Resolution:
+        """
+        Returns the resolution of a path, from the root
+        """
+        resolution = self.root
+        for key in segments:
+            resolution = self.child(resolution, key)
+        return resolution
+
+    def child(self, resolution: Resolution, key: Any) -> Resolution:
+        """
+        Returns the resolution of a child key
+        """
+        if not resolution.nodes:
+            return resolution
+        found = resolution.children.get(key)
+        if found is None:
+            nodes = advance(resolution.nodes, key if type(key) is str else str(key))
+            found = self._interned.get(nodes)
+            if found is None:
+                found = self._interned[nodes] = Resolution(nodes) if nodes else UNMATCHED
+            if len(resolution.children) < CACHED_KEYS:
+                resolution.children[key] = found
+        return found
+
+    def comparator_of(self, resolution: Resolution, expected: Any, actual: Any) -> Optional[Comparator]:
+        """
+        Returns the comparator of two values at a path, by the path or by their types
+        """
+        if resolution.comparator is not None:
+            return resolution.comparator
+        if not self._types:
+            return None
+        comparator = self._by_type(type(expected))
+        if comparator is None:
+            return None
+        if type(actual) is not type(expected) and self._by_type(type(actual)) is not comparator:
+            return None
+        return comparator
+
+    def _by_type(self, value_type: type) -> Optional[Comparator]:
+        if value_type not in self._resolved:
+            self._resolved[value_type] = next(
+                (self._types[klass] for klass in value_type.__mro__ if klass in self._types), None
+            )
+        return self._resolved[value_type]
+
+    def _reset(self) -> None:
+        self._root = None
+        self._interned = {}
+        self._resolved = {}
+
+
+def _order(value: tuple) -> int:
+    return value[0]
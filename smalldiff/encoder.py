@@ -1,27 +1,112 @@
-import json
-from datetime import datetime, date
+from datetime import date
 from enum import Enum
 from json import JSONEncoder
+from operator import attrgetter, methodcaller
+from typing import Any, Callable, Dict
+
+from pydantic.main import BaseModel
+
+from smalldiff.arrays import array_handler
+
+__all__ = ['ModelEncoder']
+
+# pydantic 2 dumps models into json compatible values natively, pydantic 1 into a dict of raw values
+PYDANTIC_V2 = hasattr(BaseModel, 'model_dump')
 
 
 class ModelEncoder(JSONEncoder):
+    """
+    Encodes the objects json does not support natively.
+    The handler of a type is resolved the first time an instance of it is encoded,
+    and cached per encoder class, so later instances are dispatched with a single lookup.
+    Handlers for more types can be registered with register
+    """
+    _handlers: Dict[type, Callable[[Any], Any]] = {}
+    _resolved: Dict[type, Callable[[Any], Any]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = {}
+        cls._resolved = {}
+
+    @classmethod
+    def register(cls, obj_type: type, handler: Callable[[Any], Any]) -> None:
+        """
+        Encodes the instances of a type, and of its subclasses, with the given handler,
+        ahead of the built-in conversions. The handlers registered on an encoder
+        apply to its subclasses too
+        """
+        cls._handlers[obj_type] = handler
+        for encoder in cls.__encoders():
+            encoder._resolved.clear()
+
     def default(self, obj):
+        obj_type = type(obj)
+        handler = self._resolved.get(obj_type)
+        if handler is None:
+            handler = self._resolved[obj_type] = self._resolve(obj_type)
         try:
-            if isinstance(obj, Enum):
-                return obj.value
-            if isinstance(obj, (date, datetime)):
-                return obj.isoformat()
-            if isinstance(obj, (bytes, bytearray)):
-                return obj.decode('utf-8')
-            if isinstance(obj, (set, frozenset)):
-                return list(obj)
-            if isinstance(obj, object):
-                if hasattr(obj, 'to_dict'):
-                    return obj.to_dict()
-                if hasattr(obj, '__dict__'):
-                    return obj.__dict__
-            return json.JSONEncoder.default(self, obj)
+            return handler(obj)
         except TypeError as e:
             msg = (f'{e}, provide a customer encoder by extending ModelEncoder '
                    f'or implement to_dict() method')
             raise TypeError(msg) from e
+
+    @classmethod
+    def _resolve(cls, obj_type: type) -> Callable[[Any], Any]:
+        """
+        Finds the handler of a type: a registered one first, then the built-in conversions
+        """
+        for base in obj_type.__mro__:
+            for encoder in cls.__mro__:
+                handler = vars(encoder).get('_handlers', {}).get(base)
+                if handler is not None:
+                    return handler
+
+        if issubclass(obj_type, Enum):
+            return _enum_value
+        if issubclass(obj_type, date):
+            return _isoformat
+        if issubclass(obj_type, (bytes, bytearray)):
+            return _decode
+        if issubclass(obj_type, (set, frozenset)):
+            return list
+        handler = array_handler(obj_type)
+        if handler is not None:
+            return handler
+        if hasattr(obj_type, 'to_dict'):
+            return _to_dict
+        if issubclass(obj_type, BaseModel):
+            return _dump_model
+        if any('__dict__' in vars(base) for base in obj_type.__mro__):
+            return _vars
+        return _unsupported
+
+    @classmethod
+    def __encoders(cls):
+        yield cls
+        for subclass in cls.__subclasses__():
+            yield from subclass.__encoders()
+
+
+# the built-in handlers are C callables, so dispatching to them adds no python frame
+_enum_value = attrgetter('value')
+_isoformat = methodcaller('isoformat')
+_decode = methodcaller('decode', 'utf-8')
+_to_dict = methodcaller('to_dict')
+_vars = attrgetter('__dict__')
+
+
+def _dump_model(obj: BaseModel) -> Any:
+    if not PYDANTIC_V2:
+        # iterating a pydantic 1 model yields its fields as they are, faster than copying them with .dict()
+        return dict(obj)
+    try:
+        return obj.model_dump(mode='json')
+    except ValueError:
+        # a field pydantic cannot serialize, i.e. an arbitrary type, is left to the encoder
+        return dict(obj)
+
+
+def _unsupported(obj: Any) -> Any:
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
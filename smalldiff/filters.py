@@ -0,0 +1,165 @@
+import re
+from fnmatch import translate
+from typing import Any, Iterable, Optional, Tuple
+
+# a state of the walk: whether an include pattern matched the path already,
+# then the pattern nodes the include and the exclude patterns reached
+State = Tuple[bool, tuple, tuple]
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+class PatternNode:
+    """
+    A node of a trie of dotted path patterns, one per distinct pattern prefix.
+    The node a pattern ends at holds the value it was added with
+    """
+    __slots__ = ('children', 'any', 'globs', 'deep', 'loops', 'value')
+
+    def __init__(self, loops: bool = False):
+        self.children = {}
+        self.any = None
+        self.globs = []
+        self.deep = None
+        self.loops = loops
+        self.value = None
+
+    def add(self, pattern: str, value: Any = True) -> None:
+        if not isinstance(pattern, str) or not pattern:
+            raise ValueError(f"Path patterns must be non empty strings, not {pattern!r}")
+        node = self
+        for segment in pattern.split("."):
+            if segment == "**":
+                if node.deep is None:
+                    node.deep = PatternNode(loops=True)
+                node = node.deep
+            elif segment == "*":
+                if node.any is None:
+                    node.any = PatternNode()
+                node = node.any
+            elif _GLOB_CHARS.intersection(segment):
+                for glob, child in node.globs:
+                    if glob.pattern == translate(segment):
+                        node = child
+                        break
+                else:
+                    child = PatternNode()
+                    node.globs.append((re.compile(translate(segment)), child))
+                    node = child
+            else:
+                node = node.children.setdefault(segment, PatternNode())
+        node.value = value
+
+
+def advance(nodes: tuple, segment: str) -> tuple:
+    """
+    Returns the nodes reached from the given ones by a key
+    """
+    reached = []
+    for node in nodes:
+        if node.loops:
+            reached.append(node)
+        child = node.children.get(segment)
+        if child is not None:
+            reached.append(child)
+        if node.any is not None:
+            reached.append(node.any)
+        for glob, child in node.globs:
+            if glob.match(segment):
+                reached.append(child)
+    return closure(reached)
+
+
+def closure(nodes: Iterable[PatternNode]) -> tuple:
+    """
+    Adds the ** nodes that match no key to the reached nodes
+    """
+    closed = []
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if node not in closed:
+            closed.append(node)
+            if node.deep is not None:
+                pending.append(node.deep)
+    return tuple(closed)
+
+
+class PathFilter:
+    """
+    Include and exclude patterns compiled once into tries and matched segment by segment as the values are walked,
+    so an excluded branch, or a branch no include pattern can reach, is skipped before its values are looked at.
+
+    Patterns are dotted paths as compare reports them, list positions included.
+    A * segment matches any one key, ** any number of keys, and segments like 'tmp_*' are matched as globs.
+    A difference is reported when its path, or one of its parents, matches an include pattern
+    or leads to one, and neither matches an exclude pattern
+    """
+
+    def __init__(self, include: Optional[Iterable[str]], exclude: Optional[Iterable[str]]):
+        self._include = _compile(include)
+        self._exclude = _compile(exclude)
+
+    @classmethod
+    def build(cls, include: Optional[Iterable[str]], exclude: Optional[Iterable[str]]) -> Optional['PathFilter']:
+        if not include and not exclude:
+            return None
+        return cls(include, exclude)
+
+    @property
+    def root(self) -> Optional[State]:
+        """
+        The state of the walk at the root values
+        """
+        included = self._include is None
+        includes = () if included else closure((self._include,))
+        excludes = () if self._exclude is None else closure((self._exclude,))
+        if _matched(includes):
+            included, includes = True, ()
+        if _matched(excludes):
+            return None
+        return included, includes, excludes
+
+    def step(self, state: State, key: Any) -> Optional[State]:
+        """
+        Returns the state of the walk at a child key, or None when the child is skipped
+        """
+        included, includes, excludes = state
+        if not includes and not excludes:
+            return state
+        segment = key if type(key) is str else str(key)
+        if excludes:
+            excludes = advance(excludes, segment)
+            if _matched(excludes):
+                return None
+        if not included:
+            includes = advance(includes, segment)
+            if _matched(includes):
+                included, includes = True, ()
+            elif not includes:
+                return None
+        return included, includes, excludes
+
+    def state_of(self, segments: Tuple) -> Optional[State]:
+        """
+        Returns the state of the walk at a path, or None when the path is skipped
+        """
+        state = self.root
+        for key in segments:
+            if state is None:
+                return None
+            state = self.step(state, key)
+        return state
+
+
+def _compile(patterns: Optional[Iterable[str]]) -> Optional[PatternNode]:
+    if not patterns:
+        return None
+    root = PatternNode()
+    for pattern in patterns:
+        root.add(pattern)
+    return root
+
+
+def _matched(nodes: tuple) -> bool:
+    return any(node.value for node in nodes)
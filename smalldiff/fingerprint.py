@@ -0,0 +1,120 @@
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Optional
+
+from smalldiff.normalizer import UnorderedList
+
+DIGEST_SIZE = 16
+
+
+class Snapshot:
+    """
+    A normalized object with a Merkle style fingerprint of every container in it.
+    The fingerprint of a container is a blake2b digest of its children written as literals,
+    so two subtrees with equal fingerprints are equal and can be skipped without being walked.
+    The fingerprints are computed on first use.
+
+    NaN and the values that are not json values are encoded by their identity,
+    so the fingerprints of snapshots taken in different processes are not to be compared.
+    """
+    __slots__ = ('type', 'tree', '_fingerprints', '_cache')
+
+    def __init__(self, tree: Any, source_type: type = None):
+        self.type = source_type or type(tree)
+        self.tree = tree
+        self._fingerprints = None
+        self._cache = {}
+
+    @property
+    def digest(self) -> str:
+        """
+        The fingerprint of the whole object
+        """
+        if isinstance(self.tree, (dict, list)):
+            return self.fingerprint(self.tree)
+        return _hexdigest(_literal(self.tree))
+
+    def fingerprint(self, node: Any) -> Optional[str]:
+        """
+        Returns the fingerprint of a container of the tree,
+        or None for anything that is not one
+        """
+        if self._fingerprints is None:
+            self._fingerprints = fingerprint_tree(self.tree)
+        return self._fingerprints.get(id(node))
+
+    def cached(self, node: Any, key: Any, build: Callable[[], Any]) -> Any:
+        """
+        Returns the data derived from a container of the tree under the given key,
+        building it on the first call only
+        """
+        cache_key = (id(node), key)
+        entry = self._cache.get(cache_key)
+        # the container is kept with its data, so that its id cannot be taken by another object
+        if entry is None or entry[0] is not node:
+            entry = self._cache[cache_key] = (node, build())
+        return entry[1]
+
+
+def fingerprint_tree(tree: Any) -> Dict[int, str]:
+    """
+    Fingerprints every container of a normalized tree, keyed by its id.
+    The children are fingerprinted before their parent, walking the tree with an explicit stack.
+    Mappings and unordered lists are fingerprinted regardless of the order of their items,
+    their items are sorted before they are hashed
+    """
+    fingerprints = {}
+    if not isinstance(tree, (dict, list)):
+        return fingerprints
+
+    def literal(value: Any) -> str:
+        write = _WRITERS.get(type(value))
+        if write is not None:
+            return write(value)
+        if isinstance(value, (dict, list)):
+            return fingerprints[id(value)]
+        return _literal(value)
+
+    stack = [(tree, False)]
+    while stack:
+        node, ready = stack.pop()
+        if ready:
+            if isinstance(node, dict):
+                text = "{" + ",".join(sorted([f"{literal(key)}:{literal(val)}" for key, val in node.items()])) + "}"
+            elif isinstance(node, UnorderedList):
+                text = "(" + ",".join(sorted([literal(item) for item in node])) + ")"
+            else:
+                text = "[" + ",".join([literal(item) for item in node]) + "]"
+            fingerprints[id(node)] = _hexdigest(text)
+            continue
+
+        stack.append((node, True))
+        for child in node.values() if isinstance(node, dict) else node:
+            if isinstance(child, (dict, list)):
+                stack.append((child, False))
+    return fingerprints
+
+
+def _hexdigest(text: str) -> str:
+    # the fingerprints of the containers are written as #<digest> in the text of their parent
+    return "#" + blake2b(text.encode("utf-8", "surrogatepass"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def _literal(value: Any) -> str:
+    """
+    Writes a scalar so that no two different values, of the same type or not, are written the same way
+    """
+    write = _WRITERS.get(type(value))
+    if write is not None:
+        return write(value)
+    # other values may not be equal to what they look like, so they are never taken for another value
+    return f"<{id(value)}>"
+
+
+def _float_literal(value: float) -> str:
+    # NaN is not equal to itself, so it is never taken for another value
+    return repr(value) if value == value else f"<{id(value)}>"
+
+
+# The way each json scalar is written: the repr of strings, booleans, None and floats tells apart
+# every value of them from every other, and hex has no limit on the digits of an integer, unlike repr
+_WRITERS = {str: repr, bool: repr, type(None): repr, float: _float_literal, int: hex}
@@ -0,0 +1,155 @@
+import heapq
+import json
+import re
+import tempfile
+from contextlib import ExitStack
+from itertools import zip_longest
+from json.encoder import encode_basestring
+from typing import Any, Iterator, List, Optional, Pattern, TextIO, Tuple
+
+from smalldiff.normalizer import MISSING
+from smalldiff.stream import scan_once
+from smalldiff.walker import DiffWalker, ADDED, REMOVED
+
+# Records of a file kept in memory before they are sorted and spilled to a temporary file
+BUFFER_SIZE = 100000
+
+
+def pair_by_line(expected_path: str, actual_path: str) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Pairs the lines of two JSON Lines files by their line numbers, counted from 1.
+    A blank line, or a line past the end of a file, has no record
+    """
+    with open(expected_path, encoding='utf-8') as expected, open(actual_path, encoding='utf-8') as actual:
+        for number, (expected_line, actual_line) in enumerate(zip_longest(expected, actual), 1):
+            expected_line = expected_line.strip() if expected_line else None
+            actual_line = actual_line.strip() if actual_line else None
+            if expected_line or actual_line:
+                yield number, expected_line or None, actual_line or None
+
+
+def pair_by_key(
+        expected_path: str,
+        actual_path: str,
+        key: str,
+        buffer_size: int = BUFFER_SIZE
+) -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+    """
+    Pairs the records of two JSON Lines files by the value of their key field,
+    in the order of the JSON text of the keys.
+    Both files are sorted by key in runs of buffer_size records, the runs that do not fit in memory
+    are spilled to temporary files, and the sorted files are merged and joined side by side
+    """
+    with ExitStack() as files:
+        expected = _sorted_records(expected_path, key, buffer_size, files)
+        actual = _sorted_records(actual_path, key, buffer_size, files)
+        expected_record = next(expected, None)
+        actual_record = next(actual, None)
+        while expected_record is not None or actual_record is not None:
+            if actual_record is None or (expected_record is not None and expected_record[0] < actual_record[0]):
+                yield _key_value(expected_record[0]), expected_record[1], None
+                expected_record = next(expected, None)
+            elif expected_record is None or actual_record[0] < expected_record[0]:
+                yield _key_value(actual_record[0]), None, actual_record[1]
+                actual_record = next(actual, None)
+            else:
+                yield _key_value(expected_record[0]), expected_record[1], actual_record[1]
+                expected_record = next(expected, None)
+                actual_record = next(actual, None)
+
+
+def record_differences(
+        pairs: Iterator[Tuple[Any, Optional[str], Optional[str]]],
+        walker: DiffWalker
+) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+    """
+    Compares paired lines and yields their differences under the key of each pair.
+    Identical lines are skipped without being decoded, a missing record is reported whole
+    unless the walker filters it out
+    """
+    loads = json.loads
+    for segment, expected_line, actual_line in pairs:
+        if expected_line == actual_line:
+            continue
+        if (expected_line is None or actual_line is None) and not walker.includes((segment,)):
+            continue
+        if expected_line is None:
+            yield (segment,), None, loads(actual_line), ADDED
+        elif actual_line is None:
+            yield (segment,), loads(expected_line), None, REMOVED
+        else:
+            expected, actual = loads(expected_line), loads(actual_line)
+            if expected != actual:
+                yield from walker.walk(expected, actual, (segment,))
+
+
+def _sorted_records(path: str, key: str, buffer_size: int, files: ExitStack) -> Iterator[Tuple[str, str]]:
+    """
+    Returns the (key, line) records of a file in the order of their keys,
+    the keys encoded as JSON text so that keys of any type are ordered and spilled alike
+    """
+    runs = []
+    buffer = []
+    # the key of most records is their first field, its value can be scanned without decoding the rest
+    first_field = re.compile(r'\{\s*%s\s*:\s*' % re.escape(json.dumps(key)))
+    with open(path, encoding='utf-8') as lines:
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            buffer.append((_record_key(line, key, first_field, path, number), line))
+            if len(buffer) >= buffer_size:
+                runs.append(_spill(buffer, files))
+                buffer = []
+    buffer.sort()
+    return _unique(heapq.merge(*(_read_run(run) for run in runs), iter(buffer)), key, path)
+
+
+def _record_key(line: str, key: str, first_field: Pattern, path: str, number: int) -> str:
+    value = MISSING
+    match = first_field.match(line)
+    if match and line[match.end():match.end() + 1] not in '{[':
+        try:
+            value = scan_once(line, match.end())[0]
+        except StopIteration:
+            pass
+    if value is MISSING:
+        record = json.loads(line)
+        if not isinstance(record, dict) or key not in record:
+            raise ValueError(f"Line {number} of '{path}' has no '{key}' field to be matched by")
+        value = record[key]
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"The '{key}' field of '{path}' records must be a primitive value")
+    if type(value) is str:
+        return encode_basestring(value)
+    if type(value) is int:
+        return int.__repr__(value)
+    return json.dumps(value)
+
+
+def _key_value(key: str) -> Any:
+    return json.loads(key)
+
+
+def _spill(buffer: List[Tuple[str, str]], files: ExitStack) -> TextIO:
+    buffer.sort()
+    run = files.enter_context(tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n'))
+    # the keys are JSON, they hold no tab nor newline
+    run.writelines(f"{key}\t{line}\n" for key, line in buffer)
+    run.seek(0)
+    return run
+
+
+def _read_run(run: TextIO) -> Iterator[Tuple[str, str]]:
+    for entry in run:
+        key, line = entry.rstrip('\n').split('\t', 1)
+        yield key, line
+
+
+def _unique(records: Iterator[Tuple[str, str]], key: str, path: str) -> Iterator[Tuple[str, str]]:
+    previous = None
+    for record in records:
+        if record[0] == previous:
+            raise ValueError(f"Duplicate '{key}' {_key_value(previous)!r} in '{path}'")
+        previous = record[0]
+        yield record
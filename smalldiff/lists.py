@@ -0,0 +1,165 @@
+from typing import Any, Hashable, List, Sequence, Tuple
+
+EQUAL = 'equal'
+REPLACE = 'replace'
+DELETE = 'delete'
+INSERT = 'insert'
+
+# The order of the kinds of frozen values, values of different kinds are not comparable to each other
+_RANKS = {type(None): 0, bool: 1, int: 2, float: 2, str: 3, tuple: 4, frozenset: 5}
+
+# Edit distance after which a region is no longer aligned
+# and its items are paired by position instead
+MAX_EDIT_COST = 512
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Converts a normalized value into a hashable one,
+    two values freeze to equal keys when they compare equal.
+    The containers are frozen after their items with an explicit stack, so deeply nested values do not recurse
+    """
+    if not isinstance(value, (dict, list)):
+        return value
+    frozen = []
+    stack = [(value, False)]
+    while stack:
+        node, visited = stack.pop()
+        if visited:
+            start = len(frozen) - len(node)
+            items = frozen[start:]
+            del frozen[start:]
+            frozen.append(frozenset(zip(node, items)) if isinstance(node, dict) else tuple(items))
+        elif not isinstance(node, (dict, list)):
+            frozen.append(node)
+        else:
+            children = node.values() if isinstance(node, dict) else node
+            if any(isinstance(child, (dict, list)) for child in children):
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(list(children)))
+            else:
+                frozen.append(frozenset(node.items()) if isinstance(node, dict) else tuple(node))
+    return frozen[0]
+
+
+def frozen_order(key: Hashable) -> tuple:
+    """
+    Returns the sort key of a frozen value, which orders the frozen values the same way whatever their
+    iteration order, so the items of a set can be put in an order that does not depend on the hash seed
+    """
+    rank = _RANKS.get(type(key), 6)
+    if rank == 4:
+        return rank, tuple(frozen_order(item) for item in key)
+    if rank == 5:
+        return rank, tuple(sorted(frozen_order(item) for item in key))
+    if rank == 6:
+        return rank, repr(key)
+    return rank, key
+
+
+def align(expected: Sequence, actual: Sequence) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Aligns two sequences of hashable items with the Myers diff algorithm,
+    in linear space, and returns difflib style opcodes
+    (tag, expected_start, expected_end, actual_start, actual_end).
+    """
+    matches = []
+    regions = [(0, len(expected), 0, len(actual))]
+    while regions:
+        e_lo, e_hi, a_lo, a_hi = regions.pop()
+
+        # the common prefix and suffix are matched right away
+        while e_lo < e_hi and a_lo < a_hi and expected[e_lo] == actual[a_lo]:
+            matches.append((e_lo, a_lo, 1))
+            e_lo += 1
+            a_lo += 1
+        while e_lo < e_hi and a_lo < a_hi and expected[e_hi - 1] == actual[a_hi - 1]:
+            e_hi -= 1
+            a_hi -= 1
+            matches.append((e_hi, a_hi, 1))
+        if e_lo == e_hi or a_lo == a_hi:
+            continue
+
+        snake = _middle_snake(expected, e_lo, e_hi, actual, a_lo, a_hi)
+        if snake is None:
+            continue
+        x_start, y_start, x_end, y_end = snake
+        if x_end > x_start:
+            matches.append((x_start, y_start, x_end - x_start))
+        regions.append((x_end, e_hi, y_end, a_hi))
+        regions.append((e_lo, x_start, a_lo, y_start))
+
+    return _opcodes(sorted(matches), len(expected), len(actual))
+
+
+def _middle_snake(
+        expected: Sequence,
+        e_lo: int,
+        e_hi: int,
+        actual: Sequence,
+        a_lo: int,
+        a_hi: int
+) -> Tuple[int, int, int, int]:
+    """
+    Finds the middle snake of the shortest edit script between two regions,
+    searching forwards and backwards at once.
+    Returns None when the edit distance exceeds MAX_EDIT_COST,
+    the region is then left unmatched.
+    """
+    n = e_hi - e_lo
+    m = a_hi - a_lo
+    delta = n - m
+    odd = delta % 2 == 1
+    offset = n + m + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(min((n + m + 1) // 2, MAX_EDIT_COST) + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and expected[e_lo + x] == actual[a_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1) and x + backward[offset + delta - k] >= n:
+                return e_lo + x_start, a_lo + y_start, e_lo + x, a_lo + y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and expected[e_hi - x - 1] == actual[a_hi - y - 1]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return e_hi - x, a_hi - y, e_hi - x_start, a_hi - y_start
+    return None
+
+
+def _opcodes(matches: List[Tuple[int, int, int]], n: int, m: int) -> List[Tuple[str, int, int, int, int]]:
+    opcodes = []
+    i = j = 0
+    for e_start, a_start, size in matches + [(n, m, 0)]:
+        if i < e_start and j < a_start:
+            opcodes.append((REPLACE, i, e_start, j, a_start))
+        elif i < e_start:
+            opcodes.append((DELETE, i, e_start, j, a_start))
+        elif j < a_start:
+            opcodes.append((INSERT, i, e_start, j, a_start))
+        if size:
+            if opcodes and opcodes[-1][0] == EQUAL and opcodes[-1][2] == e_start:
+                _, e_from, _, a_from, _ = opcodes.pop()
+                opcodes.append((EQUAL, e_from, e_start + size, a_from, a_start + size))
+            else:
+                opcodes.append((EQUAL, e_start, e_start + size, a_start, a_start + size))
+        i, j = e_start + size, a_start + size
+    return opcodes
@@ -1,25 +1,55 @@
-import json
-from typing import Any, Type, Union, Dict, List
+import sys
+from contextlib import closing
+from functools import partial
+from itertools import chain, islice
+from typing import Any, Callable, Type, Union, Dict, List, Optional, Tuple, Iterator, Iterable
 
 from pydantic.main import BaseModel
 
-from smalldiff.encoder import ModelEncoder
+from smalldiff.comparators import Comparators
+from smalldiff.encoder import ModelEncoder, PYDANTIC_V2
+from smalldiff.fingerprint import Snapshot
+from smalldiff.jsonl import BUFFER_SIZE, pair_by_key, pair_by_line, record_differences
+from smalldiff.normalizer import Normalizer
+from smalldiff.numbers import is_close
+from smalldiff.patch import apply_patch, make_patch
+from smalldiff.parallel import parallel_map, PARALLEL_THRESHOLD, PARTITIONS_PER_WORKER
+from smalldiff.reporters import Reporter, JsonReporter
+from smalldiff.result import DiffResult
+from smalldiff.stream import JsonEvents, read_text, stream_differences
+from smalldiff.walker import DiffWalker, WalkOptions, ALIGN, CHANGED, LIST_MODES, natively_equal, walk_partitions
+
+__all__ = ['SmallDiff', 'Baseline', 'DiffResult', 'Snapshot']
 
 
 class SmallDiff:
+    _comparators = Comparators()
 
     @classmethod
     def is_equal(
             cls,
             expected: Any,
             actual: Any,
-            encoder: Type[ModelEncoder] = None
+            encoder: Type[ModelEncoder] = None,
+            print_diff: bool = False,
+            fingerprints: bool = False,
+            **options
     ) -> bool:
         """
         returns True if the difference is None,
-        can be used for Testing object equality
+        can be used for Testing object equality.
+        Stops at the first difference without building the diff,
+        unless print_diff is set. Takes the options of compare
         """
-        return not cls.compare(expected, actual, print_diff=True, encoder=encoder)
+        if print_diff:
+            return not cls.compare(
+                expected, actual, print_diff=True, encoder=encoder, fingerprints=fingerprints, **options
+            )
+
+        differences = cls.__differences(
+            expected, actual, encoder, fingerprints, cls.__options(options), normalized=False
+        )
+        return next(differences, None) is None
 
     @classmethod
     def compare(
@@ -27,189 +57,471 @@ class SmallDiff:
             expected: Union[Type, Dict],
             actual: Union[Type, Dict],
             print_diff: bool = False,
-            encoder: Type[ModelEncoder] = None
-    ) -> dict:
+            encoder: Type[ModelEncoder] = None,
+            max_diffs: int = None,
+            fingerprints: bool = False,
+            workers: int = None,
+            parallel_threshold: int = PARALLEL_THRESHOLD,
+            compact: bool = False,
+            **options
+    ) -> Union[dict, DiffResult]:
         """
         Takes to objects and converts into a dictionary.
-        Then check the equality between dictionaries
+        Then check the equality between dictionaries.
+        If max_diffs is given, stops after finding that many differences.
+        The options of the walk, such as list_mode, list_keys, unordered, rel_tol, abs_tol, tolerances,
+        include, exclude and comparators, are the keyword arguments of WalkOptions, see there.
+        With fingerprints, or when both sides are snapshots, the identical branches are skipped by their fingerprints.
+        Fingerprinting costs more than a walk, so fingerprints only pay off with snapshots reused across comparisons.
+        With workers, objects of at least parallel_threshold values are split at their top level
+        and the parts are compared across that many worker processes.
+        Lists of numbers, numpy arrays and pandas frames are compared in one batched pass.
+        Snapshots hold normalized values, so with snapshots or fingerprints only the type comparators
+        of json types apply, the comparators of other types raise a ValueError.
+        With compact, the differences are returned as a DiffResult instead of a dict
         """
-        if expected == actual:
-            return {}
-
-        cls._validate_types(expected, actual)
-
-        if cls._is_primitive(expected):
-            diff = {"expected": expected, "actual": actual}
-        else:
-            diff = cls._compare_collections(expected, actual, encoder)
+        differences = cls.__differences(
+            expected, actual, encoder, fingerprints, cls.__options(options),
+            workers=workers, parallel_threshold=parallel_threshold
+        )
+        diff = cls.__collect(differences, max_diffs, compact)
 
         if print_diff:
-            cls.__print_diff(diff)
+            cls.__print_diff(diff.to_dict() if compact else diff)
 
         return diff
 
     @classmethod
-    def _validate_types(cls, expected: Any, actual: Any) -> None:
-        if type(expected) != type(actual):
-            raise TypeError("Expected and actual data types must be the same")
+    def iter_diff(
+            cls,
+            expected: Any,
+            actual: Any,
+            encoder: Type[ModelEncoder] = None,
+            fingerprints: bool = False,
+            workers: int = None,
+            parallel_threshold: int = PARALLEL_THRESHOLD,
+            **options
+    ) -> Iterator[Tuple[str, Any, Any]]:
+        """
+        Yields the differences one by one as (path, expected, actual) tuples,
+        in the same order compare reports them, with the same options.
+        Nothing is accumulated, so the differences can be streamed
+        and the iteration can be stopped at any point.
+        The difference between two primitives is yielded with an empty path
+        """
+        differences = cls.__differences(
+            expected, actual, encoder, fingerprints, cls.__options(options),
+            workers=workers, parallel_threshold=parallel_threshold
+        )
+        return (
+            (DiffWalker.join_path(segments), expected_val, actual_val)
+            for segments, expected_val, actual_val, _ in differences
+        )
 
     @classmethod
-    def _is_primitive(cls, value) -> bool:
-        return isinstance(value, (bool, str, int, float, complex, bytes, bytearray, type(None)))
+    def report(
+            cls,
+            expected: Any,
+            actual: Any,
+            reporter: Reporter = None,
+            encoder: Type[ModelEncoder] = None,
+            max_diffs: int = None,
+            fingerprints: bool = False,
+            **options
+    ) -> int:
+        """
+        Writes the differences to a reporter as they are found, nothing is accumulated,
+        and returns the number of differences. Takes the options of compare.
+        The reporter defaults to a JsonReporter writing the diff of compare to sys.stdout
+        """
+        differences = cls.__differences(expected, actual, encoder, fingerprints, cls.__options(options))
+        return (reporter or JsonReporter()).report(
+            (DiffWalker.join_path(segments) if segments else None, expected_val, actual_val, kind)
+            for segments, expected_val, actual_val, kind in islice(differences, max_diffs)
+        )
 
     @classmethod
-    def _is_collection(cls, value) -> bool:
-        return isinstance(value, (list, tuple, set, frozenset, ))
+    def compare_files(
+            cls,
+            expected_path: str,
+            actual_path: str,
+            print_diff: bool = False,
+            max_diffs: int = None,
+            compact: bool = False,
+            **options
+    ) -> Union[dict, DiffResult]:
+        """
+        Compares two JSON files the same way compare compares their loaded documents, with the same options,
+        reading both of them side by side as a stream, so they are never loaded as a whole
+        """
+        walker = cls.__options(options).walker(Normalizer())
+        with closing(read_text(expected_path)) as expected_text, closing(read_text(actual_path)) as actual_text:
+            differences = stream_differences(
+                iter(JsonEvents(expected_text, expected_path)),
+                iter(JsonEvents(actual_text, actual_path)),
+                walker
+            )
+            diff = cls.__collect(differences, max_diffs, compact)
 
+        if print_diff:
+            cls.__print_diff(diff.to_dict() if compact else diff)
 
+        return diff
 
     @classmethod
-    def _compare_collections(
+    def compare_jsonl(
             cls,
-            expected: Union[Type, Dict, List],
-            actual: Union[Type, Dict, List],
-            encoder: Type[ModelEncoder]
-    ) -> dict:
-        if cls._is_collection(expected):
-            return cls.__compare_list(expected, actual, encoder)
-        return cls.__compare_dict(expected, actual, encoder)
+            expected_path: str,
+            actual_path: str,
+            key: str = None,
+            buffer_size: int = BUFFER_SIZE,
+            **options
+    ) -> Iterator[Tuple[str, Any, Any]]:
+        """
+        Compares two JSON Lines files record by record and yields the differences
+        as (path, expected, actual) tuples, the path prefixed with the line number of the record,
+        or with the value of its key field if a key is given.
+        A record that only one file has is yielded whole, with None on the other side.
+        Takes the options of compare: the field paths of list_keys, unordered and tolerances start at each record,
+        the path patterns of include, exclude and comparators match the yielded paths, prefix included.
+
+        Records matched by key come in the order of the keys,
+        the files are sorted in runs of buffer_size records spilled to temporary files,
+        so they do not need to fit in memory
+        """
+        walker = cls.__options(options).walker(Normalizer())
+        if key is None:
+            pairs = pair_by_line(expected_path, actual_path)
+        else:
+            pairs = pair_by_key(expected_path, actual_path, key, buffer_size)
+        return (
+            (DiffWalker.join_path(segments), expected_val, actual_val)
+            for segments, expected_val, actual_val, _ in record_differences(pairs, walker)
+        )
 
     @classmethod
-    def __compare_list(
+    def compare_many(
             cls,
-            expected_list: Union[Type, List],
-            actual_list: Union[Type, List],
-            encoder: Type[ModelEncoder] = None
-    ) -> dict:
-        return cls.__list_diff(expected_list, actual_list, encoder=encoder)
+            pairs: Iterable[Tuple[Any, Any]],
+            workers: int = None,
+            chunksize: int = 64,
+            ordered: bool = True,
+            summary: bool = False,
+            encoder: Type[ModelEncoder] = None,
+            max_diffs: int = None,
+            compact: bool = False,
+            **options
+    ) -> Iterator[Tuple[int, Union[dict, DiffResult, int]]]:
+        """
+        Compares many (expected, actual) pairs across a pool of worker processes
+        and yields an (index, diff) tuple for every pair,
+        in the order of the pairs, or as they complete if ordered is False.
+        The pairs are sent in chunks of chunksize as they are, each worker normalizes its own,
+        so they must be picklable. With summary, the number of differences of a pair
+        is returned instead of its diff, with compact its differences as a DiffResult.
+        The other options are the ones of compare, the comparators are sent to the workers
+        along with the pairs, so they must be picklable too.
+        workers defaults to the number of CPUs, with workers=1 the pairs are compared in this process
+        """
+        # the options are validated here, before any pair is sent to the workers
+        cls.__options(options)
+        return parallel_map(
+            partial(_compare_pairs, summary, max_diffs, compact, dict(options, encoder=encoder)),
+            pairs, workers, chunksize, ordered
+        )
+
+    @classmethod
+    def register_comparator(cls, key: Union[str, type], comparator: Callable[[Any, Any], bool]) -> None:
+        """
+        Registers a function telling whether two values are equal, for the values at the field paths
+        matching a pattern, or for the values of a type, in every comparison.
+        The values it tells equal are not reported nor walked, see Comparators.
+        A subclass registers its comparators on top of the ones of its parent, leaving the parent as it is
+        """
+        if '_comparators' in cls.__dict__:
+            cls._comparators.register(key, comparator)
+        else:
+            cls._comparators = cls._comparators.merged({key: comparator})
 
     @classmethod
-    def __compare_dict(
+    def to_patch(
             cls,
-            expected: Union[Type, Any],
-            actual: Union[Type, Any],
-            encoder: Type[ModelEncoder] = None
-    ) -> dict:
-        return cls.__dict_diff(
-            expected=cls.__to_dict(expected, encoder),
-            actual=cls.__to_dict(actual, encoder),
-            encoder=encoder
+            expected: Any,
+            actual: Any,
+            encoder: Type[ModelEncoder] = None,
+            list_mode: str = ALIGN
+    ) -> List[dict]:
+        """
+        Returns the JSON Patch, RFC 6902, operations that turn the expected object into the actual one,
+        both converted the same way compare converts them.
+        Lists are aligned first so that inserted and removed items are added and removed,
+        with list_mode='index' their items are patched position by position
+        """
+        if list_mode not in LIST_MODES:
+            raise ValueError(f"list_mode must be one of {', '.join(LIST_MODES)}, not {list_mode!r}")
+        normalizer = Normalizer(encoder)
+        return make_patch(
+            normalizer.normalize(cls.__root(expected, encoder)),
+            normalizer.normalize(cls.__root(actual, encoder)),
+            align_lists=list_mode == ALIGN
         )
 
     @classmethod
-    def __to_dict(cls,
-                  schema: Any,
-                  encoder: Type[ModelEncoder] = None) -> dict:
-        if encoder:
-            return json.loads(json.dumps(schema, cls=encoder, indent=4))
-        if isinstance(schema, BaseModel):
-            return json.loads(schema.json())
-        if isinstance(schema, Exception):
-            return vars(schema)
-        return json.loads(json.dumps(schema, cls=ModelEncoder, indent=4))
+    def apply_patch(cls, doc: Any, patch: List[dict]) -> Any:
+        """
+        Applies JSON Patch operations to a json document in place and returns it,
+        the root of the document is replaced by a new value when a patch replaces it.
+        Raises ValueError on an invalid operation or a failed test operation
+        """
+        return apply_patch(doc, patch)
+
+    @classmethod
+    def snapshot(cls, obj: Any, encoder: Type[ModelEncoder] = None) -> Snapshot:
+        """
+        Normalizes an object once and fingerprints every container in it.
+        The snapshot can be given to compare, iter_diff and is_equal in place of the object,
+        and reused across the comparisons against it
+        """
+        if isinstance(obj, Snapshot):
+            return obj
+        normalizer = Normalizer(encoder)
+        return Snapshot(normalizer.normalize(cls.__root(obj, encoder), keep_sets=True), type(obj))
 
     @classmethod
-    def __dict_diff(cls, expected: dict, actual: dict, path="", encoder: Type[ModelEncoder] = None) -> dict:
+    def baseline(cls, expected: Any, encoder: Type[ModelEncoder] = None, **options) -> 'Baseline':
+        """
+        Prepares the expected side of many comparisons once, with the options of compare
+        it compares them with, see Baseline
         """
-        Compares two dictionaries recursively and returns a dictionary of their differences.
+        cls.__check_normalized(cls.__options(options).comparators)
+        return Baseline(cls.snapshot(expected, encoder), encoder, **options)
+
+    @classmethod
+    def _validate_types(cls, expected: Any, actual: Any) -> None:
+        if cls.__type_of(expected) != cls.__type_of(actual):
+            raise TypeError("Expected and actual data types must be the same")
+
+    @classmethod
+    def _is_primitive(cls, value) -> bool:
+        return isinstance(value, (bool, str, int, float, complex, bytes, bytearray, type(None)))
 
-        Args:
-        expected (dict): The list of expected values.
-        actual (dict): The list of actual values to compare against expected.
-        path (str): The current path in the object structure (used for nested objects).
+    @classmethod
+    def _is_collection(cls, value) -> bool:
+        return isinstance(value, (list, tuple, set, frozenset, ))
 
-        Returns:
-        dict: A dictionary containing the differences between the lists.
+    @classmethod
+    def __differences(
+            cls,
+            expected: Any,
+            actual: Any,
+            encoder: Type[ModelEncoder],
+            fingerprints: bool,
+            options: WalkOptions,
+            normalized: bool = True,
+            workers: int = None,
+            parallel_threshold: int = PARALLEL_THRESHOLD
+    ) -> Iterator[Tuple[Tuple, Any, Any, str]]:
         """
-        diff = {}
-        # First iterate the expected dictionary
-        for key, val in expected.items():
-            # 1. Check if the value of the key is a dictionary and if it exists in the actual dictionary
-            # 2. If both conditions are true, recursively call the dict_diff function with the nested dictionary
-            # 3. and update the diff dictionary with the returned values
-            if isinstance(val, dict) and key in actual and isinstance(actual[key], dict):
-                nested_diff = cls.__dict_diff(
-                    expected=val,
-                    actual=actual[key],
-                    path=f"{path}.{key}" if path else key,
-                    encoder=encoder
-                )
-                if nested_diff:
-                    diff.update(nested_diff)
-
-            elif isinstance(val, list) and key in actual and isinstance(actual[key], list):
-                list_diff = cls.__list_diff(
-                    expected=val,
-                    actual=actual[key],
-                    path=f"{path}.{key}" if path else key,
-                    encoder=encoder
-                )
-                if list_diff:
-                    diff.update(list_diff)
+        Validates the objects right away and returns an iterator over their (path, expected, actual, kind)
+        differences, with the paths as tuples of segments. A difference between the roots has an empty path
+        """
+        if fingerprints or (isinstance(expected, Snapshot) and isinstance(actual, Snapshot)):
+            if cls.__equal_roots(expected, actual):
+                return iter(())
+            cls._validate_types(expected, actual)
+            cls.__check_normalized(options.comparators)
+            expected = cls.snapshot(expected, encoder)
+            actual = cls.snapshot(actual, encoder)
+            if expected.digest == actual.digest:
+                return iter(())
+            walker = options.walker(Normalizer(encoder), snapshots=(expected, actual))
+            expected, actual = expected.tree, actual.tree
+        elif isinstance(expected, Snapshot) or isinstance(actual, Snapshot):
+            # fingerprinting the other side costs more than walking it, as it is used only once
+            if cls.__equal_roots(expected, actual):
+                return iter(())
+            cls._validate_types(expected, actual)
+            cls.__check_normalized(options.comparators)
+            snapshots = tuple(value if isinstance(value, Snapshot) else None for value in (expected, actual))
+            walker = options.walker(Normalizer(encoder), snapshots=snapshots)
+            expected, actual = (
+                value.tree if isinstance(value, Snapshot) else cls.__root(value, encoder)
+                for value in (expected, actual)
+            )
+        else:
+            if natively_equal(expected, actual):
+                return iter(())
 
-            # Check if the key is not present in the actual dictionary
-            # If true, add the key and its expected value to the diff dictionary
-            elif key not in actual:
-                diff[f"{path}.{key}" if path else key] = {"expected": val, "actual": None}
+            cls._validate_types(expected, actual)
 
-            # Check if the expected value of the key does not match the actual value of the key
-            # If true, add the key and its expected and actual values to the diff dictionary
-            elif val != actual[key]:
-                diff[f"{path}.{key}" if path else key] = {"expected": val, "actual": actual[key]}
+            if cls._is_primitive(expected) and options.comparators is None:
+                if is_close(expected, actual, options.rel_tol, options.abs_tol):
+                    return iter(())
+                return iter([((), expected, actual, CHANGED)])
+            walker = options.walker(Normalizer(encoder))
+            expected, actual = cls.__root(expected, encoder), cls.__root(actual, encoder)
 
-        # Check for keys in the actual dictionary that are not present in the expected dictionary
-        # If true, add the key and its actual value to the diff dictionary
-        for key, val in actual.items():
-            if key not in expected:
-                diff[f"{path}.{key}" if path else key] = {"expected": None, "actual": val}
+            if normalized and workers is not None and workers > 1:
+                partitions = walker.partitions(
+                    expected, actual, workers * PARTITIONS_PER_WORKER, parallel_threshold
+                )
+                if partitions is not None:
+                    results = parallel_map(partial(walk_partitions, encoder, options), partitions, workers)
+                    return chain.from_iterable(differences for _, differences in results)
 
-        return diff
+        if normalized:
+            return walker.walk(expected, actual)
+        return walker.differences(expected, actual)
 
     @classmethod
-    def __list_diff(cls, expected: list, actual: list, path="", encoder: Type[ModelEncoder] = None) -> dict:
+    def __options(cls, options: dict) -> WalkOptions:
         """
-        Compares two lists and returns a dictionary of their differences.
+        Reads the keyword options of an entry point, its comparators on top of the registered ones
         """
-        diff = {}
-        for i, (expected_val, actual_val) in enumerate(zip(expected, actual)):
-            if isinstance(expected_val, dict) and isinstance(actual_val, dict):
-                nested_diff = cls.__dict_diff(
-                    expected=expected_val, actual=actual_val, path=f"{path}.{i}" if path else str(i),
-                    encoder=encoder
-                )
-                if nested_diff:
-                    diff.update(nested_diff)
-            elif isinstance(expected_val, list) and isinstance(actual_val, list):
-                nested_diff = cls.__list_diff(
-                    expected=expected_val, actual=actual_val, path=f"{path}.{i}" if path else str(i), encoder=encoder
-                )
-                if nested_diff:
-                    diff.update(nested_diff)
-            else:
-                # converting to dict because there is a print function that supports only dictionary for printing
-                expected_dict = cls.__to_dict(expected_val, encoder)
-                actual_dict = cls.__to_dict(actual_val, encoder)
-                if expected_dict != actual_dict:
-                    diff[f"{path}.{i}" if path else str(i)] = {"expected": expected_dict, "actual": actual_dict}
+        return WalkOptions(cls._comparators, **options)
+
+    @classmethod
+    def __equal_roots(cls, expected: Any, actual: Any) -> bool:
+        """
+        Tells whether two roots of different types are equal all the same, i.e. 2.0 and 2,
+        the way the plain comparison finds them equal before it validates their types.
+        A snapshot is compared by its tree
+        """
+        return cls.__type_of(expected) != cls.__type_of(actual) and natively_equal(
+            expected.tree if isinstance(expected, Snapshot) else expected,
+            actual.tree if isinstance(actual, Snapshot) else actual
+        )
 
-        cls.__compare_remaining_list_items(expected, actual, diff, path)
+    @classmethod
+    def __check_normalized(cls, comparators: Optional[Comparators]) -> None:
+        """
+        Snapshots hold normalized values, so the type comparators of other types than json ones
+        would never apply to them: they are refused rather than silently left out
+        """
+        if comparators is not None and comparators.source_types:
+            names = ", ".join(sorted(source_type.__name__ for source_type in comparators.source_types))
+            raise ValueError(
+                f"Type comparators of {names} do not apply to the normalized values "
+                f"of snapshots, fingerprints and baselines"
+            )
 
+    @classmethod
+    def __collect(
+            cls,
+            differences: Iterator[Tuple[Tuple, Any, Any, str]],
+            max_diffs: Optional[int],
+            compact: bool = False
+    ) -> Union[dict, DiffResult]:
+        """
+        Builds the diff of compare, a difference between the roots is the whole diff
+        """
+        if compact:
+            return DiffResult.collect(differences, max_diffs)
+        diff = {}
+        for segments, expected_val, actual_val, _ in islice(differences, max_diffs):
+            if not segments:
+                return {"expected": expected_val, "actual": actual_val}
+            diff[DiffWalker.diff_key(segments)] = {"expected": expected_val, "actual": actual_val}
         return diff
 
     @classmethod
-    def __compare_remaining_list_items(cls, expected: list, actual: list, diff: dict, path: str):
+    def __root(cls, schema: Any, encoder: Type[ModelEncoder]) -> Any:
+        if not encoder and isinstance(schema, (BaseModel, Exception)):
+            return cls.__to_dict(schema)
+        return schema
 
-        # Check if actual has more items than expected
-        if len(actual) > len(expected):
-            for j in range(len(expected), len(actual)):
-                diff[f"{path}.{j}" if path else j] = {"expected": None, "actual": actual[j]}
+    @classmethod
+    def __type_of(cls, value: Any) -> type:
+        return value.type if isinstance(value, Snapshot) else type(value)
 
-        # Check if expected has more items than actual
-        if len(expected) > len(actual):
-            for j in range(len(actual), len(expected)):
-                diff[f"{path}.{j}" if path else j] = {"expected": expected[j], "actual": None}
+    @classmethod
+    def __to_dict(cls,
+                  schema: Any,
+                  encoder: Type[ModelEncoder] = None) -> dict:
+        if encoder:
+            return Normalizer(encoder).normalize(schema)
+        if isinstance(schema, BaseModel):
+            return cls.__model_to_dict(schema)
+        if isinstance(schema, Exception):
+            return vars(schema)
+        return Normalizer().normalize(schema)
+
+    @classmethod
+    def __model_to_dict(cls, schema: BaseModel) -> Any:
+        """
+        Produces the same structure as json.loads(schema.json())
+        """
+        if PYDANTIC_V2:
+            return schema.model_dump(mode='json')
+        data = schema.dict()
+        if schema.__custom_root_type__:
+            data = data['__root__']
+        return Normalizer(default=schema.__json_encoder__).normalize(data)
 
     @classmethod
     def __print_diff(cls, diff: dict):
+        """
+        Prints the diff the same way as json.dumps(diff, indent=2, cls=ModelEncoder),
+        written piece by piece instead of rendered into one string
+        """
         print(f"\n============================= expected vs actual ==============================")
-        print(json.dumps(diff, indent=2))
+        sys.stdout.writelines(ModelEncoder(indent=2).iterencode(diff))
+        sys.stdout.write("\n")
+
+
+def _compare_pairs(
+        summary: bool,
+        max_diffs: Optional[int],
+        compact: bool,
+        options: dict,
+        pairs: List[Tuple[Any, Any]]
+) -> List[Union[dict, DiffResult, int]]:
+    """
+    Compares a chunk of pairs in a worker process of SmallDiff.compare_many
+    """
+    if summary:
+        return [
+            sum(1 for _ in islice(SmallDiff.iter_diff(expected, actual, **options), max_diffs))
+            for expected, actual in pairs
+        ]
+    return [
+        SmallDiff.compare(expected, actual, max_diffs=max_diffs, compact=compact, **options)
+        for expected, actual in pairs
+    ]
+
+
+class Baseline:
+    """
+    The expected side of many comparisons, normalized and fingerprinted once.
+    The indexes of its keyed lists and the hashed items of its aligned and unordered lists
+    are built by the first comparison that needs them and kept for the next ones.
+    The actual side is walked as it is, or by its fingerprints when it is a snapshot as well.
+    Its records converted by the encoder are compared natively against the normalized ones of the baseline,
+    the same way compare compares two converted records, and are walked only when they differ.
+    The values of the baseline are normalized, as json values, so only the type comparators
+    of json types, such as str or float, apply to them. A comparator of another type, i.e. datetime,
+    raises a ValueError rather than being left out
+    """
+
+    def __init__(self, snapshot: Snapshot, encoder: Type[ModelEncoder] = None, **options):
+        self.snapshot = snapshot
+        self._encoder = encoder
+        self._options = options
+
+    def compare(
+            self,
+            actual: Any,
+            print_diff: bool = False,
+            max_diffs: int = None,
+            compact: bool = False
+    ) -> Union[dict, DiffResult]:
+        return SmallDiff.compare(
+            self.snapshot, actual, print_diff=print_diff, encoder=self._encoder, max_diffs=max_diffs,
+            compact=compact, **self._options
+        )
+
+    def is_equal(self, actual: Any, print_diff: bool = False) -> bool:
+        return SmallDiff.is_equal(self.snapshot, actual, encoder=self._encoder, print_diff=print_diff, **self._options)
+
+    def iter_diff(self, actual: Any) -> Iterator[Tuple[str, Any, Any]]:
+        return SmallDiff.iter_diff(self.snapshot, actual, encoder=self._encoder, **self._options)
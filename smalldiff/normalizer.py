@@ -0,0 +1,239 @@
+import dataclasses
+from json import JSONEncoder
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
+
+from smalldiff.arrays import is_array
+from smalldiff.encoder import ModelEncoder
+
+__all__ = ['Normalizer', 'UnorderedList']
+
+SCALAR = 'scalar'
+MAPPING = 'mapping'
+SEQUENCE = 'sequence'
+ARRAY = 'array'
+
+# the value of a missing key, field or item, told apart from a None value
+MISSING = object()
+# the field readers of record classes, resolved once per class
+_READERS: Dict[type, Optional[Callable[[Any], dict]]] = {}
+
+
+class UnorderedList(list):
+    """
+    The normalized items of a set, told apart from a list
+    so that they are still compared regardless of order
+    """
+
+
+class Normalizer:
+    """
+    Converts an object into the plain python structure that
+    json.loads(json.dumps(obj, cls=encoder)) would produce,
+    without building the intermediate JSON text.
+
+    Records the encoder cannot convert, the instances of classes with __slots__ and no __dict__,
+    i.e. slotted dataclasses and attrs classes, are converted into a dict of their fields.
+    The records with a __dict__ are converted by the encoder, from their __dict__.
+    """
+
+    def __init__(
+            self,
+            encoder: Type[JSONEncoder] = None,
+            default: Callable[[Any], Any] = None
+    ):
+        self._default = default or (encoder or ModelEncoder)().default
+        self._readers = {}
+
+    def normalize(self, obj: Any, keep_sets: bool = False) -> Any:
+        """
+        Converts the whole object, walking it with an explicit stack.
+        With keep_sets, sets are converted into an UnorderedList instead of a list.
+        """
+        markers = {}
+        kind, value, marks = self._enter(obj, markers, keep_sets)
+        if kind is SCALAR:
+            return value
+
+        root = self._container(kind, value)
+        stack = [(root, self._children(kind, value), marks)]
+        while stack:
+            target, children, marks = stack[-1]
+            for key, child in children:
+                kind, value, child_marks = self._enter(child, markers, keep_sets)
+                if kind is SCALAR:
+                    self._leave(child_marks, markers)
+                    item = value
+                else:
+                    item = self._container(kind, value)
+
+                if key is None:
+                    target.append(item)
+                else:
+                    target[key] = item
+
+                if kind is not SCALAR:
+                    stack.append((item, self._children(kind, value), child_marks))
+                    break
+            else:
+                stack.pop()
+                self._leave(marks, markers)
+        return root
+
+    def view(self, obj: Any) -> Tuple[str, Any]:
+        """
+        Converts only the top level of an object and returns it with its kind.
+        A MAPPING is a dict with normalized keys and raw values,
+        a SEQUENCE is a list, a tuple or a set of raw items,
+        a SCALAR is already normalized, an ARRAY is a numpy array or a pandas frame as it is.
+        Sets are kept as they are, so that they can be compared regardless of order.
+        The children are left as they are, to be normalized when they are reached.
+        """
+        while True:
+            if isinstance(obj, (str, int, float)) or obj is None:
+                return SCALAR, self._scalar(obj)
+            if isinstance(obj, (list, tuple, set, frozenset)):
+                return SEQUENCE, obj
+            if isinstance(obj, dict):
+                if all(type(key) is str for key in obj):
+                    return MAPPING, obj
+                return MAPPING, {self._normalize_key(key): val for key, val in obj.items()}
+            if is_array(obj):
+                return ARRAY, obj
+            obj = self.convert(obj)
+
+    def _enter(self, obj: Any, markers: dict, keep_sets: bool = False) -> Tuple[str, Any, list]:
+        """
+        Resolves an object through the encoder until a native value is reached,
+        marking everything on the way to detect circular references
+        """
+        marks = []
+        while True:
+            # the checks follow the order of the C json encoder,
+            # so subclasses of str, int and float (i.e. str/int Enums) are taken as native values
+            if isinstance(obj, (str, int, float)) or obj is None:
+                return SCALAR, self._scalar(obj), marks
+
+            marker = id(obj)
+            if marker in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker] = obj
+            marks.append(marker)
+
+            if isinstance(obj, (list, tuple)) or (keep_sets and isinstance(obj, (set, frozenset))):
+                return SEQUENCE, obj, marks
+            if isinstance(obj, dict):
+                return MAPPING, obj, marks
+            obj = self.convert(obj)
+
+    def convert(self, obj: Any) -> Any:
+        """
+        Converts an object that is not a native value one step through the encoder,
+        or through its fields if the encoder could not convert an instance of its class
+        """
+        reader = self._readers.get(type(obj))
+        if reader is not None:
+            return reader(obj)
+        try:
+            return self._default(obj)
+        except TypeError:
+            reader = record_reader(type(obj))
+            if reader is None:
+                raise
+            self._readers[type(obj)] = reader
+            return reader(obj)
+
+    @staticmethod
+    def _container(kind: str, value: Any) -> Any:
+        if kind is MAPPING:
+            return {}
+        return UnorderedList() if isinstance(value, (set, frozenset)) else []
+
+    @staticmethod
+    def _leave(marks: list, markers: dict) -> None:
+        for marker in marks:
+            del markers[marker]
+
+    def _children(self, kind: str, value: Any) -> Iterator[Tuple[Optional[str], Any]]:
+        if kind is SEQUENCE:
+            return ((None, item) for item in value)
+        return ((self._normalize_key(key), val) for key, val in value.items())
+
+    @staticmethod
+    def _scalar(obj: Any) -> Any:
+        if type(obj) in (str, int, float, bool) or obj is None:
+            return obj
+        if isinstance(obj, str):
+            return str.__str__(obj)
+        if isinstance(obj, int):
+            return int.__int__(obj)
+        return float.__float__(obj)
+
+    @staticmethod
+    def _normalize_key(key: Any) -> str:
+        if isinstance(key, str):
+            return key if type(key) is str else str.__str__(key)
+        if isinstance(key, float):
+            if key != key:
+                return 'NaN'
+            if key in (float('inf'), float('-inf')):
+                return 'Infinity' if key > 0 else '-Infinity'
+            return float.__repr__(key)
+        if key is True:
+            return 'true'
+        if key is False:
+            return 'false'
+        if key is None:
+            return 'null'
+        if isinstance(key, int):
+            return int.__repr__(key)
+        raise TypeError(f'keys must be str, int, float, bool or None, not {type(key).__name__}')
+
+
+def record_reader(cls: type) -> Optional[Callable[[Any], dict]]:
+    """
+    Returns a function reading the fields of an instance of a record class into a dict,
+    or None if the class is not one. The fields of attrs classes and dataclasses are theirs,
+    the fields of other classes are the __slots__ of the class and of its bases.
+    The fields are resolved once per class
+    """
+    if cls not in _READERS:
+        fields = _record_fields(cls)
+        _READERS[cls] = None if fields is None else _fields_reader(fields)
+    return _READERS[cls]
+
+
+def _record_fields(cls: type) -> Optional[Tuple[str, ...]]:
+    if hasattr(cls, '__attrs_attrs__'):
+        return tuple(attribute.name for attribute in cls.__attrs_attrs__)
+    if dataclasses.is_dataclass(cls):
+        return tuple(field.name for field in dataclasses.fields(cls))
+    fields = {}
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get('__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ('__dict__', '__weakref__'):
+                continue
+            if name.startswith('__') and not name.endswith('__'):
+                # private slots are stored under their mangled names, the same way they show in __dict__
+                name = f"_{base.__name__.lstrip('_')}{name}"
+            fields[name] = None
+    return tuple(fields) or None
+
+
+def _fields_reader(fields: Tuple[str, ...]) -> Callable[[Any], dict]:
+    if len(fields) == 1:
+        name = fields[0]
+        get = lambda obj: (getattr(obj, name),)
+    else:
+        get = attrgetter(*fields) if fields else lambda obj: ()
+
+    def read(obj: Any) -> dict:
+        try:
+            # the values are read and zipped with the field names in C
+            return dict(zip(fields, get(obj)))
+        except AttributeError:
+            # an unset slot has no value, it is left out the same way a missing key is
+            values = ((name, getattr(obj, name, MISSING)) for name in fields)
+            return {name: value for name, value in values if value is not MISSING}
+    return read
@@ -0,0 +1,98 @@
+import math
+from functools import lru_cache
+from itertools import compress, count
+from operator import ne
+from typing import Any, List, Optional
+
+from smalldiff.arrays import beyond_tolerance
+
+_NUMBERS = frozenset((int, float))
+# Lists shorter than this are compared in python, converting them into arrays costs more
+ARRAY_THRESHOLD = 256
+# Integers beyond this magnitude are not exact as floats
+_EXACT_FLOAT = 2 ** 53
+
+
+def is_close(expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> bool:
+    """
+    Tells whether two numbers are equal within rel_tol or abs_tol, the same way as math.isclose.
+    Booleans and other values are never close, they are equal or not
+    """
+    return type(expected) in _NUMBERS and type(actual) in _NUMBERS and _isclose(expected, actual, rel_tol, abs_tol)
+
+
+def check_tolerance(rel_tol: float, abs_tol: float) -> None:
+    """
+    Refuses negative tolerances the way math.isclose does, for the numbers compared without it too
+    """
+    if rel_tol < 0.0 or abs_tol < 0.0:
+        raise ValueError("tolerances must be non-negative")
+
+
+def numeric_mismatches(
+        expected: list,
+        actual: list,
+        rel_tol: float = 0.0,
+        abs_tol: float = 0.0
+) -> Optional[List[int]]:
+    """
+    Compares the items of two lists of numbers at the same positions in one batched pass,
+    and returns the positions of the items that differ, beyond the tolerance if one is given.
+    Only the positions both lists have are compared. Long lists are compared as numpy arrays
+    when numpy is installed. Returns None unless all the items are int or float numbers
+    """
+    if not _all_numbers(expected) or not _all_numbers(actual):
+        return None
+    length = min(len(expected), len(actual))
+    if len(expected) != length or len(actual) != length:
+        expected, actual = expected[:length], actual[:length]
+    if expected == actual:
+        return []
+    if not rel_tol and not abs_tol:
+        return list(compress(count(), map(ne, expected, actual)))
+
+    numpy = _numpy() if length >= ARRAY_THRESHOLD else None
+    if numpy is not None:
+        try:
+            expected_array = numpy.array(expected, dtype=float)
+            actual_array = numpy.array(actual, dtype=float)
+        except OverflowError:
+            # integers beyond the range of floats are compared in python
+            expected_array = actual_array = None
+        if expected_array is not None \
+                and not (abs(expected_array) >= _EXACT_FLOAT).any() and not (abs(actual_array) >= _EXACT_FLOAT).any():
+            with numpy.errstate(all='ignore'):
+                far = beyond_tolerance(numpy, expected_array, actual_array, rel_tol, abs_tol)
+            # infinities are far from each other as arrays, the equal ones are left out here
+            return [position for position in numpy.flatnonzero(far).tolist() if expected[position] != actual[position]]
+    return [
+        position
+        for position, expected_val, actual_val in zip(count(), expected, actual)
+        if expected_val != actual_val and not _isclose(expected_val, actual_val, rel_tol, abs_tol)
+    ]
+
+
+def _all_numbers(values: list) -> bool:
+    return all(map(_NUMBERS.__contains__, map(type, values)))
+
+
+def _isclose(expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> bool:
+    try:
+        if type(expected) is int and type(actual) is int:
+            # math.isclose would round large integers to floats
+            return abs(expected - actual) <= max(rel_tol * max(abs(expected), abs(actual)), abs_tol)
+        return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol)
+    except OverflowError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """
+    numpy if it is installed, imported on first use
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
@@ -0,0 +1,74 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
+
+# Number of values below which a single comparison is not split across processes
+PARALLEL_THRESHOLD = 100000
+# Partitions of a single comparison per worker, so that the uneven ones are balanced out
+PARTITIONS_PER_WORKER = 4
+
+
+def parallel_map(
+        function: Callable[[List[Any]], List[Any]],
+        items: Iterable[Any],
+        workers: int = None,
+        chunksize: int = 1,
+        ordered: bool = True
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Applies a function to chunks of items across a pool of worker processes
+    and yields an (index, result) tuple for every item,
+    in the order of the items or as their chunks complete.
+    The function takes a chunk of items and returns their results,
+    it must be picklable, i.e. a module level function or a partial of one.
+
+    The items are read lazily, at most two chunks per worker are in flight at a time.
+    With a single worker the chunks are processed in this process.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(items, chunksize)
+    if workers == 1:
+        for start, chunk in chunks:
+            yield from enumerate(function(chunk), start)
+        return
+
+    executor = ProcessPoolExecutor(workers)
+    starts = {}
+    queue = deque()
+
+    def collect(pending: int) -> Iterator[Tuple[int, Any]]:
+        while len(starts) > pending:
+            if ordered:
+                done = [queue.popleft()]
+            else:
+                done, _ = wait(starts, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from enumerate(future.result(), starts.pop(future))
+
+    try:
+        for start, chunk in chunks:
+            future = executor.submit(function, chunk)
+            starts[future] = start
+            if ordered:
+                queue.append(future)
+            yield from collect(2 * workers - 1)
+        yield from collect(0)
+    finally:
+        for future in starts:
+            future.cancel()
+        executor.shutdown()
+
+
+def _chunks(items: Iterable[Any], chunksize: int) -> Iterator[Tuple[int, List[Any]]]:
+    iterator = iter(items)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
@@ -0,0 +1,264 @@
+"""
+JSON Patch, RFC 6902: building the operations that turn one normalized value into another,
+and applying operations to a json document
+"""
+import json
+from copy import deepcopy
+from typing import Any, Iterator, List, Union
+
+from smalldiff.lists import align, freeze, EQUAL, REPLACE
+from smalldiff.walker import natively_equal
+
+ADD = 'add'
+REMOVE = 'remove'
+REPLACE_OP = 'replace'
+MOVE = 'move'
+COPY = 'copy'
+TEST = 'test'
+OPERATIONS = (ADD, REMOVE, REPLACE_OP, MOVE, COPY, TEST)
+_JSON_KINDS = ((bool, bool), ((int, float), float), (str, str), (dict, dict), (list, list))
+
+
+def make_patch(expected: Any, actual: Any, align_lists: bool = True) -> List[dict]:
+    """
+    Returns the operations that turn the expected value into the actual one, both normalized.
+    Mappings are patched key by key, lists are aligned first when align_lists is set,
+    so that inserted and removed items are added and removed rather than replaced,
+    otherwise their items are patched position by position.
+    Values are equal when they are the same json value, 1, 1.0 and True are patched into each other
+    """
+    patch = []
+    stack = [iter([(expected, actual, "")])]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, dict):
+                patch.append(item)
+                continue
+            expected_val, actual_val, pointer = item
+            if natively_equal(expected_val, actual_val) and _strictly_equal(expected_val, actual_val):
+                continue
+            if isinstance(expected_val, dict) and isinstance(actual_val, dict):
+                stack.append(_mapping_steps(expected_val, actual_val, pointer))
+                break
+            if isinstance(expected_val, list) and isinstance(actual_val, list):
+                steps = _aligned_steps if align_lists else _sequence_steps
+                stack.append(steps(expected_val, actual_val, pointer))
+                break
+            patch.append({"op": REPLACE_OP, "path": pointer, "value": actual_val})
+        else:
+            stack.pop()
+    return patch
+
+
+def apply_patch(doc: Any, patch: List[dict]) -> Any:
+    """
+    Applies the operations of a patch to a json document in place, one after the other,
+    and returns the document, which is a new value when the root itself is replaced.
+    Raises ValueError on an invalid operation or a failed test,
+    the operations before it are applied by then
+    """
+    for operation in patch:
+        doc = _apply(doc, operation)
+    return doc
+
+
+def escape(key: Any) -> str:
+    """
+    Converts a key into a JSON Pointer reference token,
+    keys that are not strings are converted the same way json converts the keys of a dict
+    """
+    if not isinstance(key, str):
+        key = json.dumps(key) if key is None or isinstance(key, (bool, int, float)) else str(key)
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _mapping_steps(expected: dict, actual: dict, pointer: str) -> Iterator[Union[dict, tuple]]:
+    for key, val in expected.items():
+        path = f"{pointer}/{escape(key)}"
+        if key in actual:
+            yield val, actual[key], path
+        else:
+            yield {"op": REMOVE, "path": path}
+    for key, val in actual.items():
+        if key not in expected:
+            yield {"op": ADD, "path": f"{pointer}/{escape(key)}", "value": val}
+
+
+def _sequence_steps(expected: list, actual: list, pointer: str) -> Iterator[Union[dict, tuple]]:
+    common = min(len(expected), len(actual))
+    for i in range(common):
+        yield expected[i], actual[i], f"{pointer}/{i}"
+    # removed from the end, so the positions of the items left do not shift
+    for i in range(len(expected) - 1, common - 1, -1):
+        yield {"op": REMOVE, "path": f"{pointer}/{i}"}
+    for j in range(common, len(actual)):
+        yield {"op": ADD, "path": f"{pointer}/{j}", "value": actual[j]}
+
+
+def _aligned_steps(expected: list, actual: list, pointer: str) -> Iterator[Union[dict, tuple]]:
+    """
+    Follows the alignment of the lists. By the time a region is reached,
+    the items before it are the actual ones, so the expected items of the region start at its actual start.
+    The items of an equal region are yielded too, they can still differ in their types
+    """
+    interned = {}
+    expected_ids = [interned.setdefault(freeze(item), len(interned)) for item in expected]
+    actual_ids = [interned.setdefault(freeze(item), len(interned)) for item in actual]
+    for tag, e_start, e_end, a_start, a_end in align(expected_ids, actual_ids):
+        if tag is EQUAL:
+            for offset in range(e_end - e_start):
+                yield expected[e_start + offset], actual[a_start + offset], f"{pointer}/{a_start + offset}"
+            continue
+        common = min(e_end - e_start, a_end - a_start) if tag is REPLACE else 0
+        for offset in range(common):
+            yield expected[e_start + offset], actual[a_start + offset], f"{pointer}/{a_start + offset}"
+        for _ in range(e_start + common, e_end):
+            yield {"op": REMOVE, "path": f"{pointer}/{a_start + common}"}
+        for j in range(a_start + common, a_end):
+            yield {"op": ADD, "path": f"{pointer}/{j}", "value": actual[j]}
+
+
+def _strictly_equal(expected: Any, actual: Any) -> bool:
+    """
+    Tells whether two values that compare equal are the same json value, of the same types all the way down
+    """
+    stack = [(expected, actual)]
+    while stack:
+        expected, actual = stack.pop()
+        if type(expected) is not type(actual):
+            return False
+        if isinstance(expected, dict):
+            stack.extend((val, actual[key]) for key, val in expected.items())
+        elif isinstance(expected, list):
+            stack.extend(zip(expected, actual))
+    return True
+
+
+def _json_equal(expected: Any, actual: Any) -> bool:
+    """
+    Tells whether two values are equal as json values, the way the test operation compares them:
+    numbers are equal by their value, so 1 and 1.0 are, but a boolean is no number, all the way down
+    """
+    stack = [(expected, actual)]
+    while stack:
+        expected, actual = stack.pop()
+        kind = _json_kind(expected)
+        if kind is not _json_kind(actual):
+            return False
+        if kind is dict:
+            if expected.keys() != actual.keys():
+                return False
+            stack.extend((val, actual[key]) for key, val in expected.items())
+        elif kind is list:
+            if len(expected) != len(actual):
+                return False
+            stack.extend(zip(expected, actual))
+        elif expected != actual:
+            return False
+    return True
+
+
+def _json_kind(value: Any) -> type:
+    # bool is checked before the numbers it subclasses, ints and floats are both json numbers
+    for types, kind in _JSON_KINDS:
+        if isinstance(value, types):
+            return kind
+    return type(value)
+
+
+def _apply(doc: Any, operation: dict) -> Any:
+    op = operation.get("op")
+    if op not in OPERATIONS:
+        raise ValueError(f"Invalid patch operation {op!r}, must be one of {', '.join(OPERATIONS)}")
+    tokens = _tokens(operation, "path")
+
+    if op == TEST:
+        if not _json_equal(_get(doc, tokens), _value(operation)):
+            raise ValueError(f"Test failed at {operation['path']!r}")
+        return doc
+    if op == REMOVE:
+        return _remove(doc, tokens)
+    if op == MOVE:
+        source = _tokens(operation, "from")
+        if tokens[:len(source)] == source and tokens != source:
+            raise ValueError(f"Cannot move {operation['from']!r} into one of its children")
+        if tokens == source:
+            _get(doc, tokens)
+            return doc
+        value = _get(doc, source)
+        doc = _remove(doc, source)
+    elif op == COPY:
+        value = deepcopy(_get(doc, _tokens(operation, "from")))
+    else:
+        value = deepcopy(_value(operation))
+
+    if not tokens:
+        return value
+    parent = _get(doc, tokens[:-1])
+    token = tokens[-1]
+    if isinstance(parent, list):
+        index = _index(parent, token, insert=op != REPLACE_OP)
+        if op == REPLACE_OP:
+            parent[index] = value
+        else:
+            parent.insert(index, value)
+    elif isinstance(parent, dict):
+        if op == REPLACE_OP and token not in parent:
+            raise ValueError(f"Cannot replace the missing {operation['path']!r}")
+        parent[token] = value
+    else:
+        raise ValueError(f"Cannot {op} {operation['path']!r}, its parent is not a container")
+    return doc
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise ValueError("Cannot remove the root of the document")
+    parent = _get(doc, tokens[:-1])
+    if isinstance(parent, list):
+        del parent[_index(parent, tokens[-1])]
+    elif isinstance(parent, dict) and tokens[-1] in parent:
+        del parent[tokens[-1]]
+    else:
+        raise ValueError(f"Cannot remove the missing {_pointer(tokens)!r}")
+    return doc
+
+
+def _get(doc: Any, tokens: List[str]) -> Any:
+    value = doc
+    for position, token in enumerate(tokens):
+        if isinstance(value, list):
+            value = value[_index(value, token)]
+        elif isinstance(value, dict) and token in value:
+            value = value[token]
+        else:
+            raise ValueError(f"{_pointer(tokens[:position + 1])!r} does not exist")
+    return value
+
+
+def _index(items: list, token: str, insert: bool = False) -> int:
+    if insert and token == "-":
+        return len(items)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise ValueError(f"Invalid list index {token!r}")
+    index = int(token)
+    if index > len(items) or (index == len(items) and not insert):
+        raise ValueError(f"List index {index} is out of range")
+    return index
+
+
+def _tokens(operation: dict, member: str) -> List[str]:
+    pointer = operation.get(member)
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise ValueError(f"Invalid {member!r} in patch operation {operation!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]]
+
+
+def _value(operation: dict) -> Any:
+    if "value" not in operation:
+        raise ValueError(f"Missing 'value' in patch operation {operation!r}")
+    return operation["value"]
+
+
+def _pointer(tokens: List[str]) -> str:
+    return "".join(f"/{escape(token)}" for token in tokens)
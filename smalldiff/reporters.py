@@ -0,0 +1,142 @@
+import json
+import sys
+from collections import Counter
+from typing import Any, Iterable, Optional, TextIO, Tuple
+
+from smalldiff.encoder import ModelEncoder
+from smalldiff.result import ADDED, KINDS, REMOVED, kind_of
+
+__all__ = ['Reporter', 'JsonReporter', 'JsonLinesReporter', 'TextReporter', 'SummaryReporter']
+
+
+class Reporter:
+    """
+    Writes differences to a text stream as they are found, one difference at a time,
+    so a diff is never built or rendered as a whole.
+    Subclasses implement add, and start and finish when they write around the differences.
+    The values compare reports as they are, like the items of top level lists, are written with ModelEncoder.
+    The stream defaults to sys.stdout at the time of the report
+    """
+
+    def __init__(self, stream: TextIO = None):
+        self.stream = stream
+
+    def report(self, differences: Iterable[Tuple]) -> int:
+        """
+        Writes the (path, expected, actual) differences, i.e. the ones iter_diff yields,
+        or (path, expected, actual, kind) ones, and returns how many there were.
+        The kind of a difference that comes without one is guessed from its values, see kind_of
+        """
+        stream = self.stream if self.stream is not None else sys.stdout
+        self.start(stream)
+        count = 0
+        for path, expected_val, actual_val, *kind in differences:
+            self.add(stream, path, expected_val, actual_val, kind[0] if kind else kind_of(expected_val, actual_val))
+            count += 1
+        self.finish(stream, count)
+        return count
+
+    def start(self, stream: TextIO) -> None:
+        pass
+
+    def add(self, stream: TextIO, path: Optional[str], expected: Any, actual: Any, kind: str) -> None:
+        """
+        Writes one difference, path is None for a difference between the roots
+        """
+        raise NotImplementedError
+
+    def finish(self, stream: TextIO, count: int) -> None:
+        pass
+
+
+class JsonReporter(Reporter):
+    """
+    Writes the diff compare returns as a json document,
+    the same way as json.dumps(diff, indent=indent)
+    """
+
+    def __init__(self, stream: TextIO = None, indent: int = 2):
+        super().__init__(stream)
+        self.indent = indent
+
+    def add(self, stream: TextIO, path: Optional[str], expected: Any, actual: Any, kind: str) -> None:
+        value = json.dumps({"expected": expected, "actual": actual}, indent=self.indent, cls=ModelEncoder)
+        if path is None:
+            stream.write(value)
+            return
+        margin = " " * self.indent
+        stream.write(",\n" if self._written else "{\n")
+        stream.write(f"{margin}{json.dumps(path)}: ")
+        stream.write(value.replace("\n", "\n" + margin))
+        self._written = True
+
+    def start(self, stream: TextIO) -> None:
+        self._written = False
+
+    def finish(self, stream: TextIO, count: int) -> None:
+        if self._written:
+            stream.write("\n}\n")
+        elif count:
+            stream.write("\n")
+        else:
+            stream.write("{}\n")
+
+
+class JsonLinesReporter(Reporter):
+    """
+    Writes every difference as a json object on a line of its own,
+    {"path": ..., "expected": ..., "actual": ...}, with an empty path for a difference between the roots
+    """
+
+    def add(self, stream: TextIO, path: Optional[str], expected: Any, actual: Any, kind: str) -> None:
+        stream.write(json.dumps({"path": path or "", "expected": expected, "actual": actual}, cls=ModelEncoder))
+        stream.write("\n")
+
+
+class TextReporter(Reporter):
+    """
+    Writes the differences as a unified text view, every path followed
+    by its expected value prefixed with - and its actual value prefixed with +.
+    An added value has no expected line and a removed value no actual line
+    """
+
+    def start(self, stream: TextIO) -> None:
+        stream.write("--- expected\n+++ actual\n")
+
+    def add(self, stream: TextIO, path: Optional[str], expected: Any, actual: Any, kind: str) -> None:
+        stream.write(f"@@ {path or ''} @@\n")
+        if kind != ADDED:
+            stream.write(f"-{json.dumps(expected, cls=ModelEncoder)}\n")
+        if kind != REMOVED:
+            stream.write(f"+{json.dumps(actual, cls=ModelEncoder)}\n")
+
+
+class SummaryReporter(Reporter):
+    """
+    Writes the number of differences of every kind, then the top path prefixes,
+    made of the first depth keys of the paths, with their number of differences.
+    Only the counts are kept while the differences are read
+    """
+
+    def __init__(self, stream: TextIO = None, top: int = 10, depth: int = 1):
+        super().__init__(stream)
+        self.top = top
+        self.depth = depth
+
+    def start(self, stream: TextIO) -> None:
+        self._kinds = Counter()
+        self._prefixes = Counter()
+
+    def add(self, stream: TextIO, path: Optional[str], expected: Any, actual: Any, kind: str) -> None:
+        self._kinds[kind] += 1
+        self._prefixes[".".join((path or "").split(".", self.depth)[:self.depth])] += 1
+
+    def finish(self, stream: TextIO, count: int) -> None:
+        kinds = ", ".join(f"{self._kinds[kind]} {kind}" for kind in KINDS)
+        stream.write(f"{count} differences: {kinds}\n")
+        prefixes = self._prefixes.most_common(self.top)
+        width = max((len(prefix) for prefix, _ in prefixes), default=0)
+        for prefix, prefix_count in prefixes:
+            stream.write(f"  {prefix:<{width}}  {prefix_count}\n")
+        if len(self._prefixes) > len(prefixes):
+            stream.write(f"  ... {len(self._prefixes) - len(prefixes)} more\n")
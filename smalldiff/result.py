@@ -0,0 +1,136 @@
+from itertools import compress, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from smalldiff.walker import DiffWalker, ADDED, CHANGED, REMOVED
+
+KINDS = (ADDED, REMOVED, CHANGED)
+_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+
+class DiffResult:
+    """
+    The differences of a comparison kept in parallel arrays:
+    the path segments, the kind, the expected value and the actual value of every difference.
+    No dict is built per difference, and the values are the ones found in the compared objects.
+
+    The differences are (path, expected, actual, kind) tuples, as the walker yields them.
+    The kind of a difference that comes without one is guessed from its values, see kind_of.
+    to_dict builds the same diff compare returns
+    """
+    __slots__ = ('_segments', '_kinds', '_expected', '_actual')
+
+    def __init__(self, differences: Iterable[Tuple] = ()):
+        self._segments = []
+        self._kinds = bytearray()
+        self._expected = []
+        self._actual = []
+        for segments, expected_val, actual_val, *kind in differences:
+            self._segments.append(segments)
+            self._kinds.append(_CODES[kind[0] if kind else kind_of(expected_val, actual_val)])
+            self._expected.append(expected_val)
+            self._actual.append(actual_val)
+
+    @classmethod
+    def collect(cls, differences: Iterator[Tuple], max_diffs: Optional[int] = None) -> 'DiffResult':
+        """
+        Collects the differences yielded by a walk, stopping after max_diffs if given
+        """
+        return cls(islice(differences, max_diffs))
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __bool__(self) -> bool:
+        return bool(self._segments)
+
+    def __iter__(self) -> Iterator[Tuple[str, Any, Any, str]]:
+        """
+        Yields the differences as (path, expected, actual, kind) tuples, the order of iter_diff
+        with the kind last, so a DiffResult can be handed to a reporter
+        """
+        return zip(
+            map(DiffWalker.join_path, self._segments), self._expected, self._actual, map(KINDS.__getitem__, self._kinds)
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} differences)"
+
+    def paths(self) -> Iterator[str]:
+        return map(DiffWalker.join_path, self._segments)
+
+    def to_dict(self) -> dict:
+        """
+        Builds the diff of compare, a difference between the roots is the whole diff
+        """
+        diff = {}
+        for segments, expected_val, actual_val in zip(self._segments, self._expected, self._actual):
+            if not segments:
+                return {"expected": expected_val, "actual": actual_val}
+            diff[DiffWalker.diff_key(segments)] = {"expected": expected_val, "actual": actual_val}
+        return diff
+
+    def count(self, kind: str = None, prefix: str = None) -> int:
+        """
+        Counts the differences of a kind, under a path prefix, or both
+        """
+        if kind is None and prefix is None:
+            return len(self)
+        return sum(self._selected(kind, prefix))
+
+    def filter(self, kind: str = None, prefix: str = None) -> 'DiffResult':
+        """
+        Returns the differences of a kind, under a path prefix, or both.
+        The prefix is a dotted path of whole keys, 'orders.1' matches 'orders.1.id' but not 'orders.10'
+        """
+        return self._subset(self._selected(kind, prefix))
+
+    def group_by_prefix(self, depth: int = 1) -> Dict[str, 'DiffResult']:
+        """
+        Groups the differences by the first depth keys of their paths, in the order they were found
+        """
+        groups = {}
+        for index, segments in enumerate(self._segments):
+            groups.setdefault(DiffWalker.join_path(DiffWalker.path_keys(segments)[:depth]), []).append(index)
+        return {prefix: self._subset_at(indexes) for prefix, indexes in groups.items()}
+
+    def _selected(self, kind: Optional[str], prefix: Optional[str]) -> List[bool]:
+        selected = [True] * len(self)
+        if kind is not None:
+            code = _CODES[kind]
+            selected = [value == code for value in self._kinds]
+        if prefix is not None:
+            parts = tuple(prefix.split('.')) if prefix else ()
+            size = len(parts)
+            selected = [
+                is_selected and tuple(map(str, DiffWalker.path_keys(segments)[:size])) == parts
+                for is_selected, segments in zip(selected, self._segments)
+            ]
+        return selected
+
+    def _subset(self, selected: List[bool]) -> 'DiffResult':
+        subset = DiffResult()
+        subset._segments = list(compress(self._segments, selected))
+        subset._kinds = bytearray(compress(self._kinds, selected))
+        subset._expected = list(compress(self._expected, selected))
+        subset._actual = list(compress(self._actual, selected))
+        return subset
+
+    def _subset_at(self, indexes: List[int]) -> 'DiffResult':
+        subset = DiffResult()
+        subset._segments = [self._segments[index] for index in indexes]
+        subset._kinds = bytearray(self._kinds[index] for index in indexes)
+        subset._expected = [self._expected[index] for index in indexes]
+        subset._actual = [self._actual[index] for index in indexes]
+        return subset
+
+
+def kind_of(expected: Any, actual: Any) -> str:
+    """
+    Guesses the kind of a difference that comes without one from its values, missing values being reported as None.
+    A None value that is really there is taken for a missing one, so the walker yields the kinds it knows
+    """
+    if expected is None:
+        return ADDED
+    if actual is None:
+        return REMOVED
+    return CHANGED
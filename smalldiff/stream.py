@@ -0,0 +1,575 @@
+import codecs
+import mmap
+import os
+import re
+from json import JSONDecoder
+from json.decoder import scanstring
+from json.scanner import make_scanner
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from smalldiff.normalizer import MAPPING, SEQUENCE
+from smalldiff.walker import DiffWalker, ItemPosition, ADDED, REMOVED
+
+START = 'start'
+END = 'end'
+KEY = 'key'
+VALUE = 'value'
+
+# Bytes of a file decoded at a time
+CHUNK_SIZE = 1 << 20
+# Characters read ahead to decode a container whole, containers that do not fit are streamed
+WINDOW = 1 << 20
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# The whitespace and the next token: a punctuation, a string without escapes,
+# a number with its fraction and exponent, a literal, or the quote of any other string
+_TOKEN = re.compile(r"""
+    [ \t\n\r]*
+    (?:
+        ([{}\[\],:])
+      | "([^"\\\x00-\x1f]*)"
+      | (-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?)
+      | (true|false|null|NaN|-?Infinity)
+      | (")
+    )
+""", re.VERBOSE)
+_PUNCTUATION, _PLAIN_STRING, _NUMBER, _FRACTION, _EXPONENT, _LITERAL, _STRING = range(1, 8)
+_LITERALS = {
+    'true': True,
+    'false': False,
+    'null': None,
+    'NaN': float('nan'),
+    'Infinity': float('inf'),
+    '-Infinity': float('-inf'),
+}
+# A token ending this close to the end of the text may go on in the next chunk, i.e. '1.' or '1e+'
+_LOOKAHEAD = 3
+
+scan_once = make_scanner(JSONDecoder())
+
+# What the parser expects next
+_VALUE = 'value'
+_FIRST_VALUE = 'first value'
+_KEY = 'property name'
+_FIRST_KEY = 'first property name'
+_COLON = 'colon'
+_SEPARATOR = 'separator'
+
+
+def read_text(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Memory maps a UTF-8 file and yields its text a chunk at a time,
+    decoding it incrementally so that no character is split between two chunks
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            for start in range(0, len(data), chunk_size):
+                text = decoder.decode(data[start:start + chunk_size])
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+
+
+class JsonEvents:
+    """
+    Parses a JSON document from chunks of its text into a stream of
+    (START, kind), (END, kind), (KEY, key) and (VALUE, value) events,
+    with the same values json.loads would produce.
+
+    A container that fits in the window of text read ahead is decoded whole by the json scanner
+    and comes as a single VALUE event, the larger ones are parsed token by token.
+    No more text than the window and the current chunk is held,
+    so the document is never loaded as a whole.
+    """
+
+    def __init__(self, chunks: Iterator[str], name: str = 'document', window: int = WINDOW):
+        self._chunks = chunks
+        self._name = name
+        self._window = window
+        self._text = ''
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        stack = []
+        state = _VALUE
+        match_token = _TOKEN.match
+        text, pos = self._text, self._pos
+        while True:
+            match = match_token(text, pos)
+            if match is None or (match.end() + _LOOKAHEAD > len(text) and not self._eof):
+                self._pos = pos
+                if self._fill():
+                    text, pos = self._text, self._pos
+                    continue
+                if match is None:
+                    pos = self._pos = _WHITESPACE.match(text, pos).end()
+                    if pos == len(text) and state is _SEPARATOR and not stack:
+                        return
+                    raise self._error("Unexpected end of document" if pos == len(text) else f"Expecting {state}")
+
+            group = match.lastindex
+            if state is _SEPARATOR and not stack:
+                self._pos = match.start(group)
+                raise self._error("Extra data")
+
+            if group == _PUNCTUATION:
+                char = match.group(group)
+                if char == ',' and state is _SEPARATOR:
+                    state = _KEY if stack[-1] is MAPPING else _VALUE
+                elif char == ':' and state is _COLON:
+                    state = _VALUE
+                elif (char == '{' or char == '[') and (state is _VALUE or state is _FIRST_VALUE):
+                    self._pos = match.start(group)
+                    decoded = self._decode()
+                    text = self._text
+                    if decoded is not None:
+                        value, pos = decoded
+                        yield VALUE, value
+                        state = _SEPARATOR
+                        continue
+                    pos = self._pos + 1
+                    kind = MAPPING if char == '{' else SEQUENCE
+                    stack.append(kind)
+                    yield START, kind
+                    state = _FIRST_KEY if kind is MAPPING else _FIRST_VALUE
+                    continue
+                elif (char == '}' and (state is _FIRST_KEY or (state is _SEPARATOR and stack[-1] is MAPPING))) \
+                        or (char == ']' and (state is _FIRST_VALUE or (state is _SEPARATOR and stack[-1] is SEQUENCE))):
+                    yield END, stack.pop()
+                    state = _SEPARATOR
+                else:
+                    self._pos = match.start(group)
+                    raise self._error(f"Expecting {state}")
+                pos = match.end()
+                continue
+
+            if group == _PLAIN_STRING:
+                value = match.group(group)
+                pos = match.end()
+            elif group == _STRING:
+                self._pos = match.start(group)
+                value = self._string()
+                text, pos = self._text, self._pos
+            elif state is _KEY or state is _FIRST_KEY or state is _COLON or state is _SEPARATOR:
+                self._pos = match.start(group)
+                raise self._error(f"Expecting {state}")
+            elif group == _LITERAL:
+                value = _LITERALS[match.group(group)]
+                pos = match.end()
+            elif match.group(_FRACTION) or match.group(_EXPONENT):
+                value = float(match.group(group))
+                pos = match.end()
+            else:
+                value = int(match.group(group))
+                pos = match.end()
+
+            if state is _KEY or state is _FIRST_KEY:
+                yield KEY, value
+                state = _COLON
+            elif state is _COLON or state is _SEPARATOR:
+                self._pos = match.start(group)
+                raise self._error(f"Expecting {state}")
+            else:
+                yield VALUE, value
+                state = _SEPARATOR
+
+    def _fill(self) -> bool:
+        """
+        Appends the next chunk to the text, dropping what was read already
+        """
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            return False
+        self._offset += self._pos
+        self._text = self._text[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _decode(self) -> Optional[Tuple[Any, int]]:
+        """
+        Decodes the container starting at the current position whole,
+        returns None when it does not fit in the window or is not valid
+        """
+        while len(self._text) - self._pos < self._window and self._fill():
+            pass
+        try:
+            return scan_once(self._text, self._pos)
+        except (StopIteration, ValueError, RecursionError):
+            # the invalid ones are reported by the token parser
+            return None
+
+    def _string(self) -> str:
+        """
+        Reads a string with escapes, from its opening quote
+        """
+        while True:
+            try:
+                value, self._pos = scanstring(self._text, self._pos + 1)
+                return value
+            except ValueError:
+                # the string may go on in the next chunk
+                if not self._fill():
+                    raise self._error("Invalid string")
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{message} in {self._name} at offset {self._offset + self._pos}")
+
+
+def materialize(first: Tuple[str, Any], events: Iterator[Tuple[str, Any]]) -> Any:
+    """
+    Builds the value that starts with the given event from the events that follow it
+    """
+    kind, value = first
+    if kind is VALUE:
+        return value
+
+    root = {} if value is MAPPING else []
+    stack = [root]
+    key = None
+    for kind, value in events:
+        if kind is KEY:
+            key = value
+            continue
+        if kind is END:
+            stack.pop()
+            if not stack:
+                return root
+            continue
+
+        item = value if kind is VALUE else {} if value is MAPPING else []
+        target = stack[-1]
+        if isinstance(target, dict):
+            target[key] = item
+        else:
+            target.append(item)
+        if kind is START:
+            stack.append(item)
+    raise ValueError("Unexpected end of document")
+
+
+def stream_differences(
+        expected: Iterator[Tuple[str, Any]],
+        actual: Iterator[Tuple[str, Any]],
+        walker: DiffWalker
+) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+    """
+    Compares two streams of JSON events in lockstep and yields the same differences,
+    in the same order, as the walker yields for the loaded documents.
+
+    Only the containers being compared are tracked, with an explicit stack,
+    so the memory used is bounded by the nesting depth.
+    Values that came whole are compared by the walker, the rest is loaded only when it is reported,
+    when its key comes at a different point of the two objects,
+    or when a list is not compared by position.
+    """
+    expected = _Pushback(expected)
+    actual = _Pushback(actual)
+    keys = []
+    stack = []
+    yield from _compare_values(
+        next(expected, None), next(actual, None), expected, actual, walker, keys, stack, walker.root_field
+    )
+
+    yield from _stream(expected, actual, walker, keys, stack, 0)
+
+    for events in (expected, actual):
+        for _ in events:
+            pass
+
+
+class _Pushback:
+    """
+    A stream of events that the events of a whole value can be put back in front of
+    """
+    __slots__ = ('_events', '_pushed')
+
+    def __init__(self, events: Iterator[Tuple[str, Any]]):
+        self._events = events
+        self._pushed = []
+
+    def __iter__(self) -> '_Pushback':
+        return self
+
+    def __next__(self) -> Tuple[str, Any]:
+        while self._pushed:
+            event = next(self._pushed[-1], None)
+            if event is not None:
+                return event
+            self._pushed.pop()
+        return next(self._events)
+
+    def push(self, events: Iterator[Tuple[str, Any]]) -> None:
+        self._pushed.append(events)
+
+
+def _stream(
+        expected: _Pushback,
+        actual: _Pushback,
+        walker: DiffWalker,
+        keys: List[Any],
+        stack: List[Tuple[str, Any, int]],
+        depth: int
+) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+    """
+    Compares the containers on the stack entry by entry, until it is back to the given depth
+    """
+    while len(stack) > depth:
+        kind, field, position = stack[-1]
+        expected_event = next(expected, None)
+        actual_event = next(actual, None)
+        if expected_event is None or actual_event is None:
+            raise ValueError("Unexpected end of document")
+
+        expected_end = expected_event[0] is END
+        actual_end = actual_event[0] is END
+        if expected_end and actual_end:
+            stack.pop()
+            if stack:
+                keys.pop()
+            continue
+
+        if kind is MAPPING:
+            if not expected_end and not actual_end and expected_event[1] == actual_event[1]:
+                keys.append(expected_event[1])
+                child = walker.child_field(field, expected_event[1], False)
+                yield from _compare_values(
+                    next(expected, None), next(actual, None), expected, actual, walker, keys, stack, child
+                )
+                continue
+
+            # the keys diverge, the rest of both objects is compared in the order of the expected one
+            yield from _rest_of_object(expected_event, actual_event, expected, actual, walker, keys, stack)
+            stack.pop()
+            if stack:
+                keys.pop()
+            continue
+
+        stack[-1] = (kind, field, position + 1)
+        if expected_end:
+            yield from _rest_of_array(position, actual_event, actual, keys, walker, added=True)
+        elif actual_end:
+            yield from _rest_of_array(position, expected_event, expected, keys, walker, added=False)
+        else:
+            keys.append(position)
+            child = walker.child_field(field, position, True)
+            yield from _compare_values(expected_event, actual_event, expected, actual, walker, keys, stack, child)
+            continue
+
+        stack.pop()
+        if stack:
+            keys.pop()
+
+
+def _compare_values(
+        expected_event: Optional[Tuple[str, Any]],
+        actual_event: Optional[Tuple[str, Any]],
+        expected: _Pushback,
+        actual: _Pushback,
+        walker: DiffWalker,
+        keys: List[Any],
+        stack: List[Tuple[str, Any, int]],
+        field: Any
+) -> Iterable[Tuple[Tuple, Any, Any, str]]:
+    """
+    Compares the values starting with the given events. Two containers of the same kind
+    are pushed on the stack to be compared entry by entry, anything else is compared right away
+    and its key is popped
+    """
+    if expected_event is None or actual_event is None:
+        raise ValueError("Unexpected end of document")
+
+    expected_kind, expected_value = expected_event
+    actual_kind, actual_value = actual_event
+    if expected_kind is VALUE and actual_kind is VALUE:
+        differences = () if expected_value == actual_value else _walk(walker, expected_value, actual_value, keys, field)
+    else:
+        # a container that came whole is split back into events to be walked along a streamed one
+        if expected_kind is VALUE and actual_kind is START and _kind_of(expected_value) is actual_value:
+            expected_event = _split(expected_value, expected)
+        elif actual_kind is VALUE and expected_kind is START and _kind_of(actual_value) is expected_value:
+            actual_event = _split(actual_value, actual)
+
+        if expected_event[0] is START and actual_event[0] is START and expected_event[1] is actual_event[1]:
+            kind = expected_event[1]
+            if (kind is MAPPING or walker.by_position(field)) and not walker.compares_whole(tuple(keys), kind):
+                stack.append((kind, field, 0))
+                return ()
+        # anything else is loaded and walked, so it is filtered and compared the way compare does it
+        differences = _walk(
+            walker, materialize(expected_event, expected), materialize(actual_event, actual), keys, field
+        )
+
+    if stack:
+        keys.pop()
+    return differences
+
+
+def _walk(walker: DiffWalker, expected: Any, actual: Any, keys: List[Any], field: Any) -> Iterable[Tuple]:
+    # the top level values are walked as roots, the same way compare walks them
+    return walker.walk(expected, actual, tuple(keys), field) if keys else walker.walk(expected, actual)
+
+
+def _kind_of(value: Any) -> str:
+    if isinstance(value, dict):
+        return MAPPING
+    if isinstance(value, list):
+        return SEQUENCE
+    return VALUE
+
+
+def _split(value: Any, events: _Pushback) -> Tuple[str, Any]:
+    """
+    Puts the events of a container back in the stream and returns its start event
+    """
+    value_events = _events_of(value)
+    first = next(value_events)
+    events.push(value_events)
+    return first
+
+
+def _events_of(value: Any) -> Iterator[Tuple[str, Any]]:
+    kind = _kind_of(value)
+    yield START, kind
+    stack = [(kind, iter(value.items()) if kind is MAPPING else iter(value))]
+    while stack:
+        kind, children = stack[-1]
+        for child in children:
+            if kind is MAPPING:
+                key, child = child
+                yield KEY, key
+            child_kind = _kind_of(child)
+            if child_kind is VALUE:
+                yield VALUE, child
+                continue
+            yield START, child_kind
+            stack.append((child_kind, iter(child.items()) if child_kind is MAPPING else iter(child)))
+            break
+        else:
+            stack.pop()
+            yield END, kind
+
+
+def _rest_of_object(
+        expected_event: Tuple[str, Any],
+        actual_event: Tuple[str, Any],
+        expected: _Pushback,
+        actual: _Pushback,
+        walker: DiffWalker,
+        keys: List[Any],
+        stack: List[Tuple[str, Any, int]]
+) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+    """
+    Compares two objects from the first keys they differ at, to the end of both,
+    reporting the keys in the expected order and then the keys only the actual has, as the walker does.
+
+    The objects are still read in lockstep, a key found on both sides at the same point is streamed.
+    Only the values of the keys not matched yet on their side are held, and loaded,
+    so the rest of the objects is loaded only as far as their keys come in a different order.
+    Of two keys that differ, the value that came whole is held rather than one being streamed.
+    The differences of a key are held in turn until the expected keys before it are reported.
+    """
+    _, field, _ = stack[-1]
+    path = tuple(keys)
+    expected_first = next(expected) if expected_event[0] is KEY else None
+    actual_first = next(actual) if actual_event[0] is KEY else None
+    # the values read ahead on each side, by their key, and the differences of the expected keys
+    # in their order, None until they are known
+    expected_values = {}
+    actual_values = {}
+    reports = {}
+    while expected_first is not None or actual_first is not None:
+        expected_key = expected_event[1]
+        actual_key = actual_event[1]
+        if expected_first is not None and actual_first is not None and expected_key == actual_key:
+            keys.append(expected_key)
+            child = walker.child_field(field, expected_key, False)
+            depth = len(stack)
+            differences = _compare_values(expected_first, actual_first, expected, actual, walker, keys, stack, child)
+            if len(stack) > depth:
+                differences = _stream(expected, actual, walker, keys, stack, depth)
+            if reports:
+                reports[expected_key] = list(differences)
+            else:
+                yield from differences
+            expected_event, expected_first = _next_entry(expected)
+            actual_event, actual_first = _next_entry(actual)
+        elif expected_first is not None and (
+                actual_first is None or expected_key in actual_values
+                or (actual_key not in expected_values and _held_first(expected_first, actual_first))
+        ):
+            value = materialize(expected_first, expected)
+            if expected_key in actual_values:
+                reports[expected_key] = list(walker.walk(
+                    {expected_key: value}, {expected_key: actual_values.pop(expected_key)}, path, field
+                ))
+            else:
+                expected_values[expected_key] = value
+                reports[expected_key] = None
+            expected_event, expected_first = _next_entry(expected)
+        else:
+            value = materialize(actual_first, actual)
+            if actual_key in expected_values:
+                reports[actual_key] = list(walker.walk(
+                    {actual_key: expected_values.pop(actual_key)}, {actual_key: value}, path, field
+                ))
+            else:
+                actual_values[actual_key] = value
+            actual_event, actual_first = _next_entry(actual)
+
+        # the differences of an expected key are reported once the ones of the keys before it are,
+        # the keys still held when the actual object ends are not in it
+        while reports:
+            key = next(iter(reports))
+            differences = reports[key]
+            if differences is None:
+                if actual_first is not None:
+                    break
+                differences = walker.walk({key: expected_values.pop(key)}, {}, path, field)
+            del reports[key]
+            yield from differences
+
+    yield from walker.walk({}, actual_values, path, field)
+
+
+def _next_entry(events: Iterator[Tuple[str, Any]]) -> Tuple[Tuple[str, Any], Optional[Tuple[str, Any]]]:
+    """
+    Reads the key of the next entry of an object and the first event of its value, None at the end of the object
+    """
+    event = next(events)
+    return event, next(events) if event[0] is KEY else None
+
+
+def _held_first(expected_first: Tuple[str, Any], actual_first: Tuple[str, Any]) -> bool:
+    # a value that came whole is in memory already, a streamed one would have to be loaded
+    return expected_first[0] is VALUE or actual_first[0] is not VALUE
+
+
+def _rest_of_array(
+        position: int,
+        event: Tuple[str, Any],
+        events: Iterator[Tuple[str, Any]],
+        keys: List[Any],
+        walker: DiffWalker,
+        added: bool
+) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+    """
+    Reports the items one array has after the other one ended, unless the walker filters them out,
+    the ones of a top level array keyed the way the walker keys them
+    """
+    while event[0] is not END:
+        value = materialize(event, events)
+        segments = (*keys, position) if keys else (ItemPosition(position),)
+        if walker.includes(segments):
+            yield (segments, None, value, ADDED) if added else (segments, value, None, REMOVED)
+        position += 1
+        event = next(events)
@@ -0,0 +1,797 @@
+from collections import Counter
+from itertools import count
+from json import JSONEncoder
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from smalldiff.arrays import array_differences
+from smalldiff.comparators import Comparators
+from smalldiff.filters import PathFilter
+from smalldiff.fingerprint import Snapshot
+from smalldiff.lists import align, freeze, frozen_order, EQUAL, REPLACE
+from smalldiff.normalizer import Normalizer, UnorderedList, ARRAY, MAPPING, MISSING, SEQUENCE, SCALAR
+from smalldiff.numbers import check_tolerance, is_close, numeric_mismatches
+
+INDEX = 'index'
+ALIGN = 'align'
+LIST_MODES = (INDEX, ALIGN)
+
+# the kinds of differences: a value only the actual has, one only the expected has, and two values that differ
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+_FROZEN = object()
+# the sequences compared regardless of order, concrete types are checked faster than the Set ABC
+_UNORDERED = (set, frozenset, UnorderedList)
+_ROOT = object()
+
+
+class ItemPosition(int):
+    """
+    The position of an item a top level list compared by position has on one side only.
+    compare keys these items by their int position, the way it always did, instead of their dotted path
+    """
+    __slots__ = ()
+
+
+class _FieldNode:
+    """
+    A node of the tree of field paths the list options are given for.
+    Field paths are made of the dictionary keys only, list positions are left out,
+    so 'orders.items' addresses the items list of every order
+    """
+    __slots__ = ('path', 'children', 'list_key', 'unordered', 'tolerance')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.children = {}
+        self.list_key = None
+        self.unordered = False
+        self.tolerance = None
+
+    def child(self, key: str) -> '_FieldNode':
+        if key not in self.children:
+            self.children[key] = _FieldNode(f"{self.path}.{key}" if self.path else key)
+        return self.children[key]
+
+    @classmethod
+    def build(
+            cls,
+            list_keys: Optional[Dict[str, str]],
+            unordered: Optional[Iterable[str]],
+            tolerances: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> Optional['_FieldNode']:
+        if not list_keys and not unordered and not tolerances:
+            return None
+        root = cls("")
+        for path, key in (list_keys or {}).items():
+            root.find(path).list_key = key
+        for path in unordered or ():
+            root.find(path).unordered = True
+        for path, (rel_tol, abs_tol) in (tolerances or {}).items():
+            root.find(path).tolerance = (rel_tol, abs_tol)
+        return root
+
+    def find(self, path: str) -> '_FieldNode':
+        node = self
+        for key in path.split(".") if path else ():
+            node = node.child(key)
+        return node
+
+
+class DiffWalker:
+    """
+    Walks two values side by side and yields their differences as
+    (path, expected, actual, kind) tuples, with the paths as tuples of segments.
+    The kind tells an added or a removed value, reported with None on its missing side,
+    from a changed one.
+    All the differences come out of a single stream, the nested levels
+    do not collect and merge their own results.
+
+    The traversal keeps an explicit stack of the containers being compared
+    instead of recursing, so the nesting depth is not bounded by the recursion limit.
+    Every container on the stack is represented by a generator over its child pairs,
+    which is suspended while a nested container is being walked.
+
+    Lists are compared by position with the INDEX list mode.
+    Top level lists and tuples compared by position keep the diff compare always gave for them,
+    see _item_differences.
+    With the ALIGN list mode they are aligned first, so that an inserted or a removed item
+    is reported once instead of shifting every item after it. Removed and changed items
+    are keyed by their expected position, added items by their actual position prefixed with '+'.
+
+    The lists named in list_keys, by their field path, are matched by the value of a key field
+    of their items instead, and their items are keyed by that value.
+
+    Sets, and the lists named in unordered, are compared as multisets.
+    Only their missing and extra items are reported, keyed the same way as in the ALIGN list mode.
+
+    Numbers are equal within rel_tol or abs_tol, the same way as math.isclose,
+    or within the (rel_tol, abs_tol) given in tolerances for the numbers at a field path.
+    Lists of numbers compared by position are checked in one batched pass,
+    only the positions that differ are walked.
+
+    With include or exclude path patterns, the keys the PathFilter skips are never looked at.
+    Values with a custom comparator, by their path or their types, are compared by it as a whole.
+
+    When the values come from two snapshots, the containers
+    with equal fingerprints on both sides are skipped without being walked.
+    The indexes and the hashed items of the lists of a snapshot are kept in the snapshot,
+    to be reused by the next comparison against it.
+    """
+
+    def __init__(
+            self,
+            normalizer: Normalizer,
+            list_mode: str = INDEX,
+            list_keys: Dict[str, str] = None,
+            unordered: Iterable[str] = None,
+            snapshots: Tuple[Optional[Snapshot], Optional[Snapshot]] = (None, None),
+            rel_tol: float = 0.0,
+            abs_tol: float = 0.0,
+            tolerances: Dict[str, Tuple[float, float]] = None,
+            include: Iterable[str] = None,
+            exclude: Iterable[str] = None,
+            comparators: Comparators = None
+    ):
+        self._normalizer = normalizer
+        self._list_mode = list_mode
+        self._fields = _FieldNode.build(list_keys, unordered, tolerances)
+        self._snapshots = snapshots
+        self._prune = all(snapshot is not None for snapshot in snapshots)
+        self._tolerance = (rel_tol, abs_tol)
+        self._tolerant = bool(rel_tol or abs_tol or tolerances)
+        self._filter = PathFilter.build(include, exclude)
+        self._comparators = comparators
+
+    def walk(
+            self,
+            expected: Any,
+            actual: Any,
+            path: Tuple = (),
+            field: Optional[_FieldNode] = _ROOT
+    ) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+        """
+        Yields the differences between two values with their values normalized,
+        and their paths as tuples of segments.
+        Values found below the root are walked from the path and the field they were found at
+        """
+        if not path and field is _ROOT and self._keeps_items(expected, actual):
+            yield from self._item_differences(expected, actual)
+            return
+        normalize = self._normalizer.normalize
+        for segments, expected_val, actual_val, kind in self.differences(expected, actual, path, field):
+            yield segments, normalize(expected_val), normalize(actual_val), kind
+
+    def differences(
+            self,
+            expected: Any,
+            actual: Any,
+            path: Tuple = (),
+            field: Optional[_FieldNode] = _ROOT
+    ) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+        """
+        Yields the differences between two values without normalizing them.
+        Two values that are not containers of the same kind are reported as a whole
+        """
+        if expected is actual:
+            return
+        state = None
+        if self._filter is not None:
+            state = self._filter.state_of(path)
+            if state is None:
+                return
+        resolution = None
+        if self._comparators is not None:
+            resolution = self._comparators.resolve(path)
+            comparator = self._comparators.comparator_of(resolution, expected, actual)
+            if comparator is not None:
+                if not comparator(expected, actual):
+                    yield path, expected, actual, CHANGED
+                return
+        expected_kind, expected_view = self._normalizer.view(expected)
+        actual_kind, actual_view = self._normalizer.view(actual)
+        if expected_kind is ARRAY or actual_kind is ARRAY:
+            node = self._fields if field is _ROOT else field
+            yield from self._array_differences(expected_kind, expected_view, actual_kind, actual_view, path, node)
+        elif expected_kind is actual_kind and expected_kind is not SCALAR:
+            if not self._same_fingerprint(expected_view, actual_view):
+                node = self._fields if field is _ROOT else field
+                yield from self._walk(expected_kind, expected_view, actual_view, path, node, state, resolution)
+        elif expected_kind is not actual_kind or expected_view != actual_view:
+            if not self._tolerant or not self._is_close(
+                    expected_view, actual_view, self._fields if field is _ROOT else field
+            ):
+                yield path, expected_view, actual_view, CHANGED
+
+    def is_equal(self, expected: Any, actual: Any) -> bool:
+        """
+        Returns at the first difference without normalizing it
+        """
+        return next(self.differences(expected, actual), None) is None
+
+    @property
+    def root_field(self) -> Optional[_FieldNode]:
+        """
+        The field of the root values, followed down with child_field
+        by the callers that walk the containers themselves
+        """
+        return self._fields
+
+    @staticmethod
+    def child_field(field: Optional[_FieldNode], key: Any, in_list: bool) -> Optional[_FieldNode]:
+        return field if field is None or in_list else field.children.get(key)
+
+    def includes(self, path: Tuple) -> bool:
+        """
+        Tells whether a difference at a path is reported, for the callers that report values themselves
+        """
+        return self._filter is None or self._filter.state_of(path) is not None
+
+    def compares_whole(self, path: Tuple, kind: str) -> bool:
+        """
+        Tells whether the containers of a kind at a path have a comparator,
+        so they are compared as a whole by walk rather than entry by entry
+        """
+        if self._comparators is None:
+            return False
+        container = {} if kind is MAPPING else []
+        return self._comparators.comparator_of(self._comparators.resolve(path), container, container) is not None
+
+    def by_position(self, field: Optional[_FieldNode]) -> bool:
+        """
+        Tells whether the lists at a field are compared item by item at the same positions
+        """
+        return self._list_mode == INDEX and (field is None or (field.list_key is None and not field.unordered))
+
+    def partitions(
+            self,
+            expected: Any,
+            actual: Any,
+            count: int,
+            min_size: int
+    ) -> Optional[List[Tuple[int, Any, Any]]]:
+        """
+        Splits two containers at their top level into about count (offset, expected, actual) partitions,
+        mappings by their keys and lists into chunks of positions starting at offset.
+        Walked one after the other by walk_partitions, they give the same differences in the same order.
+        Returns None when the values are not containers of the same kind, when the expected one
+        has fewer than min_size values in it, or when its items are not compared by position
+        """
+        if expected is actual:
+            return None
+        kind, expected_view = self._normalizer.view(expected)
+        actual_kind, actual_view = self._normalizer.view(actual)
+        if kind is not actual_kind or kind is SCALAR or not _has_size(expected_view, min_size):
+            return None
+
+        if kind is MAPPING:
+            keys = list(expected_view) + [key for key in actual_view if key not in expected_view]
+            size = -(-len(keys) // count)
+            return [
+                (
+                    0,
+                    {key: expected_view[key] for key in keys[start:start + size] if key in expected_view},
+                    {key: actual_view[key] for key in keys[start:start + size] if key in actual_view}
+                )
+                for start in range(0, len(keys), size)
+            ]
+
+        # the filter and the comparator patterns match the positions of the whole list, not the ones within a chunk
+        if not self.by_position(self._fields) or self._filter is not None \
+                or (self._comparators is not None and self._comparators.has_paths) \
+                or not isinstance(expected_view, (list, tuple)) or not isinstance(actual_view, (list, tuple)):
+            return None
+        length = max(len(expected_view), len(actual_view))
+        size = -(-length // count)
+        return [
+            (start, expected_view[start:start + size], actual_view[start:start + size])
+            for start in range(0, length, size)
+        ]
+
+    @staticmethod
+    def join_path(segments: Tuple) -> str:
+        """
+        Builds the dotted path of a difference from its segments, see path_keys
+        """
+        return ".".join(map(str, DiffWalker.path_keys(segments)))
+
+    @staticmethod
+    def path_keys(segments: Tuple) -> Tuple:
+        """
+        The keys of the dotted path of a difference: its segments without the leading empty keys,
+        which are dropped the same way the nested paths were always built
+        """
+        start = 0
+        while start < len(segments) and segments[start] == "":
+            start += 1
+        return segments[start:] if start else segments
+
+    @staticmethod
+    def diff_key(segments: Tuple) -> Any:
+        """
+        Builds the key of a difference in the diff of compare, which is its dotted path,
+        or the int position of an item a top level list has on one side only, see ItemPosition
+        """
+        if len(segments) == 1 and type(segments[0]) is ItemPosition:
+            return int(segments[0])
+        return DiffWalker.join_path(segments)
+
+    def _keeps_items(self, expected: Any, actual: Any) -> bool:
+        return isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)) \
+            and not isinstance(expected, UnorderedList) and not isinstance(actual, UnorderedList) \
+            and self.by_position(self._fields)
+
+    def _item_differences(self, expected: Any, actual: Any) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+        """
+        Yields the differences between two top level lists compared by position, as compare always reported them.
+        Only the dicts and the lists found on both sides are walked, any other two values are reported
+        as a whole, once for all the differences found within them: converted when they are list items,
+        and as they are when they are dict values. The values only one side has are reported as they are.
+        The items of keyed and unordered lists are not found at the keys of their paths,
+        so the differences within them are reported the way walk reports them
+        """
+        normalize = self._normalizer.normalize
+        reported = None
+        for segments, expected_val, actual_val, kind in self.differences(expected, actual):
+            expected_parent, actual_parent = expected, actual
+            node = self._fields
+            depth = 0
+            while depth < len(segments) - 1 and self._indexed(expected_parent, actual_parent, node):
+                if node is not None and isinstance(expected_parent, dict):
+                    node = node.children.get(segments[depth])
+                expected_child = self._raw_child(expected_parent, segments[depth])
+                actual_child = self._raw_child(actual_parent, segments[depth])
+                if not _walked(expected_child, actual_child):
+                    break
+                expected_parent, actual_parent = expected_child, actual_child
+                depth += 1
+
+            if not self._indexed(expected_parent, actual_parent, node):
+                yield segments, normalize(expected_val), normalize(actual_val), kind
+                continue
+            key = segments[depth]
+            if depth == len(segments) - 1 and kind is not CHANGED:
+                yield (ItemPosition(key),) if depth == 0 else segments, expected_val, actual_val, kind
+                continue
+            path = segments[:depth + 1]
+            if path == reported:
+                continue
+            reported = path
+            expected_val = self._raw_child(expected_parent, key)
+            actual_val = self._raw_child(actual_parent, key)
+            if isinstance(expected_parent, dict):
+                yield path, expected_val, actual_val, CHANGED
+            else:
+                yield path, normalize(expected_val), normalize(actual_val), CHANGED
+
+    def _indexed(self, expected: Any, actual: Any, node: Optional[_FieldNode]) -> bool:
+        """
+        Tells whether the children of two containers walked side by side are found at the keys of their paths,
+        which the items of keyed and unordered lists are not
+        """
+        if isinstance(expected, dict):
+            return True
+        return not isinstance(expected, UnorderedList) and not isinstance(actual, UnorderedList) \
+            and self.by_position(node)
+
+    def _raw_child(self, container: Any, key: Any) -> Any:
+        if isinstance(container, dict):
+            child = container.get(key, MISSING)
+            # the keys of the path are normalized, the dict is looked up by them when its own keys are not strings
+            return self._normalizer.view(container)[1][key] if child is MISSING else child
+        return container[key]
+
+    def _walk(
+            self,
+            kind: str,
+            expected: Any,
+            actual: Any,
+            path: Tuple,
+            node: Optional[_FieldNode],
+            state: Any = None,
+            resolution: Any = None
+    ) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+        """
+        Yields the differences with raw values and their paths as tuples of segments,
+        missing values are reported as None, with the ADDED or the REMOVED kind.
+        The keys skipped by the path filter, from the state of the walk at the path, are left out
+        before their values are looked at.
+        The values with a comparator, resolved along the paths, are compared by it and not walked.
+        Only the scalars are normalized here, a mapping, a sequence and a scalar
+        never normalize to equal values so they are not converted to be compared.
+
+        The keys of the containers on the stack make up the current path,
+        so no path is built until a difference is found.
+        """
+        view = self._normalizer.view
+        prune = self._prune
+        tolerant = self._tolerant
+        path_filter = self._filter
+        comparators = self._comparators
+        # the values of a snapshot are normalized already, as the records converted on the other side are
+        expected_normalized, actual_normalized = (snapshot is not None for snapshot in self._snapshots)
+        child_state = child_resolution = None
+        keys = list(path)
+        stack = [(self._pairs(kind, expected, actual, node), node, kind is SEQUENCE, state, resolution)]
+        while stack:
+            pairs, node, in_list, state, resolution = stack[-1]
+            for key, expected_val, actual_val in pairs:
+                if expected_val is actual_val:
+                    continue
+                if path_filter is not None:
+                    child_state = path_filter.step(state, key)
+                    if child_state is None:
+                        continue
+
+                if actual_val is MISSING:
+                    yield (*keys, key), expected_val, None, REMOVED
+                    continue
+                if expected_val is MISSING:
+                    yield (*keys, key), None, actual_val, ADDED
+                    continue
+
+                if comparators is not None:
+                    child_resolution = comparators.child(resolution, key)
+                    comparator = comparators.comparator_of(child_resolution, expected_val, actual_val)
+                    if comparator is not None:
+                        if not comparator(expected_val, actual_val):
+                            yield (*keys, key), expected_val, actual_val, CHANGED
+                        continue
+
+                expected_kind, expected_view = view(expected_val)
+                actual_kind, actual_view = view(actual_val)
+                if expected_kind is actual_kind and expected_kind is not SCALAR:
+                    if expected_kind is ARRAY:
+                        child_node = node if node is None or in_list else node.children.get(key)
+                        yield from self._array_differences(
+                            ARRAY, expected_view, ARRAY, actual_view, (*keys, key), child_node
+                        )
+                        continue
+                    if prune and self._same_fingerprint(expected_view, actual_view):
+                        continue
+                    # objects converted by the encoder, i.e. dumped models, are records small enough
+                    # to be compared natively before they are walked, against a record converted
+                    # on the other side or against the normalized record of a snapshot
+                    expected_record = expected_view is not expected_val
+                    actual_record = actual_view is not actual_val
+                    if (expected_record or actual_record) and (expected_record or expected_normalized) \
+                            and (actual_record or actual_normalized) and natively_equal(expected_view, actual_view):
+                        continue
+                    child_node = node if node is None or in_list else node.children.get(key)
+                    keys.append(key)
+                    stack.append((
+                        self._pairs(expected_kind, expected_view, actual_view, child_node),
+                        child_node,
+                        expected_kind is SEQUENCE,
+                        child_state,
+                        child_resolution
+                    ))
+                    break
+
+                if expected_kind is not actual_kind and (expected_kind is ARRAY or actual_kind is ARRAY):
+                    child_node = node if node is None or in_list else node.children.get(key)
+                    yield from self._array_differences(
+                        expected_kind, expected_view, actual_kind, actual_view, (*keys, key), child_node
+                    )
+                elif expected_kind is not actual_kind or expected_view != actual_view:
+                    if not tolerant or not self._is_close(
+                            expected_view, actual_view, node if node is None or in_list else node.children.get(key)
+                    ):
+                        yield (*keys, key), expected_view, actual_view, CHANGED
+            else:
+                stack.pop()
+                if stack:
+                    keys.pop()
+
+    def _array_differences(
+            self,
+            expected_kind: str,
+            expected: Any,
+            actual_kind: str,
+            actual: Any,
+            path: Tuple,
+            node: Optional[_FieldNode]
+    ) -> Iterator[Tuple[Tuple, Any, Any, str]]:
+        """
+        Compares numpy arrays and pandas frames vectorized, only their mismatching elements are walked.
+        An array compared with anything else, or that cannot be compared vectorized,
+        is compared through its converted value instead
+        """
+        differences = None
+        if expected_kind is ARRAY and actual_kind is ARRAY:
+            differences = array_differences(expected, actual, *self._tolerance_of(node))
+        if differences is None:
+            convert = self._normalizer.convert
+            yield from self.differences(
+                convert(expected) if expected_kind is ARRAY else expected,
+                convert(actual) if actual_kind is ARRAY else actual,
+                path,
+                node
+            )
+            return
+        for segments, expected_val, actual_val in differences:
+            yield from self.differences(expected_val, actual_val, (*path, *segments), None)
+
+    def _tolerance_of(self, node: Optional[_FieldNode]) -> Tuple[float, float]:
+        if node is not None and node.tolerance is not None:
+            return node.tolerance
+        return self._tolerance
+
+    def _is_close(self, expected: Any, actual: Any, node: Optional[_FieldNode]) -> bool:
+        return is_close(expected, actual, *self._tolerance_of(node))
+
+    def _same_fingerprint(self, expected: Any, actual: Any) -> bool:
+        if not self._prune:
+            return False
+        expected_snapshot, actual_snapshot = self._snapshots
+        fingerprint = expected_snapshot.fingerprint(expected)
+        return fingerprint is not None and fingerprint == actual_snapshot.fingerprint(actual)
+
+    def _cached(self, side: int, container: Any, key: Any, build: Callable[[], Any]) -> Any:
+        """
+        Builds the derived data of a container once per snapshot,
+        when its side is a snapshot
+        """
+        snapshot = self._snapshots[side]
+        if snapshot is None:
+            return build()
+        return snapshot.cached(container, key, build)
+
+    def _pairs(
+            self,
+            kind: str,
+            expected: Any,
+            actual: Any,
+            node: Optional[_FieldNode]
+    ) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Returns the children of two containers side by side
+        """
+        if kind is MAPPING:
+            return self._mapping_pairs(expected, actual)
+        if node is not None and node.list_key is not None:
+            return self._mapping_pairs(
+                self._cached(0, expected, node.list_key, lambda: self._index(expected, node)),
+                self._cached(1, actual, node.list_key, lambda: self._index(actual, node))
+            )
+        if (node is not None and node.unordered) or isinstance(expected, _UNORDERED) \
+                or isinstance(actual, _UNORDERED):
+            return self._unordered_pairs(expected, actual)
+        if self._list_mode == ALIGN:
+            return self._aligned_pairs(expected, actual)
+        return self._sequence_pairs(expected, actual, node)
+
+    @staticmethod
+    def _mapping_pairs(expected: dict, actual: dict) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Yields the common keys in the expected order, then the keys only the actual has
+        """
+        for key, val in expected.items():
+            yield key, val, actual.get(key, MISSING)
+        for key, val in actual.items():
+            if key not in expected:
+                yield key, MISSING, val
+
+    def _sequence_pairs(
+            self,
+            expected: list,
+            actual: list,
+            node: Optional[_FieldNode] = None
+    ) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Yields the items at the same positions, then the items only one side has.
+        Of two lists of numbers, only the items at the positions that differ are yielded
+        """
+        positions = numeric_mismatches(expected, actual, *self._tolerance_of(node))
+        if positions is None:
+            yield from zip(count(), expected, actual)
+        else:
+            for i in positions:
+                yield i, expected[i], actual[i]
+        for j in range(len(expected), len(actual)):
+            yield j, MISSING, actual[j]
+        for j in range(len(actual), len(expected)):
+            yield j, expected[j], MISSING
+
+    def _aligned_pairs(self, expected: list, actual: list) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Yields the items of two lists paired by their alignment.
+        The items are normalized and hashed to be aligned,
+        items in a replaced region are paired by position
+        """
+        expected, expected_keys = self._frozen(0, expected)
+        actual, actual_keys = self._frozen(1, actual)
+        interned = {}
+        expected_ids = [interned.setdefault(key, len(interned)) for key in expected_keys]
+        actual_ids = [interned.setdefault(key, len(interned)) for key in actual_keys]
+
+        for tag, e_start, e_end, a_start, a_end in align(expected_ids, actual_ids):
+            if tag is EQUAL:
+                continue
+            common = min(e_end - e_start, a_end - a_start) if tag is REPLACE else 0
+            for offset in range(common):
+                yield e_start + offset, expected[e_start + offset], actual[a_start + offset]
+            for i in range(e_start + common, e_end):
+                yield i, expected[i], MISSING
+            for j in range(a_start + common, a_end):
+                yield f"+{j}", MISSING, actual[j]
+
+    def _unordered_pairs(self, expected: Iterable, actual: Iterable) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Yields the items missing from the actual and then the extra ones.
+        The frozen items are counted on both sides in linear time, but the items of a set
+        are sorted first, see _frozen, so comparing sets takes O(n log n) time
+        """
+        expected, expected_keys = self._frozen(0, expected)
+        actual, actual_keys = self._frozen(1, actual)
+
+        available = Counter(actual_keys)
+        for i, key in enumerate(expected_keys):
+            if available[key]:
+                available[key] -= 1
+            else:
+                yield i, expected[i], MISSING
+
+        available = Counter(expected_keys)
+        for j, key in enumerate(actual_keys):
+            if available[key]:
+                available[key] -= 1
+            else:
+                yield f"+{j}", MISSING, actual[j]
+
+    def _frozen(self, side: int, items: Iterable) -> Tuple[list, list]:
+        """
+        Returns the normalized items of a list or a set with their hashable keys.
+        The items of a snapshot are normalized already and are kept as they are.
+        The items of a set are sorted by their keys, so they are reported at the same positions
+        whatever the hash seed. Sorting takes O(n log n) comparisons of keys built by frozen_order,
+        which recurses into nested values
+        """
+        def build() -> Tuple[list, list]:
+            normalized = list(items) if from_snapshot else [normalize(item) for item in items]
+            keys = [freeze(item) for item in normalized]
+            if isinstance(items, _UNORDERED):
+                order = sorted(range(len(keys)), key=lambda i: frozen_order(keys[i]))
+                return [normalized[i] for i in order], [keys[i] for i in order]
+            return normalized, keys
+
+        normalize = self._normalizer.normalize
+        from_snapshot = self._snapshots[side] is not None
+        return self._cached(side, items, _FROZEN, build)
+
+    def _index(self, items: Iterable, node: _FieldNode) -> dict:
+        """
+        Indexes the items of a list by the value of their key field
+        """
+        view = self._normalizer.view
+        index = {}
+        for position, item in enumerate(items):
+            kind, item_view = view(item)
+            if kind is not MAPPING or node.list_key not in item_view:
+                raise ValueError(
+                    f"Item {position} of '{node.path}' has no '{node.list_key}' field to be matched by"
+                )
+            key_kind, key = view(item_view[node.list_key])
+            if key_kind is not SCALAR:
+                raise ValueError(f"The '{node.list_key}' field of '{node.path}' items must be a primitive value")
+            if key in index:
+                raise ValueError(f"Duplicate '{node.list_key}' {key!r} in '{node.path}'")
+            index[key] = item_view
+        return index
+
+
+class WalkOptions:
+    """
+    The options of a walk, read and validated once from the keyword arguments of compare
+    and of the other entry points of SmallDiff, and handed down to the walkers they build.
+
+    Lists are compared item by item at the same positions,
+    list_mode='align' aligns them first to report the inserted and removed items.
+    list_keys maps the field paths of lists of records, without list positions,
+    to the field their records are matched by, i.e. {"orders": "id", "orders.items": "sku"}.
+    Sets, and the lists whose field paths are given in unordered, are compared regardless of order.
+    Numbers are equal within rel_tol or abs_tol, the same way as math.isclose,
+    tolerances maps field paths, without list positions, to the (rel_tol, abs_tol) of their numbers.
+    include and exclude are path patterns, list positions included, where * matches any key
+    and ** any number of keys: only the differences under an included path are reported,
+    and the excluded paths are skipped without being walked.
+    comparators maps path patterns, list positions included as in include and exclude, or types to functions
+    telling whether two values are equal, on top of the registered ones
+    """
+    __slots__ = (
+        'list_mode', 'list_keys', 'unordered', 'rel_tol', 'abs_tol', 'tolerances', 'include', 'exclude', 'comparators'
+    )
+
+    def __init__(
+            self,
+            registered: Comparators = None,
+            list_mode: str = INDEX,
+            list_keys: Dict[str, str] = None,
+            unordered: Iterable[str] = None,
+            rel_tol: float = 0.0,
+            abs_tol: float = 0.0,
+            tolerances: Dict[str, Tuple[float, float]] = None,
+            include: Iterable[str] = None,
+            exclude: Iterable[str] = None,
+            comparators: Dict[Union[str, type], Callable[[Any, Any], bool]] = None
+    ):
+        if list_mode not in LIST_MODES:
+            raise ValueError(f"list_mode must be one of {', '.join(LIST_MODES)}, not {list_mode!r}")
+        check_tolerance(rel_tol, abs_tol)
+        for tolerance in (tolerances or {}).values():
+            check_tolerance(*tolerance)
+        self.list_mode = list_mode
+        self.list_keys = list_keys
+        self.unordered = unordered
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.tolerances = tolerances
+        self.include = include
+        self.exclude = exclude
+        self.comparators = (registered or Comparators()).merged(comparators)
+
+    def walker(
+            self,
+            normalizer: Normalizer,
+            snapshots: Tuple[Optional[Snapshot], Optional[Snapshot]] = (None, None)
+    ) -> DiffWalker:
+        return DiffWalker(
+            normalizer, self.list_mode, self.list_keys, self.unordered, snapshots, self.rel_tol, self.abs_tol,
+            self.tolerances, self.include, self.exclude, self.comparators
+        )
+
+
+def walk_partitions(
+        encoder: Optional[Type[JSONEncoder]],
+        options: WalkOptions,
+        partitions: List[Tuple[int, Any, Any]]
+) -> List[List[Tuple[Tuple, Any, Any, str]]]:
+    """
+    Walks the partitions made by DiffWalker.partitions, in a worker process,
+    and returns their normalized differences with the list positions shifted by their offsets
+    """
+    walker = options.walker(Normalizer(encoder))
+    return [
+        [
+            ((type(segments[0])(segments[0] + offset), *segments[1:]) if offset else segments,
+             expected_val, actual_val, kind)
+            for segments, expected_val, actual_val, kind in walker.walk(expected, actual)
+        ]
+        for offset, expected, actual in partitions
+    ]
+
+
+def _has_size(value: Any, size: int) -> bool:
+    """
+    Tells whether a value holds at least size values, counting no further than that
+    """
+    stack = [value]
+    count = 0
+    while stack:
+        node = stack.pop()
+        count += 1
+        if count >= size:
+            return True
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return False
+
+
+def _walked(expected: Any, actual: Any) -> bool:
+    return (isinstance(expected, dict) and isinstance(actual, dict)) \
+        or (isinstance(expected, list) and isinstance(actual, list))
+
+
+def natively_equal(expected: Any, actual: Any) -> bool:
+    """
+    Native equality, the fastest way out for plain equal values.
+    Deeply nested values exceed the recursion limit of ==,
+    and arrays compare element-wise, these are left to be walked
+    """
+    try:
+        return bool(expected == actual)
+    except (RecursionError, ValueError):
+        return False
@@ -0,0 +1,88 @@
+import json
+import unittest
+
+from smalldiff import SmallDiff
+from smalldiff.encoder import ModelEncoder
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestNumpyArrays(unittest.TestCase):
+
+    def test_only_mismatching_indices_are_reported(self):
+        expected = numpy.arange(100.0).reshape(10, 10)
+        actual = expected.copy()
+        actual[3, 7] = -1
+        diff = SmallDiff.compare({"matrix": expected}, {"matrix": actual})
+        self.assertEqual(diff, {"matrix.3.7": {"expected": 37.0, "actual": -1.0}})
+        self.assertTrue(SmallDiff.is_equal({"matrix": expected}, {"matrix": expected.copy()}))
+
+    def test_same_differences_as_lists(self):
+        cases = [
+            (numpy.array([[1, 2], [3, 4]]), numpy.array([[1, 2], [3, 5]])),
+            (numpy.array([1, 2, 3]), numpy.array([1, 2])),
+            (numpy.array([1, 2]), [1, 3]),
+            (numpy.array(["a", "b"]), numpy.array([1, 2])),
+            (numpy.array([True, False]), numpy.array([1.0, 1.0])),
+        ]
+        for expected, actual in cases:
+            as_lists = [value.tolist() if isinstance(value, numpy.ndarray) else value for value in (expected, actual)]
+            self.assertEqual(
+                SmallDiff.compare({"a": expected}, {"a": actual}),
+                SmallDiff.compare({"a": as_lists[0]}, {"a": as_lists[1]})
+            )
+
+    def test_tolerance(self):
+        expected = numpy.array([1.0, 100.0, 0.0])
+        actual = numpy.array([1.0 + 1e-12, 100.5, 1e-9])
+        self.assertEqual(list(SmallDiff.compare(expected, actual)), ["0", "1", "2"])
+        self.assertEqual(list(SmallDiff.compare(expected, actual, rel_tol=1e-9)), ["1", "2"])
+        self.assertEqual(list(SmallDiff.compare(expected, actual, rel_tol=1e-2, abs_tol=1e-6)), [])
+
+    def test_numpy_scalars_and_encoder(self):
+        self.assertEqual(
+            SmallDiff.compare({"n": numpy.int64(3)}, {"n": numpy.int64(4)}),
+            {"n": {"expected": 3, "actual": 4}}
+        )
+        data = {"array": numpy.array([1, 2]), "scalar": numpy.int32(3)}
+        self.assertEqual(json.dumps(data, cls=ModelEncoder), '{"array": [1, 2], "scalar": 3}')
+
+
+@unittest.skipIf(pandas is None, "pandas is not installed")
+class TestPandasFrames(unittest.TestCase):
+
+    def test_frames_are_compared_by_column_and_index(self):
+        expected = pandas.DataFrame({"x": [1, 2, 3], "name": ["a", "b", "c"]}, index=[10, 20, 30])
+        actual = expected.copy()
+        actual.loc[20, "x"] = 5
+        actual["name"] = ["a", "B", "c"]
+        actual["extra"] = 0
+        self.assertEqual(SmallDiff.compare({"frame": expected}, {"frame": actual}), {
+            "frame.x.20": {"expected": 2, "actual": 5},
+            "frame.name.20": {"expected": "b", "actual": "B"},
+            "frame.extra": {"expected": None, "actual": {"10": 0, "20": 0, "30": 0}},
+        })
+
+    def test_frames_with_different_indexes(self):
+        expected = pandas.DataFrame({"x": [1, 2, 3]})
+        actual = pandas.DataFrame({"x": [1, 3]}, index=[0, 2])
+        self.assertEqual(SmallDiff.compare(expected, actual), {"x.1": {"expected": 2, "actual": None}})
+
+    def test_series(self):
+        expected = pandas.Series([1.0, 2.0], index=pandas.date_range("2024-01-01", periods=2))
+        diff = SmallDiff.compare(expected, expected * 1.5)
+        self.assertEqual(list(diff), ["2024-01-01T00:00:00", "2024-01-02T00:00:00"])
+        self.assertEqual(SmallDiff.compare(expected, expected * (1 + 1e-12), rel_tol=1e-9), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
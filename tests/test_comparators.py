@@ -0,0 +1,133 @@
+import unittest
+from datetime import datetime, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from smalldiff import SmallDiff
+from smalldiff.comparators import Comparators, UNMATCHED
+
+
+def same_text(expected, actual):
+    return expected.lower() == actual.lower()
+
+
+def within_a_minute(expected, actual):
+    return abs(expected - actual) <= timedelta(minutes=1)
+
+
+def same_url(expected, actual):
+    expected, actual = urlsplit(expected), urlsplit(actual)
+    return expected._replace(query="") == actual._replace(query="") \
+        and sorted(parse_qsl(expected.query)) == sorted(parse_qsl(actual.query))
+
+
+class TestComparators(unittest.TestCase):
+
+    def test_resolution(self):
+        comparators = Comparators({"orders.*.sku": same_text, "**.url": same_url, "orders.items.sku": same_url})
+        root = comparators.root
+        self.assertIsNone(root.comparator)
+        orders = comparators.child(root, "orders")
+        self.assertIs(comparators.child(comparators.child(orders, "items"), "sku").comparator, same_url)
+        self.assertIs(comparators.child(comparators.child(orders, "other"), "sku").comparator, same_text)
+        self.assertIs(comparators.child(orders, "url").comparator, same_url)
+        self.assertIs(comparators.child(root, "orders"), orders)
+        self.assertIsNone(comparators.child(comparators.child(root, "name"), "first").comparator)
+        literal = Comparators({"orders.sku": same_text})
+        self.assertIs(literal.child(literal.child(literal.root, "name"), "first"), UNMATCHED)
+
+    def test_types(self):
+        comparators = Comparators({str: same_text})
+        self.assertIs(comparators.comparator_of(UNMATCHED, "a", "A"), same_text)
+        self.assertIsNone(comparators.comparator_of(UNMATCHED, "a", 1))
+        self.assertIsNone(comparators.comparator_of(UNMATCHED, 1, 1))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Comparators({"": same_text})
+        with self.assertRaises(TypeError):
+            Comparators({"name": "lower"})
+
+
+class TestCompareWithComparators(unittest.TestCase):
+
+    expected = {
+        "email": "Alice@Example.com",
+        "created": datetime(2024, 1, 1, 12, 0, 0),
+        "links": [{"url": "https://example.com/?a=1&b=2", "title": "Home"}],
+        "name": "Alice",
+    }
+    actual = {
+        "email": "alice@example.com",
+        "created": datetime(2024, 1, 1, 12, 0, 30),
+        "links": [{"url": "https://example.com/?b=2&a=1", "title": "home"}],
+        "name": "Alicia",
+    }
+
+    def test_path_and_type_comparators(self):
+        self.assertEqual(len(SmallDiff.compare(self.expected, self.actual)), 5)
+        comparators = {"email": same_text, "links.*.url": same_url, datetime: within_a_minute}
+        diff = SmallDiff.compare(self.expected, self.actual, comparators=comparators)
+        self.assertEqual(list(diff), ["links.0.title", "name"])
+        self.assertEqual(diff["name"], {"expected": "Alice", "actual": "Alicia"})
+        self.assertFalse(SmallDiff.is_equal(self.expected, self.actual, comparators=comparators))
+
+    def test_path_comparators_take_precedence(self):
+        diff = SmallDiff.compare(
+            self.expected, self.actual, comparators={str: same_text, "links.*.url": lambda e, a: e == a}
+        )
+        self.assertEqual(list(diff), ["created", "links.0.url", "name"])
+
+    def test_patterns_match_list_positions(self):
+        links = {"links": [{"url": "a?x=1&y=2"}, {"url": "b?x=1&y=2"}]}
+        other = {"links": [{"url": "a?y=2&x=1"}, {"url": "b?y=2&x=1"}]}
+        self.assertEqual(list(SmallDiff.compare(links, other, comparators={"links.0.url": same_url})), ["links.1.url"])
+        self.assertEqual(len(SmallDiff.compare(links, other, comparators={"links.url": same_url})), 2)
+        self.assertEqual(SmallDiff.compare(links, other, comparators={"**.url": same_url}), {})
+        self.assertEqual(SmallDiff.compare(links["links"], other["links"], comparators={"*.url": same_url}), {})
+        diff = SmallDiff.compare(links, other, list_mode="align", comparators={"links.*.url": same_url})
+        self.assertEqual(diff, {})
+
+    def test_options_of_baselines_and_many_pairs(self):
+        options = dict(comparators={"email": same_text, "links.*.url": same_url}, exclude=["name", "created"])
+        expected = SmallDiff.compare(self.expected, self.actual, **options)
+        self.assertEqual(list(expected), ["links.0.title"])
+        self.assertEqual(SmallDiff.baseline(self.expected, **options).compare(self.actual), expected)
+        self.assertFalse(SmallDiff.baseline(self.expected, **options).is_equal(self.actual))
+        results = SmallDiff.compare_many([(self.expected, self.actual)], workers=1, **options)
+        self.assertEqual(list(results), [(0, expected)])
+
+    def test_type_comparators_of_normalized_values(self):
+        expected = {"name": "A", "at": datetime(2023, 4, 8)}
+        actual = {"name": "a", "at": datetime(2023, 4, 8, 0, 0, 30)}
+        comparators = {datetime: within_a_minute, str: same_text}
+        self.assertEqual(SmallDiff.compare(expected, actual, comparators=comparators), {})
+        with self.assertRaisesRegex(ValueError, "datetime"):
+            SmallDiff.baseline(expected, comparators=comparators)
+        with self.assertRaisesRegex(ValueError, "datetime"):
+            SmallDiff.compare(expected, actual, fingerprints=True, comparators=comparators)
+        with self.assertRaisesRegex(ValueError, "datetime"):
+            SmallDiff.compare(SmallDiff.snapshot(expected), actual, comparators=comparators)
+
+        self.assertEqual(Comparators(comparators).source_types, [datetime])
+        self.assertEqual(SmallDiff.baseline({"name": "A"}, comparators={str: same_text}).compare({"name": "a"}), {})
+        diff = SmallDiff.compare({"name": "A"}, {"name": "a"}, fingerprints=True, comparators={str: same_text})
+        self.assertEqual(diff, {})
+
+    def test_root_values(self):
+        self.assertTrue(SmallDiff.is_equal("A", "a", comparators={str: same_text}))
+        self.assertEqual(SmallDiff.compare([1, 2], [1, 3], comparators={int: lambda e, a: True}), {})
+
+    def test_registered_comparators(self):
+        class LenientDiff(SmallDiff):
+            pass
+
+        LenientDiff.register_comparator(str, same_text)
+        LenientDiff.register_comparator("created", within_a_minute)
+        self.assertEqual(list(LenientDiff.compare(self.expected, self.actual)), ["links.0.url", "name"])
+        self.assertEqual(len(SmallDiff.compare(self.expected, self.actual)), 5)
+        diff = LenientDiff.compare(self.expected, self.actual, comparators={"**.url": same_url})
+        self.assertEqual(list(diff), ["name"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import unittest
 import json
 from datetime import datetime, date
+from decimal import Decimal
 from enum import Enum
+from unittest import mock
+
+from pydantic import BaseModel
 
 from smalldiff.encoder import ModelEncoder
 
@@ -369,6 +373,56 @@ class TestModelEncoder(unittest.TestCase):
         actual = json.dumps(data, cls=CustomEncoder)
         self.assertEqual(actual, expected)
 
+    def test_register_handler(self):
+        """Test registering a handler per type without overriding default."""
+        class DecimalEncoder(ModelEncoder):
+            pass
+
+        class Price(Decimal):
+            pass
+
+        DecimalEncoder.register(Decimal, str)
+        data = {'price': Decimal('1.50'), 'sub': Price('2'), 'set': {1}}
+        self.assertEqual(json.dumps(data, cls=DecimalEncoder), '{"price": "1.50", "sub": "2", "set": [1]}')
+        with self.assertRaises(TypeError):
+            json.dumps(data, cls=ModelEncoder)
+
+    def test_registered_handler_overrides_builtin_conversion(self):
+        """Test that registered handlers come before the built-in ones and apply to subclass encoders."""
+        class DayEncoder(ModelEncoder):
+            pass
+
+        class ChildEncoder(DayEncoder):
+            pass
+
+        data = {'date': date(2023, 4, 8)}
+        self.assertEqual(json.dumps(data, cls=ChildEncoder), '{"date": "2023-04-08"}')
+        DayEncoder.register(date, lambda obj: obj.day)
+        self.assertEqual(json.dumps(data, cls=ChildEncoder), '{"date": 8}')
+        self.assertEqual(json.dumps(data, cls=ModelEncoder), '{"date": "2023-04-08"}')
+
+    def test_handler_resolved_once_per_type(self):
+        """Test that the handler of a type is resolved on its first instance only."""
+        class CachedEncoder(ModelEncoder):
+            pass
+
+        class Point:
+            def __init__(self, x):
+                self.x = x
+
+        with mock.patch.object(CachedEncoder, '_resolve', wraps=CachedEncoder._resolve) as resolve:
+            actual = json.dumps([Point(i) for i in range(10)], cls=CachedEncoder)
+        self.assertEqual(json.loads(actual), [{'x': i} for i in range(10)])
+        self.assertEqual(resolve.call_count, 1)
+
+    def test_encode_pydantic_model_with_extra_fields(self):
+        """Test that nested pydantic models are encoded with their extra fields."""
+        class Item(BaseModel, extra='allow'):
+            name: str
+
+        data = {'item': Item(name='pen', color='blue')}
+        self.assertEqual(json.loads(json.dumps(data, cls=ModelEncoder)), {'item': {'name': 'pen', 'color': 'blue'}})
+
 
 if __name__ == '__main__':
     unittest.main()
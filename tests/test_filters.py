@@ -0,0 +1,82 @@
+import unittest
+
+from smalldiff import SmallDiff
+from smalldiff.filters import PathFilter
+
+
+class TestPathFilter(unittest.TestCase):
+
+    def matches(self, path_filter, path):
+        return path_filter.state_of(tuple(path.split("."))) is not None
+
+    def test_exclude(self):
+        path_filter = PathFilter(None, ["meta", "*.updated_at", "items.*.etag", "tmp_*", "**.secret"])
+        for path in ("meta", "meta.version", "order.updated_at", "items.3.etag", "tmp_cache", "a.b.c.secret", "secret"):
+            self.assertFalse(self.matches(path_filter, path), path)
+        for path in ("updated_at", "order.id", "items.3.qty", "items.etag", "metadata", "a.b.c"):
+            self.assertTrue(self.matches(path_filter, path), path)
+
+    def test_include(self):
+        path_filter = PathFilter(["address.city", "items.*.qty"], ["items.0"])
+        for path in ("address", "address.city", "address.city.name", "items", "items.1", "items.1.qty"):
+            self.assertTrue(self.matches(path_filter, path), path)
+        for path in ("name", "address.zip", "items.1.sku", "items.0.qty"):
+            self.assertFalse(self.matches(path_filter, path), path)
+
+    def test_invalid_patterns(self):
+        with self.assertRaises(ValueError):
+            PathFilter(["a", ""], None)
+        self.assertIsNone(PathFilter.build(None, []))
+
+
+class TestFilteredCompare(unittest.TestCase):
+
+    expected = {
+        "id": 1,
+        "updated_at": "2024-01-01",
+        "meta": {"version": 1},
+        "items": [{"sku": "a", "qty": 1, "etag": "x"}, {"sku": "b", "qty": 2, "etag": "y"}],
+    }
+    actual = {
+        "id": 1,
+        "updated_at": "2024-01-02",
+        "meta": {"version": 2},
+        "items": [{"sku": "a", "qty": 1, "etag": "z"}, {"sku": "b", "qty": 3, "etag": "w"}],
+    }
+
+    def test_exclude(self):
+        diff = SmallDiff.compare(self.expected, self.actual, exclude=["updated_at", "meta", "items.*.etag"])
+        self.assertEqual(diff, {"items.1.qty": {"expected": 2, "actual": 3}})
+        self.assertTrue(SmallDiff.is_equal(
+            self.expected, self.actual, exclude=["updated_at", "meta.*", "items"]
+        ))
+
+    def test_include(self):
+        self.assertEqual(list(SmallDiff.compare(self.expected, self.actual, include=["meta"])), ["meta.version"])
+        self.assertEqual(
+            list(SmallDiff.iter_diff(self.expected, self.actual, include=["items.*"], exclude=["**.etag"])),
+            [("items.1.qty", 2, 3)]
+        )
+
+    def test_differences_on_the_way_to_an_included_path(self):
+        diff = SmallDiff.compare({"address": None}, {"address": {"city": "Dhaka"}}, include=["address.city"])
+        self.assertEqual(diff, {"address": {"expected": None, "actual": {"city": "Dhaka"}}})
+
+    def test_excluded_values_are_not_converted(self):
+        expected = {"id": 1, "handle": object()}
+        actual = {"id": 2, "handle": object()}
+        with self.assertRaises(TypeError):
+            SmallDiff.compare(expected, actual)
+        self.assertEqual(list(SmallDiff.compare(expected, actual, exclude=["handle"])), ["id"])
+
+    def test_keyed_and_aligned_lists(self):
+        expected = {"orders": [{"id": 1, "total": 5, "etag": "a"}]}
+        actual = {"orders": [{"id": 1, "total": 6, "etag": "b"}]}
+        diff = SmallDiff.compare(expected, actual, list_keys={"orders": "id"}, exclude=["orders.*.etag"])
+        self.assertEqual(list(diff), ["orders.1.total"])
+        diff = SmallDiff.compare([1, 2], [0, 1, 2, 3], list_mode="align", exclude=["+0"])
+        self.assertEqual(list(diff), ["+3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from smalldiff.fingerprint import Snapshot
+from smalldiff.normalizer import Normalizer
+
+
+class TestSnapshot(unittest.TestCase):
+
+    @staticmethod
+    def snapshot(data):
+        return Snapshot(Normalizer().normalize(data, keep_sets=True))
+
+    def test_equal_trees_have_equal_digests(self):
+        data = {"name": "John", "tags": ["a", "b"], "address": {"zip": 1227, "dist": "Dhaka"}}
+        same = {"address": {"dist": "Dhaka", "zip": 1227}, "tags": ["a", "b"], "name": "John"}
+        self.assertEqual(self.snapshot(data).digest, self.snapshot(same).digest)
+
+    def test_changed_leaf_changes_digest(self):
+        data = {"users": [{"id": 1, "roles": ["admin"]}, {"id": 2, "roles": []}]}
+        changed = {"users": [{"id": 1, "roles": ["admin"]}, {"id": 2, "roles": ["guest"]}]}
+        self.assertNotEqual(self.snapshot(data).digest, self.snapshot(changed).digest)
+
+        snapshot, other = self.snapshot(data), self.snapshot(changed)
+        first, second = snapshot.tree["users"], other.tree["users"]
+        self.assertEqual(snapshot.fingerprint(first[0]), other.fingerprint(second[0]))
+        self.assertNotEqual(snapshot.fingerprint(first[1]), other.fingerprint(second[1]))
+
+    def test_list_order_matters_but_set_order_does_not(self):
+        self.assertNotEqual(self.snapshot([1, 2, 3]).digest, self.snapshot([3, 2, 1]).digest)
+        self.assertEqual(self.snapshot({1, 2, 3}).digest, self.snapshot(frozenset([3, 2, 1])).digest)
+        self.assertNotEqual(self.snapshot({1, 4}).digest, self.snapshot({2, 3}).digest)
+        self.assertNotEqual(self.snapshot({1, 2}).digest, self.snapshot([1, 2]).digest)
+
+    def test_values_whose_hashes_collide(self):
+        self.assertEqual(hash(-1), hash(-2))
+        self.assertNotEqual(self.snapshot({"a": -1}).digest, self.snapshot({"a": -2}).digest)
+        self.assertNotEqual(self.snapshot(-1).digest, self.snapshot(-2).digest)
+        self.assertNotEqual(self.snapshot({"a": [1, 4]}).digest, self.snapshot({"a": [2, 3]}).digest)
+        self.assertNotEqual(self.snapshot(["a,b"]).digest, self.snapshot(["a", "b"]).digest)
+        self.assertNotEqual(self.snapshot([1]).digest, self.snapshot([True]).digest)
+        self.assertNotEqual(self.snapshot({"a": "b", "c": "d"}).digest, self.snapshot({"a": "d", "c": "b"}).digest)
+
+    def test_scalars_and_nan(self):
+        self.assertEqual(self.snapshot("a").digest, self.snapshot("a").digest)
+        snapshot, other = self.snapshot([float("nan")]), self.snapshot([float("nan")])
+        self.assertNotEqual(snapshot.digest, other.digest)
+        self.assertIsNone(self.snapshot({"a": 1}).fingerprint(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from smalldiff import SmallDiff
+from smalldiff.jsonl import pair_by_key
+
+
+class TestCompareJsonl(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, records, blank_lines=False):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+                if blank_lines:
+                    file.write("\n")
+        return path
+
+    def test_compare_by_line(self):
+        expected = [{"id": 1, "tags": ["a"]}, {"id": 2, "tags": []}, {"id": 3}]
+        actual = [{"id": 1, "tags": ["a"]}, {"id": 2, "tags": ["b"]}]
+        differences = list(SmallDiff.compare_jsonl(self.write("a.jsonl", expected), self.write("b.jsonl", actual)))
+        self.assertEqual(differences, [("2.tags.0", None, "b"), ("3", {"id": 3}, None)])
+
+    def test_filters_and_comparators(self):
+        expected = [{"id": 1, "name": "A", "score": 1.0}, {"id": 2, "name": "B"}, {"id": 3}]
+        actual = [{"id": 1, "name": "a", "score": 1.01}, {"id": 2, "name": "C"}]
+        paths = self.write("a.jsonl", expected), self.write("b.jsonl", actual)
+        differences = SmallDiff.compare_jsonl(
+            *paths, exclude=["3"], comparators={"*.name": lambda e, a: e.lower() == a.lower()}, abs_tol=0.1
+        )
+        self.assertEqual(list(differences), [("2.name", "B", "C")])
+        self.assertEqual(
+            list(SmallDiff.compare_jsonl(*paths, include=["*.score"])), [("1.score", 1.0, 1.01), ("3", {"id": 3}, None)]
+        )
+
+    def test_blank_lines_have_no_record(self):
+        records = [{"id": 1}, {"id": 2}]
+        differences = SmallDiff.compare_jsonl(
+            self.write("a.jsonl", records), self.write("b.jsonl", records, blank_lines=True)
+        )
+        self.assertEqual(list(differences), [("2", {"id": 2}, None), ("3", None, {"id": 2})])
+
+    def test_compare_by_key(self):
+        expected = [{"id": i, "name": f"user {i}", "orders": [{"sku": "a", "qty": i}]} for i in range(20)]
+        actual = [dict(record) for record in reversed(expected) if record["id"] != 5]
+        actual[0] = {**actual[0], "name": "changed"}
+        actual[3] = {**actual[3], "orders": [{"sku": "a", "qty": 0}, {"sku": "b", "qty": 1}]}
+        actual.append({"id": "new"})
+        expected_path, actual_path = self.write("a.jsonl", expected), self.write("b.jsonl", actual)
+
+        for buffer_size in (1, 3, 1000):
+            differences = list(SmallDiff.compare_jsonl(
+                expected_path, actual_path, key="id", list_keys={"orders": "sku"}, buffer_size=buffer_size
+            ))
+            self.assertEqual(differences, [
+                ('new', None, {"id": "new"}),
+                ("16.orders.a.qty", 16, 0),
+                ("16.orders.b", None, {"sku": "b", "qty": 1}),
+                ("19.name", "user 19", "changed"),
+                ("5", expected[5], None),
+            ])
+
+    def test_identical_files(self):
+        records = [{"id": i} for i in range(10)]
+        path = self.write("a.jsonl", records)
+        self.assertEqual(list(SmallDiff.compare_jsonl(path, path)), [])
+        self.assertEqual(list(SmallDiff.compare_jsonl(path, path, key="id", buffer_size=3)), [])
+
+    def test_invalid_keys(self):
+        valid = self.write("valid.jsonl", [{"id": 1}])
+        for records in ([{"id": 1}, {"id": 1}], [{"name": 1}], [[1]], [{"id": [1]}]):
+            with self.assertRaises(ValueError, msg=records):
+                list(SmallDiff.compare_jsonl(self.write("invalid.jsonl", records), valid, key="id"))
+
+    def test_duplicate_keys_across_runs(self):
+        path = self.write("a.jsonl", [{"id": 1}, {"id": 2}, {"id": 1}])
+        with self.assertRaises(ValueError):
+            list(pair_by_key(path, path, "id", buffer_size=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
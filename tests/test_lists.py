@@ -0,0 +1,70 @@
+import sys
+import unittest
+import random
+
+from smalldiff.lists import align, freeze, EQUAL, REPLACE, DELETE, INSERT
+
+
+class TestAlign(unittest.TestCase):
+
+    @staticmethod
+    def lcs_length(expected, actual):
+        lengths = [[0] * (len(actual) + 1) for _ in range(len(expected) + 1)]
+        for i in range(len(expected) - 1, -1, -1):
+            for j in range(len(actual) - 1, -1, -1):
+                if expected[i] == actual[j]:
+                    lengths[i][j] = lengths[i + 1][j + 1] + 1
+                else:
+                    lengths[i][j] = max(lengths[i + 1][j], lengths[i][j + 1])
+        return lengths[0][0]
+
+    def test_align_equal_sequences(self):
+        self.assertEqual(align([1, 2, 3], [1, 2, 3]), [(EQUAL, 0, 3, 0, 3)])
+
+    def test_align_empty_sequences(self):
+        self.assertEqual(align([], []), [])
+        self.assertEqual(align([], [1]), [(INSERT, 0, 0, 0, 1)])
+        self.assertEqual(align([1], []), [(DELETE, 0, 1, 0, 0)])
+
+    def test_align_insert_delete_replace(self):
+        self.assertEqual(
+            align(["a", "b", "c", "d"], ["x", "a", "c", "y"]),
+            [(INSERT, 0, 0, 0, 1), (EQUAL, 0, 1, 1, 2), (DELETE, 1, 2, 2, 2),
+             (EQUAL, 2, 3, 2, 3), (REPLACE, 3, 4, 3, 4)]
+        )
+
+    def test_align_is_minimal(self):
+        rnd = random.Random(7)
+        for _ in range(300):
+            expected = [rnd.randint(0, 3) for _ in range(rnd.randint(0, 12))]
+            actual = [rnd.randint(0, 3) for _ in range(rnd.randint(0, 12))]
+            opcodes = align(expected, actual)
+
+            i = j = matched = 0
+            for tag, e_start, e_end, a_start, a_end in opcodes:
+                self.assertEqual((e_start, a_start), (i, j))
+                if tag == EQUAL:
+                    self.assertEqual(expected[e_start:e_end], actual[a_start:a_end])
+                    matched += e_end - e_start
+                i, j = e_end, a_end
+            self.assertEqual((i, j), (len(expected), len(actual)))
+            self.assertEqual(matched, self.lcs_length(expected, actual))
+
+    def test_freeze(self):
+        self.assertEqual(freeze({"a": [1, {"b": 2}]}), freeze({"a": [1, {"b": 2}]}))
+        self.assertNotEqual(freeze({"a": [1, 2]}), freeze({"a": [2, 1]}))
+        self.assertNotEqual(freeze([]), freeze({}))
+        self.assertEqual(
+            freeze([{"a": [], "b": {}}, [1, [2]], 3]),
+            (frozenset({("a", ()), ("b", frozenset())}), (1, (2,)), 3)
+        )
+
+    def test_freeze_deeply_nested(self):
+        value = 1
+        for _ in range(sys.getrecursionlimit() * 2):
+            value = {"a": [value]}
+        self.assertEqual(freeze(value), freeze(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
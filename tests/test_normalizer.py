@@ -0,0 +1,168 @@
+import unittest
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, date
+from enum import Enum, IntEnum
+from typing import List, NamedTuple
+
+from smalldiff.encoder import ModelEncoder
+from smalldiff.normalizer import Normalizer
+
+try:
+    import attr
+except ImportError:
+    attr = None
+
+
+class Color(Enum):
+    RED = 1
+    GREEN = 2
+
+
+class Size(IntEnum):
+    SMALL = 1
+    LARGE = 2
+
+
+class TestNormalizer(unittest.TestCase):
+
+    def assert_same_as_json(self, data, encoder=ModelEncoder):
+        expected = json.loads(json.dumps(data, cls=encoder))
+        self.assertEqual(Normalizer(encoder).normalize(data), expected)
+
+    def test_normalize_native_types(self):
+        self.assert_same_as_json({"str": "a", "int": 1, "float": 1.5, "bool": True, "none": None})
+
+    def test_normalize_enums_and_dates(self):
+        data = {
+            "color": Color.RED,
+            "size": Size.LARGE,
+            "date": date(2023, 4, 8),
+            "datetime": datetime(2023, 4, 8, 12, 34, 56)
+        }
+        self.assert_same_as_json(data)
+
+    def test_normalize_collections(self):
+        data = {
+            "tuple": (1, (2, 3)),
+            "set": {1, 2, 3},
+            "frozenset": frozenset([4]),
+            "bytes": b"hello",
+            "bytearray": bytearray(b"world")
+        }
+        self.assert_same_as_json(data)
+
+    def test_normalize_objects(self):
+        class Person:
+            def __init__(self, name):
+                self.name = name
+                self.joined = date(2023, 1, 1)
+
+        class Team:
+            def to_dict(self):
+                return {"members": [Person("John"), Person("Jane")]}
+
+        self.assert_same_as_json({"team": Team()})
+
+    def test_normalize_dict_keys(self):
+        data = {1: "int", 2.5: "float", None: "none", False: "bool", Size.LARGE: "enum"}
+        self.assert_same_as_json(data)
+
+    def test_normalize_invalid_dict_key(self):
+        with self.assertRaises(TypeError):
+            Normalizer().normalize({(1, 2): "tuple"})
+
+    def test_normalize_circular_reference(self):
+        data = {"key": []}
+        data["key"].append(data)
+        with self.assertRaises(ValueError):
+            Normalizer().normalize(data)
+
+    def test_normalize_with_custom_encoder(self):
+        class DateEncoder(ModelEncoder):
+            def default(self, obj):
+                if isinstance(obj, date):
+                    return obj.strftime("%d/%m/%Y")
+                return super().default(obj)
+
+        self.assert_same_as_json({"date": date(2023, 4, 8)}, encoder=DateEncoder)
+
+    def test_normalize_with_default_function(self):
+        normalizer = Normalizer(default=lambda obj: f"custom_{obj.__class__.__name__}")
+        self.assertEqual(normalizer.normalize({"obj": object()}), {"obj": "custom_object"})
+
+    def test_normalize_unsupported_object(self):
+        with self.assertRaises(TypeError):
+            Normalizer().normalize(object())
+
+    def test_normalize_slots_objects(self):
+        class Base:
+            __slots__ = ('name', '__secret')
+
+            def __init__(self, name):
+                self.name = name
+                self.__secret = 1
+
+        class Point(Base):
+            __slots__ = 'x'
+
+        point = Point("a")
+        self.assertEqual(Normalizer().normalize([point]), [{"name": "a", "_Base__secret": 1}])
+        point.x = Color.RED
+        self.assertEqual(Normalizer().normalize(point), {"name": "a", "_Base__secret": 1, "x": 1})
+
+    def test_normalize_dataclasses(self):
+        @dataclass
+        class Line:
+            points: List[int] = field(default_factory=list)
+
+        @dataclass(frozen=True)
+        class Shape:
+            __slots__ = ('name', 'lines')
+            name: str
+            lines: List[Line]
+
+        shape = Shape("square", [Line([1, 2]), Line()])
+        self.assertEqual(Normalizer().normalize(shape), {"name": "square", "lines": [{"points": [1, 2]}, {"points": []}]})
+
+    def test_normalize_dataclasses_with_dict(self):
+        @dataclass
+        class Line:
+            points: List[int]
+
+        line = Line([1])
+        line.label = "a"
+        self.assertEqual(Normalizer().normalize(line), {"points": [1], "label": "a"})
+        self.assert_same_as_json({"line": line})
+
+    @unittest.skipIf(attr is None, "attrs is not installed")
+    def test_normalize_attrs_classes(self):
+        @attr.s(slots=True)
+        class Record:
+            id = attr.ib()
+            tags = attr.ib(factory=list)
+
+        self.assertEqual(Normalizer().normalize({"record": Record(7, {"a"})}), {"record": {"id": 7, "tags": ["a"]}})
+
+    def test_normalize_named_tuples_as_arrays(self):
+        class Pair(NamedTuple):
+            left: int
+            right: int
+
+        self.assert_same_as_json({"pair": Pair(1, 2)})
+
+    def test_normalize_deeply_nested(self):
+        data = "leaf"
+        for _ in range(sys.getrecursionlimit() * 2):
+            data = {"child": (data,)}
+
+        result = Normalizer().normalize(data)
+        for _ in range(sys.getrecursionlimit() * 2):
+            self.assertIsInstance(result["child"], list)
+            result = result["child"][0]
+        self.assertEqual(result, "leaf")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from unittest import mock
+
+from smalldiff import SmallDiff
+from smalldiff import numbers
+from smalldiff.numbers import is_close, numeric_mismatches
+
+
+class TestNumbers(unittest.TestCase):
+
+    def test_is_close(self):
+        self.assertTrue(is_close(1.0, 1.0 + 1e-12, 1e-9, 0.0))
+        self.assertTrue(is_close(0.0, 1e-9, 0.0, 1e-6))
+        self.assertFalse(is_close(1.0, 1.1, 1e-9, 0.0))
+        self.assertFalse(is_close(True, 1.0, 1e-9, 0.0))
+        self.assertFalse(is_close("1", 1, 1e-9, 0.0))
+        self.assertFalse(is_close(10 ** 20, 10 ** 20 + 1, 0.0, 1e-6))
+        self.assertFalse(is_close(10 ** 400, 1.0, 1e-9, 0.0))
+
+    def test_numeric_mismatches(self):
+        self.assertEqual(numeric_mismatches([1, 2.0, 3], [1, 2.5, 4]), [1, 2])
+        self.assertEqual(numeric_mismatches([1.0, 2.0, 3.0], [1.0, 2.0]), [])
+        self.assertEqual(numeric_mismatches([1.0, 2.0], [1.0 + 1e-12, 2.1], rel_tol=1e-9), [1])
+        self.assertIsNone(numeric_mismatches([1, "2"], [1, 2]))
+        self.assertIsNone(numeric_mismatches([1, True], [1, 1]))
+
+    def test_long_lists_are_compared_the_same_with_and_without_numpy(self):
+        expected = [float(i) for i in range(1000)] + [10 ** 20, float("nan"), float("inf")]
+        actual = [value * (1 + 1e-12) for value in expected[:1000]] + [10 ** 20 + 1, float("nan"), float("inf")]
+        actual[500] = 0.0
+        positions = numeric_mismatches(expected, actual, rel_tol=1e-9)
+        with mock.patch.object(numbers, "_numpy", return_value=None):
+            self.assertEqual(numeric_mismatches(expected, actual, rel_tol=1e-9), positions)
+        self.assertEqual(positions, [500, 1001])
+        self.assertEqual(numeric_mismatches(expected, actual, abs_tol=1e-6), [500, 1000, 1001])
+
+
+class TestTolerance(unittest.TestCase):
+
+    def test_floats_within_tolerance_are_equal(self):
+        expected = {"location": {"lat": 23.8103, "long": 90.4125}, "name": "Dhaka"}
+        actual = {"location": {"lat": 23.8103000001, "long": 90.4125}, "name": "Dhaka"}
+        self.assertEqual(list(SmallDiff.compare(expected, actual)), ["location.lat"])
+        self.assertEqual(SmallDiff.compare(expected, actual, rel_tol=1e-9), {})
+        self.assertTrue(SmallDiff.is_equal(expected, actual, abs_tol=1e-6))
+        self.assertEqual(SmallDiff.compare(1.0, 1.0 + 1e-12, rel_tol=1e-9), {})
+
+    def test_per_path_tolerances(self):
+        expected = {"locations": [{"lat": 1.0, "long": 2.0}], "price": 10.0}
+        actual = {"locations": [{"lat": 1.001, "long": 2.001}], "price": 10.001}
+        diff = SmallDiff.compare(expected, actual, tolerances={"locations.lat": (0.0, 0.01)})
+        self.assertEqual(list(diff), ["locations.0.long", "price"])
+        diff = SmallDiff.compare(expected, actual, abs_tol=0.01, tolerances={"price": (0.0, 0.0)})
+        self.assertEqual(list(diff), ["price"])
+
+    def test_lists_of_numbers(self):
+        expected = {"readings": [float(i) for i in range(300)]}
+        actual = {"readings": [value + 1e-9 for value in expected["readings"]]}
+        actual["readings"][7] = 70.0
+        self.assertEqual(len(SmallDiff.compare(expected, actual)), 300)
+        self.assertEqual(
+            SmallDiff.compare(expected, actual, abs_tol=1e-6),
+            {"readings.7": {"expected": 7.0, "actual": 70.0}}
+        )
+        self.assertEqual(
+            SmallDiff.compare(expected, actual, tolerances={"readings": (0.0, 1e-6)}),
+            {"readings.7": {"expected": 7.0, "actual": 70.0}}
+        )
+
+
+    def test_negative_tolerances(self):
+        expected = {"readings": [float(i) for i in range(300)]}
+        actual = {"readings": [value + 1 for value in expected["readings"]]}
+        for options in [dict(rel_tol=-0.1), dict(abs_tol=-1.0), dict(tolerances={"readings": (0.0, -1.0)})]:
+            with self.assertRaises(ValueError, msg=options):
+                SmallDiff.compare(expected, actual, **options)
+        with self.assertRaises(ValueError):
+            SmallDiff.compare(1, 2, rel_tol=-0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
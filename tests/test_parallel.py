@@ -0,0 +1,43 @@
+import unittest
+
+from smalldiff.parallel import parallel_map
+
+
+def square_all(chunk):
+    return [item * item for item in chunk]
+
+
+def fail_on_three(chunk):
+    if 3 in chunk:
+        raise ValueError("three")
+    return chunk
+
+
+class TestParallelMap(unittest.TestCase):
+
+    def test_ordered_results(self):
+        results = list(parallel_map(square_all, range(100), workers=2, chunksize=7))
+        self.assertEqual(results, [(i, i * i) for i in range(100)])
+
+    def test_unordered_results(self):
+        results = parallel_map(square_all, iter(range(100)), workers=3, chunksize=5, ordered=False)
+        self.assertEqual(sorted(results), [(i, i * i) for i in range(100)])
+
+    def test_single_worker_runs_in_process(self):
+        results = list(parallel_map(lambda chunk: [len(chunk)] * len(chunk), range(5), workers=1, chunksize=2))
+        self.assertEqual(results, [(0, 2), (1, 2), (2, 2), (3, 2), (4, 1)])
+
+    def test_empty_items(self):
+        self.assertEqual(list(parallel_map(square_all, [], workers=2)), [])
+
+    def test_worker_error_is_raised(self):
+        with self.assertRaises(ValueError):
+            list(parallel_map(fail_on_three, range(10), workers=2, chunksize=2))
+
+    def test_invalid_chunksize(self):
+        with self.assertRaises(ValueError):
+            list(parallel_map(square_all, range(10), chunksize=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import copy
+import unittest
+
+from pydantic import BaseModel
+
+from smalldiff import SmallDiff
+
+
+class Address(BaseModel):
+    city: str
+    zip: str
+
+
+class TestToPatch(unittest.TestCase):
+
+    def test_mappings(self):
+        patch = SmallDiff.to_patch(
+            {"name": "Alice", "address": {"city": "Dhaka", "zip": "1207"}, "a/b": 1},
+            {"name": "Alice", "address": {"city": "Sylhet"}, "tags": ["x"], "a/b": 2}
+        )
+        self.assertEqual(patch, [
+            {"op": "replace", "path": "/address/city", "value": "Sylhet"},
+            {"op": "remove", "path": "/address/zip"},
+            {"op": "replace", "path": "/a~1b", "value": 2},
+            {"op": "add", "path": "/tags", "value": ["x"]},
+        ])
+
+    def test_lists_are_aligned(self):
+        expected = {"items": [1, 2, 3, 4]}
+        actual = {"items": [0, 1, 3, 4, 5]}
+        self.assertEqual(SmallDiff.to_patch(expected, actual), [
+            {"op": "add", "path": "/items/0", "value": 0},
+            {"op": "remove", "path": "/items/2"},
+            {"op": "add", "path": "/items/4", "value": 5},
+        ])
+        by_position = SmallDiff.to_patch({"items": [1, 2, 3]}, {"items": [0, 1, 2, 3]}, list_mode="index")
+        self.assertEqual(len(by_position), 4)
+
+    def test_equal_and_root(self):
+        self.assertEqual(SmallDiff.to_patch({"a": [1]}, {"a": [1]}), [])
+        self.assertEqual(SmallDiff.to_patch(1, "x"), [{"op": "replace", "path": "", "value": "x"}])
+        self.assertEqual(
+            SmallDiff.to_patch(Address(city="Dhaka", zip="1"), Address(city="Dhaka", zip="2")),
+            [{"op": "replace", "path": "/zip", "value": "2"}]
+        )
+        with self.assertRaises(ValueError):
+            SmallDiff.to_patch([], [], list_mode="sorted")
+
+    def test_json_types_are_strict(self):
+        self.assertEqual(SmallDiff.to_patch({"a": 1}, {"a": True}), [{"op": "replace", "path": "/a", "value": True}])
+        self.assertEqual(
+            SmallDiff.to_patch({"a": [0]}, {"a": [False]}), [{"op": "replace", "path": "/a/0", "value": False}]
+        )
+        for list_mode in ("align", "index"):
+            self.assertEqual(
+                SmallDiff.to_patch([1, 2], [1.0, 2], list_mode=list_mode),
+                [{"op": "replace", "path": "/0", "value": 1.0}]
+            )
+        self.assertEqual(SmallDiff.to_patch({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}), [])
+
+    def test_round_trip(self):
+        expected = {
+            "orders": [{"id": 1, "items": ["a", "b"]}, {"id": 2, "items": []}, {"id": 3, "items": ["c"]}],
+            "meta": {"version": 1, "~tilde": None},
+        }
+        actual = {
+            "orders": [{"id": 0, "items": []}, {"id": 1, "items": ["b", "c"]}, {"id": 3, "items": ["c", "d"]}],
+            "meta": {"version": 2, "~tilde": {"nested": [1, 2]}},
+        }
+        for list_mode in ("align", "index"):
+            doc = copy.deepcopy(expected)
+            patched = SmallDiff.apply_patch(doc, SmallDiff.to_patch(expected, actual, list_mode=list_mode))
+            self.assertIs(patched, doc)
+            self.assertEqual(patched, actual)
+
+
+class TestApplyPatch(unittest.TestCase):
+
+    def test_operations(self):
+        doc = {"a": {"b": [1, 2]}, "c": 3}
+        patch = [
+            {"op": "test", "path": "/c", "value": 3},
+            {"op": "add", "path": "/a/b/-", "value": 4},
+            {"op": "add", "path": "/a/b/0", "value": 0},
+            {"op": "move", "from": "/c", "path": "/d"},
+            {"op": "copy", "from": "/a/b", "path": "/e"},
+            {"op": "remove", "path": "/a/b/1"},
+        ]
+        self.assertEqual(SmallDiff.apply_patch(doc, patch), {"a": {"b": [0, 2, 4]}, "d": 3, "e": [0, 1, 2, 4]})
+        self.assertEqual(SmallDiff.apply_patch({"a": 1}, [{"op": "replace", "path": "", "value": [1]}]), [1])
+
+    def test_patch_values_are_copied(self):
+        value = {"x": [1]}
+        doc = SmallDiff.apply_patch({}, [{"op": "add", "path": "/v", "value": value}])
+        doc["v"]["x"].append(2)
+        self.assertEqual(value, {"x": [1]})
+
+    def test_test_operation_compares_json_types(self):
+        doc = {"a": 1, "list": [1, {"b": True}]}
+        for path, value in [("/a", True), ("/list", [1, {"b": 1}]), ("/list/1", {"b": 1.0}), ("/a", "1")]:
+            with self.assertRaises(ValueError, msg=value):
+                SmallDiff.apply_patch(doc, [{"op": "test", "path": path, "value": value}])
+        self.assertEqual(SmallDiff.apply_patch(doc, [
+            {"op": "test", "path": "/a", "value": 1.0},
+            {"op": "test", "path": "/list", "value": [1.0, {"b": True}]},
+        ]), doc)
+
+    def test_invalid_operations(self):
+        invalid = [
+            {"op": "test", "path": "/a", "value": 2},
+            {"op": "replace", "path": "/b", "value": 1},
+            {"op": "remove", "path": "/list/2"},
+            {"op": "add", "path": "/list/01", "value": 1},
+            {"op": "add", "path": "a", "value": 1},
+            {"op": "add", "path": "/a/b", "value": 1},
+            {"op": "add", "path": "/b"},
+            {"op": "move", "from": "/list", "path": "/list/0"},
+            {"op": "rename", "path": "/a"},
+            {"op": "remove", "path": ""},
+        ]
+        for operation in invalid:
+            with self.assertRaises(ValueError, msg=operation):
+                SmallDiff.apply_patch({"a": 1, "list": [1, 2]}, [operation])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from smalldiff import SmallDiff, JsonReporter, JsonLinesReporter, SummaryReporter, TextReporter
+
+
+class TestReporters(unittest.TestCase):
+
+    expected = {"name": "Alice", "address": {"city": "Dhaka", "zip": "1207"}, "tags": ["a", "b"]}
+    actual = {"name": "Alicia", "address": {"city": "Sylhet"}, "tags": ["a"], "age": 30}
+
+    def report(self, reporter_type, expected=None, actual=None, **options):
+        stream = io.StringIO()
+        count = SmallDiff.report(
+            self.expected if expected is None else expected,
+            self.actual if actual is None else actual,
+            reporter_type(stream, **options)
+        )
+        return count, stream.getvalue()
+
+    def test_json_is_the_diff_of_compare(self):
+        cases = [
+            (self.expected, self.actual),
+            ({"a": 1}, {"a": 1}),
+            (1, 2),
+            ({"a": {"b": [1, {"c": None}]}}, {"a": {"b": [2]}}),
+        ]
+        for expected, actual in cases:
+            count, output = self.report(JsonReporter, expected, actual)
+            diff = SmallDiff.compare(expected, actual)
+            self.assertEqual(output, json.dumps(diff, indent=2) + "\n")
+            self.assertEqual(count, 1 if "expected" in diff else len(diff))
+
+    def test_values_reported_as_they_are(self):
+        count, output = self.report(JsonLinesReporter, [1], [1, {2}])
+        self.assertEqual((count, json.loads(output)), (1, {"path": "1", "expected": None, "actual": [2]}))
+
+    def test_json_lines(self):
+        count, output = self.report(JsonLinesReporter)
+        self.assertEqual(count, 5)
+        lines = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(lines[0], {"path": "name", "expected": "Alice", "actual": "Alicia"})
+        self.assertEqual(lines[-1], {"path": "age", "expected": None, "actual": 30})
+
+    def test_text(self):
+        _, output = self.report(TextReporter)
+        self.assertEqual(output, "\n".join([
+            "--- expected",
+            "+++ actual",
+            "@@ name @@", '-"Alice"', '+"Alicia"',
+            "@@ address.city @@", '-"Dhaka"', '+"Sylhet"',
+            "@@ address.zip @@", '-"1207"',
+            "@@ tags.1 @@", '-"b"',
+            "@@ age @@", "+30",
+        ]) + "\n")
+
+    def test_summary(self):
+        _, output = self.report(SummaryReporter, top=2)
+        self.assertEqual(output, "\n".join([
+            "5 differences: 1 added, 2 removed, 2 changed",
+            "  address  2",
+            "  name     1",
+            "  ... 2 more",
+        ]) + "\n")
+
+    def test_none_values_are_changed(self):
+        _, output = self.report(SummaryReporter, {"a": None, "b": 1}, {"a": 1})
+        self.assertEqual(output.splitlines()[0], "2 differences: 0 added, 1 removed, 1 changed")
+        _, output = self.report(TextReporter, {"a": None}, {"a": 1})
+        self.assertEqual(output.splitlines()[2:], ["@@ a @@", "-null", "+1"])
+
+    def test_reporters_take_iter_diff(self):
+        stream = io.StringIO()
+        JsonLinesReporter(stream).report(SmallDiff.iter_diff(self.expected, self.actual))
+        self.assertEqual(len(stream.getvalue().splitlines()), 5)
+
+    def test_reporters_take_diff_result(self):
+        expected = {"a": None, **self.expected}
+        for reporter_type in (TextReporter, SummaryReporter, JsonLinesReporter):
+            stream = io.StringIO()
+            count = reporter_type(stream).report(SmallDiff.compare(expected, self.actual, compact=True))
+            self.assertEqual((count, stream.getvalue()), self.report(reporter_type, expected))
+
+    def test_default_reporter_and_print_diff(self):
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertEqual(SmallDiff.report(self.expected, self.actual, max_diffs=2), 2)
+        self.assertEqual(json.loads(stdout.getvalue()), SmallDiff.compare(self.expected, self.actual, max_diffs=2))
+
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            diff = SmallDiff.compare(self.expected, self.actual, print_diff=True)
+        self.assertEqual(
+            stdout.getvalue(),
+            "\n============================= expected vs actual ==============================\n"
+            + json.dumps(diff, indent=2) + "\n"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import pickle
+import unittest
+
+from smalldiff import SmallDiff
+from smalldiff.result import DiffResult, ADDED, CHANGED, REMOVED
+
+
+class TestDiffResult(unittest.TestCase):
+
+    expected = {
+        "name": "Alice",
+        "address": {"city": "Dhaka", "zip": "1207"},
+        "orders": [{"id": 1, "qty": 1}, {"id": 10, "qty": 2}],
+        "tags": ["a", "b", "c"],
+    }
+    actual = {
+        "name": "Alicia",
+        "address": {"city": "Dhaka"},
+        "orders": [{"id": 1, "qty": 3}, {"id": 10, "qty": 2, "note": "gift"}],
+        "tags": ["a", "b"],
+        "active": True,
+    }
+
+    def test_same_diff_as_compare(self):
+        result = SmallDiff.compare(self.expected, self.actual, compact=True)
+        self.assertIsInstance(result, DiffResult)
+        self.assertEqual(result.to_dict(), SmallDiff.compare(self.expected, self.actual))
+        self.assertEqual(len(result), 6)
+        self.assertEqual(list(result.paths()), list(SmallDiff.compare(self.expected, self.actual)))
+        self.assertEqual(SmallDiff.compare(1, 2, compact=True).to_dict(), {"expected": 1, "actual": 2})
+        self.assertFalse(SmallDiff.compare(self.expected, self.expected, compact=True))
+        self.assertEqual(len(SmallDiff.compare(self.expected, self.actual, max_diffs=2, compact=True)), 2)
+
+    def test_kinds(self):
+        result = SmallDiff.compare(self.expected, self.actual, compact=True)
+        self.assertEqual(list(result), [
+            ("name", "Alice", "Alicia", CHANGED),
+            ("address.zip", "1207", None, REMOVED),
+            ("orders.0.qty", 1, 3, CHANGED),
+            ("orders.1.note", None, "gift", ADDED),
+            ("tags.2", "c", None, REMOVED),
+            ("active", None, True, ADDED),
+        ])
+
+    def test_kinds_of_none_values(self):
+        result = SmallDiff.compare({"a": None, "b": 1}, {"a": 1, "b": None}, compact=True)
+        self.assertEqual(list(result), [("a", None, 1, CHANGED), ("b", 1, None, CHANGED)])
+        self.assertEqual(result.count(CHANGED), 2)
+        self.assertEqual(list(DiffResult([(("a",), None, 1)])), [("a", None, 1, ADDED)])
+
+    def test_filter_count_and_group(self):
+        result = SmallDiff.compare(self.expected, self.actual, compact=True)
+        self.assertEqual(result.count(), 6)
+        self.assertEqual(result.count(ADDED), 2)
+        self.assertEqual(result.count(prefix="orders"), 2)
+        self.assertEqual(result.count(REMOVED, prefix="tags"), 1)
+        self.assertEqual(list(result.filter(prefix="orders.1").paths()), ["orders.1.note"])
+        self.assertEqual(result.count(prefix="order"), 0)
+        self.assertEqual(list(result.filter(CHANGED).paths()), ["name", "orders.0.qty"])
+        groups = result.group_by_prefix()
+        self.assertEqual(list(groups), ["name", "address", "orders", "tags", "active"])
+        self.assertEqual(list(groups["orders"].paths()), ["orders.0.qty", "orders.1.note"])
+        self.assertEqual(list(result.group_by_prefix(2)), [
+            "name", "address.zip", "orders.0", "orders.1", "tags.2", "active"
+        ])
+
+    def test_pickle(self):
+        result = SmallDiff.compare(self.expected, self.actual, compact=True)
+        self.assertEqual(list(pickle.loads(pickle.dumps(result))), list(result))
+
+    def test_compare_many(self):
+        results = dict(SmallDiff.compare_many([(self.expected, self.actual)], workers=1, compact=True))
+        self.assertEqual(results[0].to_dict(), SmallDiff.compare(self.expected, self.actual))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,19 @@
+import copy
+import io
+import sys
+import types
 import unittest
 from datetime import datetime
 from typing import List
+from unittest.mock import patch
+
+from pydantic import BaseModel
 
 from schema import LocationModel, Gender
+import smalldiff
 from smalldiff import SmallDiff
 from smalldiff.encoder import ModelEncoder
+from smalldiff.walker import DiffWalker
 from tests.schema import PersonModel, AddressModel
 
 
@@ -562,6 +571,569 @@ class TestSmallDiff(unittest.TestCase):
         diff = SmallDiff.compare(1+2j, 1+3j, print_diff=False)
         self.assertNotEqual(diff, {})
 
+    def test_identical_subtrees_are_not_normalized(self):
+        """Test that shared sub-objects are skipped without being converted."""
+        class Exploding:
+            def to_dict(self):
+                raise AssertionError("identical subtree should not be normalized")
+
+        shared = Exploding()
+        diff = SmallDiff.compare({"name": "John", "meta": shared}, {"name": "Jane", "meta": shared})
+        self.assertEqual(diff, {"name": {"expected": "John", "actual": "Jane"}})
+
+    def test_objects_are_normalized_on_descent(self):
+        """Test that nested objects are converted one level at a time."""
+        calls = []
+
+        class Node:
+            def __init__(self, name, child=None):
+                self.name = name
+                self.child = child
+
+            def to_dict(self):
+                calls.append(self.name)
+                return {"name": self.name, "child": self.child}
+
+        expected = Node("root", Node("left", Node("leaf")))
+        actual = Node("root", Node("right", Node("leaf")))
+        diff = SmallDiff.compare(expected, actual)
+        self.assertEqual(diff, {"child.name": {"expected": "left", "actual": "right"}})
+        self.assertEqual(calls.count("root"), 2)
+
+    def test_top_level_list_items(self):
+        """Test that a top level list reports its objects as a whole and its extra items by int position."""
+        address = AddressModel(street="123 Main St.", dist="Dhaka", zip=1227)
+        person_list_1 = [PersonModel(name="John Doe", age=25, gender=Gender.M, address=address)]
+        person_list_2 = [PersonModel(name="John Doe", age=26, gender=Gender.M, address=address)]
+        diff = SmallDiff.compare(person_list_1, person_list_2)
+        self.assertEqual(list(diff), ["0"])
+        self.assertEqual(diff["0"]["expected"]["age"], 25)
+        self.assertEqual(diff["0"]["actual"]["address"], {"street": "123 Main St.", "dist": "Dhaka", "zip": 1227})
+        self.assertEqual(
+            SmallDiff.compare({"people": person_list_1}, {"people": person_list_2}),
+            {"people.0.age": {"expected": 25, "actual": 26}}
+        )
+
+        diff = SmallDiff.compare([{"a": 1}, [1, 2], (1, 2)], [{"a": 2}, [1, 3], (1, 3), (4,), 5])
+        self.assertEqual(diff, {
+            "0.a": {"expected": 1, "actual": 2},
+            "1.1": {"expected": 2, "actual": 3},
+            "2": {"expected": [1, 2], "actual": [1, 3]},
+            3: {"expected": None, "actual": (4,)},
+            4: {"expected": None, "actual": 5},
+        })
+        self.assertEqual(list(SmallDiff.iter_diff([1], [1, 2])), [("1", None, 2)])
+
+        diff = SmallDiff.compare([{"p": person_list_1[0], "q": [address]}], [{"p": person_list_2[0], "q": [{}]}])
+        self.assertEqual(diff, {
+            "0.p": {"expected": person_list_1[0], "actual": person_list_2[0]},
+            "0.q.0": {"expected": {"street": "123 Main St.", "dist": "Dhaka", "zip": 1227}, "actual": {}},
+        })
+        self.assertEqual(SmallDiff.compare([1], [1, 2], compact=True).to_dict(), {1: {"expected": None, "actual": 2}})
+
+    def test_keyed_lists_under_top_level_list(self):
+        """Test that the keyed and unordered lists of top level list items report their records by key."""
+        expected = [{"items": [{"id": 0, "q": 1}, {"id": 1, "q": 1}], "tags": ["a", "b"]}]
+        actual = [{"items": [{"id": 1, "q": 1}, {"id": 0, "q": 2}, {"id": 3, "q": 1}], "tags": ["c", "a"]}]
+        diff = {
+            "0.items.0.q": {"expected": 1, "actual": 2},
+            "0.items.3": {"expected": None, "actual": {"id": 3, "q": 1}},
+            "0.tags.1": {"expected": "b", "actual": None},
+            "0.tags.+0": {"expected": None, "actual": "c"},
+        }
+        options = {"list_keys": {"items": "id"}, "unordered": ["tags"]}
+
+        self.assertEqual(SmallDiff.compare(expected, actual, **options), diff)
+        self.assertEqual(SmallDiff.compare(expected, actual, fingerprints=True, **options), diff)
+        self.assertEqual(SmallDiff.compare(expected, actual, compact=True, **options).to_dict(), diff)
+        self.assertEqual(
+            [(path, {"expected": expected_val, "actual": actual_val})
+             for path, expected_val, actual_val in SmallDiff.iter_diff(expected, actual, **options)],
+            list(diff.items())
+        )
+        self.assertEqual(
+            SmallDiff.compare([{"items": [{"id": 5, "q": 1}]}], [{"items": [{"id": 5, "q": 2}]}], **options),
+            {"0.items.5.q": {"expected": 1, "actual": 2}}
+        )
+
+    def test_nested_models_match_their_json(self):
+        """Test that nested models are compared the same as their JSON, dates and enums included."""
+        class Visit(BaseModel):
+            at: datetime
+            person: PersonModel
+
+        def visits(age):
+            return [
+                Visit(at=datetime(2023, 4, 8, hour), person=PersonModel(
+                    name="John Doe", age=age if hour == 3 else 25, gender=Gender.M,
+                    address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227)
+                ))
+                for hour in range(5)
+            ]
+
+        expected, actual = visits(25), visits(26)
+        actual[1] = Visit(at=datetime(2023, 4, 9), person=actual[1].person)
+        self.assertEqual(SmallDiff.compare({"visits": expected}, {"visits": actual}), {
+            "visits.1.at": {"expected": "2023-04-08T01:00:00", "actual": "2023-04-09T00:00:00"},
+            "visits.3.person.age": {"expected": 25, "actual": 26}
+        })
+        self.assertEqual(SmallDiff.compare({"visits": [expected[0]]}, {"visits": [Visit(
+            at=datetime(2023, 4, 8), person=PersonModel(
+                name="John Doe", age=25, gender=Gender.F, address=AddressModel(street="1", dist="Dhaka", zip=1227)
+            )
+        )]}), {
+            "visits.0.person.address.street": {"expected": "123 Main St.", "actual": "1"},
+            "visits.0.person.gender": {"expected": "Male", "actual": "Female"}
+        })
+
+    def test_model_with_arbitrary_type_falls_back_to_encoder(self):
+        """Test that a model field pydantic cannot serialize is converted by the encoder."""
+        class Point:
+            def __init__(self, x):
+                self.x = x
+
+        class Shape(BaseModel, arbitrary_types_allowed=True):
+            name: str
+            point: Point
+
+        diff = SmallDiff.compare(
+            {"shapes": [Shape(name="a", point=Point(1))]}, {"shapes": [Shape(name="a", point=Point(2))]}
+        )
+        self.assertEqual(diff, {"shapes.0.point.x": {"expected": 1, "actual": 2}})
+
+    def test_compare_slots_objects(self):
+        """Test that objects with __slots__ are compared by their fields."""
+        class Point:
+            __slots__ = ('x', 'y')
+
+            def __init__(self, x, y):
+                self.x = x
+                self.y = y
+
+        diff = SmallDiff.compare({"points": [Point(1, 2), Point(3, 4)]}, {"points": [Point(1, 2), Point(3, 5)]})
+        self.assertEqual(diff, {"points.1.y": {"expected": 4, "actual": 5}})
+
+    def test_is_equal_stops_at_first_difference(self):
+        """Test that is_equal returns before reaching later values."""
+        class Exploding:
+            def to_dict(self):
+                raise AssertionError("is_equal should stop at the first difference")
+
+        expected = {"name": "John", "meta": Exploding()}
+        actual = {"name": "Jane", "meta": Exploding()}
+        self.assertFalse(SmallDiff.is_equal(expected, actual))
+
+    def test_is_equal_does_not_print_by_default(self):
+        """Test that is_equal prints the diff only when asked."""
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertFalse(SmallDiff.is_equal({"key": "value1"}, {"key": "value2"}))
+        self.assertEqual(stdout.getvalue(), "")
+
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertFalse(SmallDiff.is_equal({"key": "value1"}, {"key": "value2"}, print_diff=True))
+        self.assertIn('"key"', stdout.getvalue())
+
+    def test_is_equal_nested_structures(self):
+        """Test is_equal on nested dictionaries and lists of different shapes."""
+        self.assertTrue(SmallDiff.is_equal({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}))
+        self.assertFalse(SmallDiff.is_equal({"a": [1, {"b": 2}]}, {"a": [1, {"b": 3}]}))
+        self.assertFalse(SmallDiff.is_equal({"a": [1, 2]}, {"a": [1, 2, 3]}))
+        self.assertFalse(SmallDiff.is_equal({"a": 1}, {"b": 1}))
+        self.assertFalse(SmallDiff.is_equal({"a": {"b": 1}}, {"a": [1]}))
+
+    def test_compare_max_diffs(self):
+        """Test that compare stops after max_diffs differences."""
+        expected = {"a": 1, "b": {"c": 2, "d": 3}, "e": [4, 5], "f": 6}
+        actual = {"a": 0, "b": {"c": 0, "d": 0}, "e": [0, 0, 7], "f": 0}
+
+        diff = SmallDiff.compare(expected, actual, max_diffs=2)
+        self.assertEqual(list(diff), ["a", "b.c"])
+
+        diff = SmallDiff.compare(expected, actual, max_diffs=4)
+        self.assertEqual(list(diff), ["a", "b.c", "b.d", "e.0"])
+
+        self.assertEqual(len(SmallDiff.compare(expected, actual)), 7)
+
+    def test_deeply_nested_structures(self):
+        """Test that nesting deeper than the recursion limit can be compared."""
+        def nested(depth, leaf):
+            value = leaf
+            for _ in range(depth):
+                value = {"child": [value]}
+            return value
+
+        depth = sys.getrecursionlimit() * 2
+        diff = SmallDiff.compare(nested(depth, 1), nested(depth, 2))
+        self.assertEqual(diff, {".".join(["child.0"] * depth): {"expected": 1, "actual": 2}})
+        self.assertTrue(SmallDiff.is_equal(nested(depth, 1), nested(depth, 1)))
+        self.assertFalse(SmallDiff.is_equal(nested(depth, 1), nested(depth, 2)))
+
+    def test_deeply_nested_list_items(self):
+        """Test that deeply nested list items can be aligned, compared unordered and patched."""
+        value = 1
+        for _ in range(sys.getrecursionlimit() * 2):
+            value = [value]
+
+        diff = SmallDiff.compare({"a": [value, 1]}, {"a": [0, value, 1]}, list_mode="align")
+        self.assertEqual(diff, {"a.+0": {"expected": None, "actual": 0}})
+        self.assertEqual(SmallDiff.compare({"a": [value, 1]}, {"a": [1, value]}, unordered=["a"]), {})
+        self.assertEqual(SmallDiff.to_patch([value], [0, value]), [{"op": "add", "path": "/0", "value": 0}])
+
+    def test_deeply_nested_missing_value(self):
+        """Test that a deeply nested value is normalized when it is reported."""
+        value = 1
+        for _ in range(sys.getrecursionlimit() * 2):
+            value = [value]
+
+        diff = SmallDiff.compare({"a": value}, {"b": 1})
+        self.assertEqual(diff["b"], {"expected": None, "actual": 1})
+        self.assertIsNone(diff["a"]["actual"])
+
+    def test_iter_diff(self):
+        """Test that iter_diff yields the same differences as compare."""
+        expected = {"name": "John", "address": {"dist": "Dhaka", "zip": 1227}, "tags": ["a", "b"]}
+        actual = {"name": "John", "address": {"dist": "Magura", "zip": 7600}, "tags": ["a"], "age": 28}
+
+        differences = list(SmallDiff.iter_diff(expected, actual))
+        self.assertEqual(differences, [
+            ("address.dist", "Dhaka", "Magura"),
+            ("address.zip", 1227, 7600),
+            ("tags.1", "b", None),
+            ("age", None, 28)
+        ])
+        self.assertEqual(
+            {path: {"expected": e, "actual": a} for path, e, a in differences},
+            SmallDiff.compare(expected, actual)
+        )
+
+    def test_iter_diff_stops_early(self):
+        """Test that iter_diff does not walk beyond what is consumed."""
+        class Exploding:
+            def to_dict(self):
+                raise AssertionError("iter_diff should not reach this value")
+
+        differences = SmallDiff.iter_diff({"a": 1, "b": Exploding()}, {"a": 2, "b": Exploding()})
+        self.assertEqual(next(differences), ("a", 1, 2))
+
+    def test_iter_diff_equal_and_primitive_values(self):
+        """Test iter_diff on equal objects and on primitives."""
+        self.assertEqual(list(SmallDiff.iter_diff({"a": 1}, {"a": 1})), [])
+        self.assertEqual(list(SmallDiff.iter_diff(1, 2)), [("", 1, 2)])
+        with self.assertRaises(TypeError):
+            SmallDiff.iter_diff(1, "1")
+
+    def test_align_list_mode_insertion(self):
+        """Test that an inserted item is reported once in align mode."""
+        expected = {"items": list(range(1000))}
+        actual = {"items": [-1] + list(range(1000))}
+
+        self.assertEqual(len(SmallDiff.compare(expected, actual)), 1001)
+        self.assertEqual(
+            SmallDiff.compare(expected, actual, list_mode="align"),
+            {"items.+0": {"expected": None, "actual": -1}}
+        )
+
+    def test_align_list_mode_changes_and_deletions(self):
+        """Test that align mode reports removed items and descends into changed ones."""
+        expected = [{"id": 1, "v": "a"}, {"id": 2, "v": "b"}, {"id": 3, "v": "c"}, {"id": 4, "v": "d"}]
+        actual = [{"id": 1, "v": "a"}, {"id": 3, "v": "x"}, {"id": 4, "v": "d"}, {"id": 5, "v": "e"}]
+
+        diff = SmallDiff.compare(expected, actual, list_mode="align")
+        self.assertEqual(diff, {
+            "1.id": {"expected": 2, "actual": 3},
+            "1.v": {"expected": "b", "actual": "x"},
+            "2": {"expected": {"id": 3, "v": "c"}, "actual": None},
+            "+3": {"expected": None, "actual": {"id": 5, "v": "e"}}
+        })
+
+    def test_align_list_mode_equal_lists(self):
+        """Test that equal lists have no diff in align mode."""
+        expected = {"persons": [PersonModel(name="John Doe", age=28, gender=Gender.M,
+                                            address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227))]}
+        actual = {"persons": [PersonModel(name="John Doe", age=28, gender=Gender.M,
+                                          address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227))]}
+        self.assertEqual(SmallDiff.compare(expected, actual, list_mode="align"), {})
+
+    def test_invalid_list_mode(self):
+        """Test that an unknown list mode is rejected."""
+        with self.assertRaises(ValueError):
+            SmallDiff.compare([1], [2], list_mode="unknown")
+
+    def test_list_keys(self):
+        """Test that lists of records are matched by their key field."""
+        expected = {
+            "orders": [
+                {"id": 1, "items": [{"sku": "a", "qty": 1}, {"sku": "b", "qty": 2}]},
+                {"id": 2, "items": []},
+                {"id": 3, "items": []}
+            ]
+        }
+        actual = {
+            "orders": [
+                {"id": 4, "items": []},
+                {"id": 3, "items": []},
+                {"id": 1, "items": [{"sku": "b", "qty": 3}, {"sku": "a", "qty": 1}]}
+            ]
+        }
+
+        diff = SmallDiff.compare(expected, actual, list_keys={"orders": "id", "orders.items": "sku"})
+        self.assertEqual(diff, {
+            "orders.1.items.b.qty": {"expected": 2, "actual": 3},
+            "orders.2": {"expected": {"id": 2, "items": []}, "actual": None},
+            "orders.4": {"expected": None, "actual": {"id": 4, "items": []}}
+        })
+
+    def test_list_keys_reordered_records_are_equal(self):
+        """Test that the order of keyed records does not matter."""
+        expected = [{"id": 1, "name": "John"}, {"id": 2, "name": "Jane"}]
+        actual = [{"id": 2, "name": "Jane"}, {"id": 1, "name": "John"}]
+
+        self.assertFalse(SmallDiff.is_equal(expected, actual))
+        self.assertTrue(SmallDiff.is_equal(expected, actual, list_keys={"": "id"}))
+        self.assertEqual(list(SmallDiff.iter_diff(expected, actual, list_keys={"": "id"})), [])
+
+    def test_list_keys_with_models(self):
+        """Test that records given as models are matched by their key field."""
+        expected = {"persons": [
+            PersonModel(name="John Doe", age=28, gender=Gender.M,
+                        address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227)),
+            PersonModel(name="Jane Doe", age=26, gender=Gender.F,
+                        address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227))
+        ]}
+        actual = {"persons": [
+            PersonModel(name="Jane Doe", age=27, gender=Gender.F,
+                        address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227)),
+            PersonModel(name="John Doe", age=28, gender=Gender.M,
+                        address=AddressModel(street="123 Main St.", dist="Dhaka", zip=1227))
+        ]}
+
+        diff = SmallDiff.compare(expected, actual, list_keys={"persons": "name"})
+        self.assertEqual(diff, {"persons.Jane Doe.age": {"expected": 26, "actual": 27}})
+
+    def test_list_keys_invalid_records(self):
+        """Test that records which cannot be matched by their key are rejected."""
+        with self.assertRaises(ValueError):
+            SmallDiff.compare({"orders": [{"id": 1}]}, {"orders": [{"sku": 1}]}, list_keys={"orders": "id"})
+
+        with self.assertRaises(ValueError):
+            SmallDiff.compare({"orders": [{"id": 1}, {"id": 1}]}, {"orders": []}, list_keys={"orders": "id"})
+
+    def test_sets_are_compared_regardless_of_order(self):
+        """Test that sets report only their missing and extra items."""
+        expected = {"tags": {"red", "green", "blue"}, "ids": frozenset(range(100))}
+        actual = {"tags": {"blue", "green", "red"}, "ids": frozenset(range(1, 101))}
+
+        diff = SmallDiff.compare(expected, actual)
+        self.assertEqual(len(diff), 2)
+        self.assertEqual(sorted(val["expected"] for val in diff.values() if val["expected"] is not None), [0])
+        self.assertEqual(sorted(val["actual"] for val in diff.values() if val["actual"] is not None), [100])
+
+        self.assertTrue(SmallDiff.is_equal({"tags": {1, 2, 3}}, {"tags": {3, 2, 1}}))
+
+    def test_set_items_are_keyed_by_their_sorted_position(self):
+        """Test that set items are keyed by their position in sorted order, whatever the hash seed."""
+        expected = {"tags": {"red", "green", "blue", ("x", 1), None}}
+        actual = {"tags": {"red", "green", "black", ("x", 2), None}}
+        self.assertEqual(SmallDiff.compare(expected, actual), {
+            "tags.1": {"expected": "blue", "actual": None},
+            "tags.4": {"expected": ["x", 1], "actual": None},
+            "tags.+1": {"expected": None, "actual": "black"},
+            "tags.+4": {"expected": None, "actual": ["x", 2]},
+        })
+        self.assertEqual(SmallDiff.compare(expected, actual, fingerprints=True), SmallDiff.compare(expected, actual))
+
+    def test_unordered_lists(self):
+        """Test that lists flagged as unordered are compared as multisets."""
+        expected = {"orders": [{"tags": ["a", "b", "b"]}, {"tags": ["c"]}]}
+        actual = {"orders": [{"tags": ["b", "a"]}, {"tags": ["d", "c"]}]}
+
+        diff = SmallDiff.compare(expected, actual, unordered=["orders.tags"])
+        self.assertEqual(diff, {
+            "orders.0.tags.2": {"expected": "b", "actual": None},
+            "orders.1.tags.+0": {"expected": None, "actual": "d"}
+        })
+        self.assertTrue(SmallDiff.is_equal([{"a": 1}, {"b": 2}], [{"b": 2}, {"a": 1}], unordered=[""]))
+
+    def test_compare_with_fingerprints(self):
+        """Test that fingerprints give the same differences as a full walk."""
+        expected = {"users": [{"id": i, "tags": {"a", "b"}} for i in range(10)], "name": "John"}
+        actual = {"users": [{"id": i, "tags": {"b", "a"}} for i in range(10)], "name": "Jane"}
+        actual["users"][3]["tags"] = {"a", "c"}
+
+        diff = SmallDiff.compare(expected, actual)
+        self.assertEqual(len(diff), 3)
+        self.assertEqual(SmallDiff.compare(expected, actual, fingerprints=True), diff)
+        self.assertFalse(SmallDiff.is_equal(expected, actual, fingerprints=True))
+        self.assertTrue(SmallDiff.is_equal(expected, {**actual, **expected}, fingerprints=True))
+
+    def test_fingerprints_of_colliding_hashes(self):
+        """Test that values whose built-in hashes collide are not taken for equal by their fingerprints."""
+        self.assertEqual(
+            SmallDiff.compare({"a": -1}, {"a": -2}, fingerprints=True),
+            {"a": {"expected": -1, "actual": -2}}
+        )
+        self.assertFalse(SmallDiff.is_equal({"a": [-1, 5]}, {"a": [-2, 5]}, fingerprints=True))
+        self.assertTrue(SmallDiff.is_equal({"a": [1, 5]}, {"a": [True, 5.0]}, fingerprints=True))
+
+    def test_fingerprints_of_equal_roots_of_different_types(self):
+        """Test that fingerprints find equal roots of different types equal, as the plain comparison does."""
+        for expected, actual in [(2.0, 2), (True, 1)]:
+            self.assertEqual(SmallDiff.compare(expected, actual), {})
+            self.assertEqual(SmallDiff.compare(expected, actual, fingerprints=True), {})
+            self.assertTrue(SmallDiff.is_equal(expected, actual, fingerprints=True))
+        with self.assertRaises(TypeError):
+            SmallDiff.compare(2.5, 2, fingerprints=True)
+
+    def test_snapshot_prunes_identical_branches(self):
+        """Test that a snapshot is reusable and identical branches are not walked."""
+        expected = {"records": [{"id": i, "meta": {"values": [i, i + 1]}} for i in range(100)]}
+        actual = {"records": [{"id": i, "meta": {"values": [i, i + 1]}} for i in range(100)]}
+        actual["records"][42]["meta"]["values"][1] = 0
+        snapshot = SmallDiff.snapshot(expected)
+
+        with patch.object(DiffWalker, '_pairs', autospec=True, side_effect=DiffWalker._pairs) as pairs:
+            diff = SmallDiff.compare(snapshot, SmallDiff.snapshot(actual))
+        self.assertEqual(diff, {"records.42.meta.values.1": {"expected": 43, "actual": 0}})
+        self.assertEqual(pairs.call_count, 5)
+
+        self.assertTrue(SmallDiff.is_equal(snapshot, expected))
+        self.assertEqual(list(SmallDiff.iter_diff(snapshot, actual)), [("records.42.meta.values.1", 43, 0)])
+        with self.assertRaises(TypeError):
+            SmallDiff.compare(snapshot, [])
+
+    def test_baseline(self):
+        """Test that a baseline indexes its expected side once for many comparisons."""
+        expected = {"orders": [{"id": i, "items": [i, i + 1]} for i in range(5)], "tags": {"a", "b"}}
+        baseline = SmallDiff.baseline(expected, list_keys={"orders": "id"}, list_mode="align")
+
+        first = {"orders": [{"id": i, "items": [i, i + 1]} for i in reversed(range(5))], "tags": {"b", "a"}}
+        second = {"orders": [{"id": 1, "items": [0, 1, 2]}], "tags": {"a"}}
+
+        with patch.object(DiffWalker, '_index', autospec=True, side_effect=DiffWalker._index) as index:
+            self.assertTrue(baseline.is_equal(first))
+            diff = baseline.compare(second)
+        self.assertEqual(index.call_count, 3)
+
+        self.assertEqual(diff, SmallDiff.compare(expected, second, list_keys={"orders": "id"}, list_mode="align"))
+        self.assertEqual(diff["orders.1.items.+0"], {"expected": None, "actual": 0})
+        self.assertEqual(len(diff), 6)
+        self.assertEqual(list(baseline.iter_diff(second)), [
+            (path, val["expected"], val["actual"]) for path, val in diff.items()
+        ])
+        self.assertEqual(baseline.compare(second, max_diffs=2), dict(list(diff.items())[:2]))
+
+    def test_baseline_of_equal_root_of_another_type(self):
+        """Test that a baseline finds an equal root of another type equal, as compare does."""
+        for expected, actual in [(2.0, 2), (True, 1)]:
+            baseline = SmallDiff.baseline(expected)
+            self.assertEqual(baseline.compare(actual), SmallDiff.compare(expected, actual))
+            self.assertTrue(baseline.is_equal(actual))
+            self.assertEqual(list(baseline.iter_diff(actual)), [])
+        with self.assertRaises(TypeError):
+            SmallDiff.baseline(2.5).compare(2)
+
+    def test_baseline_skips_equal_records(self):
+        """Test that a baseline compares equal records natively instead of walking them, as compare does."""
+        def people(age):
+            address = AddressModel(street="123 Main St.", dist="Dhaka", zip=1227)
+            return {"people": [
+                PersonModel(name=f"John {i}", age=age if i == 3 else 28, gender=Gender.M, address=address)
+                for i in range(20)
+            ]}
+
+        baseline = SmallDiff.baseline(people(28))
+        walked = []
+        for compare in (lambda actual: SmallDiff.compare(people(28), actual), baseline.compare):
+            with patch.object(DiffWalker, '_pairs', autospec=True, side_effect=DiffWalker._pairs) as pairs:
+                for _ in range(3):
+                    self.assertEqual(compare(people(30)), {"people.3.age": {"expected": 28, "actual": 30}})
+            walked.append(pairs.call_count)
+        self.assertEqual(walked[1], walked[0])
+
+    def test_compare_many(self):
+        """Test that many pairs are compared across worker processes."""
+        pairs = [({"id": i, "tags": ["a", "b"]}, {"id": i, "tags": ["a", "b"] if i % 3 else ["a"]}) for i in range(20)]
+        expected = [(i, SmallDiff.compare(*pair)) for i, pair in enumerate(pairs)]
+
+        self.assertEqual(list(SmallDiff.compare_many(pairs, workers=2, chunksize=3)), expected)
+        self.assertEqual(list(SmallDiff.compare_many(iter(pairs), workers=1)), expected)
+        self.assertEqual(sorted(SmallDiff.compare_many(pairs, workers=2, chunksize=4, ordered=False)), expected)
+
+        counts = dict(SmallDiff.compare_many(pairs, workers=2, summary=True))
+        self.assertEqual(counts, {i: 0 if i % 3 else 1 for i in range(20)})
+
+    def test_compare_many_with_models(self):
+        """Test that models are normalized in the worker processes."""
+        address = AddressModel(street="123 Main St.", dist="Dhaka", zip=1227)
+        john = PersonModel(name="John Doe", age=28, gender=Gender.M, address=address)
+        jane = PersonModel(name="Jane Doe", age=28, gender=Gender.F, address=address)
+        results = list(SmallDiff.compare_many([(john, john), (john, jane)], workers=2, summary=True))
+        self.assertEqual(results, [(0, 0), (1, 2)])
+
+        with self.assertRaises(TypeError):
+            list(SmallDiff.compare_many([(john, {})], workers=2))
+
+    def test_compare_split_across_workers(self):
+        """Test that a large comparison split across workers gives the serial result."""
+        expected = {f"key{i}": {"values": list(range(i, i + 5)), "name": f"n{i}"} for i in range(50)}
+        actual = copy.deepcopy(expected)
+        actual["key7"]["values"][2] = -1
+        actual["key30"]["name"] = "changed"
+        del actual["key12"]
+        actual["extra"] = [1]
+
+        diff = SmallDiff.compare(expected, actual)
+        parallel_diff = SmallDiff.compare(expected, actual, workers=2, parallel_threshold=10)
+        self.assertEqual(list(parallel_diff.items()), list(diff.items()))
+
+        expected_list = list(expected.values())
+        actual_list = list(actual.values())
+        diff = SmallDiff.compare(expected_list, actual_list, list_mode="align")
+        parallel_diff = SmallDiff.compare(
+            expected_list, actual_list, list_mode="align", workers=3, parallel_threshold=10
+        )
+        self.assertEqual(list(parallel_diff.items()), list(diff.items()))
+        self.assertEqual(
+            list(SmallDiff.iter_diff(expected_list, actual_list, workers=3, parallel_threshold=10)),
+            list(SmallDiff.iter_diff(expected_list, actual_list))
+        )
+
+    def test_small_comparison_stays_serial(self):
+        """Test that comparisons under the parallel threshold are not split."""
+        with patch("smalldiff.main.parallel_map") as parallel_map:
+            diff = SmallDiff.compare({"a": [1, 2]}, {"a": [1, 3]}, workers=4)
+        self.assertEqual(diff, {"a.1": {"expected": 2, "actual": 3}})
+        parallel_map.assert_not_called()
+
+    def test_options_of_every_entry_point(self):
+        """Test that the entry points read and validate the options of the walk the same way."""
+        entry_points = [
+            lambda **options: SmallDiff.compare({"a": 1}, {"a": 2}, **options),
+            lambda **options: SmallDiff.is_equal({"a": 1}, {"a": 2}, **options),
+            lambda **options: SmallDiff.iter_diff({"a": 1}, {"a": 2}, **options),
+            lambda **options: SmallDiff.baseline({"a": 1}, **options),
+            lambda **options: list(SmallDiff.compare_many([({"a": 1}, {"a": 2})], workers=1, **options)),
+        ]
+        for entry_point in entry_points:
+            with self.assertRaises(ValueError):
+                entry_point(list_mode="sorted")
+            with self.assertRaises(ValueError):
+                entry_point(tolerances={"a": (-1.0, 0.0)})
+            with self.assertRaises(TypeError):
+                entry_point(list_key={"a": "id"})
+        self.assertFalse(SmallDiff.baseline({"a": [1, 2]}, list_mode="align").is_equal({"a": [2]}))
+
+    def test_public_names(self):
+        """Test that the package exports its public classes only, not the names its modules import."""
+        names = {
+            name for name in dir(smalldiff)
+            if not name.startswith('_') and not isinstance(getattr(smalldiff, name), types.ModuleType)
+        }
+        self.assertEqual(names, {
+            'SmallDiff', 'Baseline', 'DiffResult', 'Snapshot', 'ModelEncoder', 'Normalizer', 'UnorderedList',
+            'Reporter', 'JsonReporter', 'JsonLinesReporter', 'TextReporter', 'SummaryReporter'
+        })
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,181 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from smalldiff import SmallDiff
+from smalldiff.normalizer import Normalizer
+from smalldiff.stream import JsonEvents, materialize, stream_differences, START, END, KEY, VALUE
+from smalldiff.walker import DiffWalker
+
+
+def chunks(text, size):
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+class TestJsonEvents(unittest.TestCase):
+
+    document = {
+        "name": "Jöhn \"Doe\"\n\U0001F600",
+        "age": 28,
+        "scores": [1.5, -2e-3, 12345678901234567890, 0],
+        "flags": [True, False, None],
+        "address": {"zip": 1227, "lines": [], "extra": {}},
+    }
+
+    def load(self, text, chunk_size, window):
+        events = iter(JsonEvents(chunks(text, chunk_size), window=window))
+        value = materialize(next(events), events)
+        self.assertIsNone(next(events, None))
+        return value
+
+    def test_same_values_as_json(self):
+        for indent in (None, 2):
+            text = json.dumps(self.document, indent=indent, ensure_ascii=indent is None)
+            for chunk_size in (1, 2, 7, 1024):
+                for window in (0, 16, 1 << 20):
+                    self.assertEqual(self.load(text, chunk_size, window), self.document)
+
+    def test_events(self):
+        events = list(JsonEvents(chunks('{"a": [1, {"b": null}], "c": "d"}', 3), window=0))
+        self.assertEqual(events, [
+            (START, "mapping"), (KEY, "a"),
+            (START, "sequence"), (VALUE, 1), (START, "mapping"), (KEY, "b"), (VALUE, None), (END, "mapping"),
+            (END, "sequence"),
+            (KEY, "c"), (VALUE, "d"),
+            (END, "mapping"),
+        ])
+        self.assertEqual(list(JsonEvents(iter(['{"a": [1, 2]}']))), [(VALUE, {"a": [1, 2]})])
+
+    def test_invalid_documents(self):
+        for text in ('', '[1,]', '{"a" 1}', '{"a": 1,}', '[1 2]', '1 2', '{1: 2}', '"abc', '[', 'tru', '01'):
+            for window in (0, 1 << 20):
+                with self.assertRaises(ValueError, msg=text):
+                    list(JsonEvents(chunks(text, 2), window=window))
+
+
+class TestCompareFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        return path
+
+    def assert_same_as_compare(self, expected, actual, **options):
+        expected_path, actual_path = self.write("expected.json", expected), self.write("actual.json", actual)
+        diff = SmallDiff.compare_files(expected_path, actual_path, **options)
+        self.assertEqual(list(diff.items()), list(SmallDiff.compare(expected, actual, **options).items()))
+        return diff
+
+    def test_compare_files(self):
+        expected = {"users": [{"id": i, "name": f"user {i}", "tags": ["a", "b"]} for i in range(100)], "total": 100}
+        actual = json.loads(json.dumps(expected))
+        actual["users"][42]["tags"].append("c")
+        actual["users"][7]["name"] = "changed"
+        actual["users"].pop()
+        actual["total"] = 99
+
+        diff = self.assert_same_as_compare(expected, actual)
+        self.assertEqual(diff["users.42.tags.2"], {"expected": None, "actual": "c"})
+        self.assertEqual(len(diff), 4)
+        self.assertEqual(self.assert_same_as_compare(expected, expected), {})
+
+    def test_compare_files_with_reordered_keys(self):
+        expected = {"a": 1, "b": {"x": [1, 2], "y": 2}, "c": 3}
+        actual = {"a": 1, "c": 4, "b": {"y": 2, "x": [1, 3]}, "d": 5}
+        diff = self.assert_same_as_compare(expected, actual)
+        self.assertEqual(list(diff), ["b.x.1", "c", "d"])
+
+    def test_compare_files_with_list_options(self):
+        expected = {"orders": [{"id": 1, "qty": 1}, {"id": 2, "qty": 2}], "tags": ["a", "b"], "log": [1, 2, 3]}
+        actual = {"orders": [{"id": 2, "qty": 3}, {"id": 1, "qty": 1}], "tags": ["b", "a"], "log": [0, 1, 2, 3]}
+        self.assert_same_as_compare(
+            expected, actual, list_keys={"orders": "id"}, unordered=["tags"], list_mode="align"
+        )
+
+    def test_compare_files_with_filters_and_comparators(self):
+        expected = {"a": [1, 2, 3], "b": {"c": "X", "d": [1]}, "e": [{"f": 1}], "g": 1.0}
+        actual = {"a": [1, 2], "b": {"c": "x", "d": {"k": 1}}, "e": [{"f": 2}, {"f": 3}], "g": 1.05}
+        options = [
+            dict(exclude=["a.2", "b.d"]),
+            dict(include=["e.1"]),
+            dict(comparators={"b.c": lambda e, a: e.lower() == a.lower(), "e.*": lambda e, a: True}),
+            dict(comparators={dict: lambda e, a: len(e) == len(a)}),
+            dict(rel_tol=0.1, tolerances={"g": (0.0, 0.01)}),
+        ]
+        for option in options:
+            self.assert_same_as_compare(expected, actual, **option)
+        self.assertEqual(self.assert_same_as_compare(expected, actual, exclude=["a", "b", "e"], abs_tol=0.1), {})
+
+    def test_compare_files_with_primitives_and_max_diffs(self):
+        self.assertEqual(
+            SmallDiff.compare_files(self.write("a.json", [1, 2]), self.write("b.json", {"a": 1})),
+            {"expected": [1, 2], "actual": {"a": 1}}
+        )
+        self.assertEqual(
+            SmallDiff.compare_files(self.write("a.json", 1), self.write("b.json", 2)),
+            {"expected": 1, "actual": 2}
+        )
+        diff = SmallDiff.compare_files(self.write("a.json", list(range(10))), self.write("b.json", []), max_diffs=3)
+        self.assertEqual(list(diff), [0, 1, 2])
+
+    def test_streamed_containers(self):
+        expected = {"rows": [{"id": i, "values": list(range(i % 5))} for i in range(50)]}
+        actual = json.loads(json.dumps(expected))
+        actual["rows"][10]["values"] = {"changed": True}
+        del actual["rows"][20]["id"]
+        actual["rows"].append([])
+
+        walker = DiffWalker(Normalizer())
+        for window in (0, 64):
+            differences = stream_differences(
+                iter(JsonEvents(chunks(json.dumps(expected), 5), window=window)),
+                iter(JsonEvents(chunks(json.dumps(actual), 11), window=window)),
+                walker
+            )
+            self.assertEqual(list(differences), list(walker.walk(expected, actual)))
+
+    def test_reordered_keys_are_streamed(self):
+        data = [{"id": i, "values": list(range(i % 5))} for i in range(200)]
+        expected = {"meta": {"count": 200}, "data": data, "total": 200}
+        actual = {"data": json.loads(json.dumps(data)), "extra": [1], "total": 199}
+        actual["data"][100]["id"] = -1
+
+        loaded = []
+
+        def load(first, events):
+            value = materialize(first, events)
+            loaded.append(value)
+            return value
+
+        walker = DiffWalker(Normalizer())
+        with mock.patch("smalldiff.stream.materialize", side_effect=load):
+            differences = list(stream_differences(
+                iter(JsonEvents(chunks(json.dumps(expected), 5), window=64)),
+                iter(JsonEvents(chunks(json.dumps(actual), 11), window=64)),
+                walker
+            ))
+        self.assertEqual(differences, list(walker.walk(expected, actual)))
+        self.assertEqual([path for path, *_ in differences], [("meta",), ("data", 100, "id"), ("total",), ("extra",)])
+        self.assertNotIn(data, loaded)
+
+    def test_invalid_file(self):
+        path = os.path.join(self.directory, "invalid.json")
+        with open(path, "w") as file:
+            file.write('{"a": [1, 2}')
+        with self.assertRaises(ValueError):
+            SmallDiff.compare_files(path, self.write("valid.json", {"a": [1, 2]}))
+
+
+if __name__ == '__main__':
+    unittest.main()